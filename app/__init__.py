@@ -7,13 +7,20 @@ from .professors import professors_bp
 from .guests import guests_bp
 from .models import User  # garante que modelos carregam
 from .commands import register_commands
+from .services import identity_cache
+from .services import search_index  # noqa: F401  (registra eventos de search_key)
+from .services import reference_cache  # noqa: F401  (registra invalidação no commit)
+from .services import export_cache  # noqa: F401  (troca a versão dos dados no commit)
+from .services import delta  # noqa: F401  (grava lápides dos registros apagados)
 import os
+import json
 
 from app.reports import reports_bp
 
 # __init__.py
 import logging, sys, uuid
 from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask import render_template
 from .extensions import db
 
@@ -52,6 +59,10 @@ def create_app() -> Flask:
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(Config)
 
+    # IP real do cliente atrás do Nginx (usado no throttling de login)
+    if app.config.get("PROXY_FIX_X_FOR"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
     app.config['TEMPLATES_AUTO_RELOAD'] = True
     app.jinja_env.auto_reload = True
 
@@ -63,6 +74,9 @@ def create_app() -> Flask:
     except OSError:
         pass
 
+    # custo de hash calibrado no host (flask calibrate-hashing)
+    app.config.from_file("hashing.json", load=json.load, silent=True)
+
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
@@ -73,7 +87,8 @@ def create_app() -> Flask:
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # snapshot em cache (sem SELECT em users no hit); ver services/identity_cache.py
+        return identity_cache.get(int(user_id), lambda uid: User.query.get(uid))
 
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "warning"
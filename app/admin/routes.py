@@ -5,7 +5,7 @@ from sqlalchemy.orm import joinedload
 
 from flask import (
     Blueprint, render_template, request, redirect, url_for,
-    flash, jsonify
+    flash, jsonify, current_app
 )
 from flask_login import login_required, current_user
 from sqlalchemy import or_, func
@@ -13,8 +13,12 @@ from sqlalchemy.exc import IntegrityError
 
 from ..extensions import db, bcrypt
 from ..utils.decorators import role_required
+from ..utils.pagination import keyset_paginate
 from . import admin_bp
 from ..services.excel_export import export_demo
+from ..services import identity_cache, login_tokens, user_import, rate_limit, search_index, reference_cache
+from ..services import student_import, group_members, score_summary
+from ..services import passwords as password_service
 
 from ..models import (
     Student, Campus, Offering,
@@ -26,23 +30,19 @@ from .forms import (
     StudentForm, GroupCreateForm, GroupEditForm, GradeForm, UserForm
 )
 
-from app.services.grades import upsert_assessment, get_assessment_score
+from app.services import grades as grade_service
 
 # =============================================================================
 # Helpers comuns
 # =============================================================================
 
-# --- Ofertas para o select do usuário (mostra dono atual quando não é o próprio) ---
+# --- Selects do admin: dados de referência vêm do reference_cache ---
+# (zero consultas por render; invalidado no commit que alterar Campus/Offering/User)
+
 def offering_choices_for_user(target_user_id: int | None = None):
-    rows = (
-        db.session.query(Offering.id, Offering.code, Offering.description,
-                         Offering.professor_id, User.full_name)
-        .outerjoin(User, User.id == Offering.professor_id)
-        .order_by(Offering.code.asc())
-        .all()
-    )
+    """Ofertas para o select do usuário (mostra dono atual quando não é o próprio)."""
     choices = []
-    for oid, code, desc, owner_id, owner_name in rows:
+    for oid, code, desc, owner_id, owner_name in reference_cache.offerings():
         label = code
         if desc:
             label += f" — {desc}"
@@ -51,44 +51,12 @@ def offering_choices_for_user(target_user_id: int | None = None):
         choices.append((oid, label))
     return choices
 
-
-
-# routes.py (perto dos outros helpers)
-def offering_choices_for_user(target_user_id: int | None = None):
-    rows = (
-        Offering.query
-        .outerjoin(User, User.id == Offering.professor_id)
-        .order_by(Offering.code.asc())
-        .all()
-    )
-    choices = []
-    for off in rows:
-        owner = off.professor.full_name if off.professor else None
-        label = f"{off.code}"
-        if off.description:
-            label += f" — {off.description}"
-        if owner and (target_user_id is None or off.professor_id != target_user_id):
-            label += f" (atual: {owner})"
-        choices.append((off.id, label))
-    return choices
-
 def campus_choices():
-    return [(c.id, c.name) for c in Campus.query.order_by(Campus.name.asc()).all()]
+    return [(c.id, c.name) for c in reference_cache.campuses()]
 
 def professor_choices(include_placeholder=True):
-    q = (
-        User.query
-        .filter(User.is_active.is_(True))
-        .filter(or_(
-            User.role == Role.professor,               # Enum(Role)
-            func.lower(User.role) == "professor",      # string
-            func.lower(User.role) == "role.professor"  # legado
-        ))
-        .order_by(User.full_name.asc())
-    )
-    rows = q.all()
     choices = [(-1, "— Sem orientador —")] if include_placeholder else []
-    choices += [(u.id, u.full_name or u.email) for u in rows]
+    choices += reference_cache.professors()
     return choices
 
 def _inst(*names):
@@ -116,6 +84,21 @@ INST_PAPER = _inst("PAPER", "paper")
 def dashboard():
     return render_template("admin/dashboard.html")
 
+@admin_bp.route("/api/cache-stats")
+@login_required
+@role_required("admin")
+def api_cache_stats():
+    """Contadores dos caches em memória (deste worker)."""
+    return jsonify({"ok": True, "identity": identity_cache.stats(),
+                    "reference": reference_cache.stats()})
+
+@admin_bp.route("/api/login-throttle")
+@login_required
+@role_required("admin")
+def api_login_throttle():
+    """Contadores do throttling de login (tentativas permitidas/rejeitadas)."""
+    return jsonify({"ok": True, "login_throttle": rate_limit.stats()})
+
 @admin_bp.route("/export/excel")
 @login_required
 @role_required("admin")
@@ -138,8 +121,9 @@ def students_list():
              .options(joinedload(Student.campus), joinedload(Student.offering)))
 
     if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Student.name.ilike(like), Student.rgm.ilike(like)))
+        # busca indexada: prefixo do nome normalizado / de palavras / do RGM
+        query = query.filter(search_index.match("student", Student.id, Student.search_key, q,
+                                                extra=[search_index.prefix(Student.rgm, q)]))
 
     if campus_id.isdigit():
         query = query.filter(Student.campus_id == int(campus_id))
@@ -147,9 +131,10 @@ def students_list():
     if off_id.isdigit():
         query = query.filter(Student.offering_id == int(off_id))
 
-    students  = query.order_by(Student.name.asc()).all()
-    campuses  = Campus.query.order_by(Campus.name.asc()).all()
-    offerings = Offering.query.order_by(Offering.code.asc()).all()
+    page = keyset_paginate(query, [Student.name, Student.id], lambda s: (s.name, s.id))
+    students  = page.items
+    campuses  = reference_cache.campuses()
+    offerings = reference_cache.offerings()
 
     return render_template(
         "admin/students_list.html",
@@ -159,6 +144,7 @@ def students_list():
         off_id=off_id,
         campuses=campuses,
         offerings=offerings,
+        page=page,
     )
 
 @admin_bp.route("/students/new", methods=["GET", "POST"])
@@ -198,6 +184,30 @@ def students_new():
 
     return render_template("admin/students_new.html", form=form)
 
+@admin_bp.route("/students/import", methods=["GET", "POST"])
+@login_required
+@role_required("admin")
+def students_import():
+    """Upload da lista de alunos (CSV/XLSX: rgm, nome, campus, oferta) — upsert em lote por RGM."""
+    if request.method == "POST":
+        f = request.files.get("file")
+        if not f or not f.filename:
+            flash("Selecione um arquivo CSV ou XLSX.", "warning")
+            return render_template("admin/students_import.html", report=None)
+
+        dry_run = request.form.get("dry_run") == "1"
+        try:
+            report = student_import.import_roster(f.stream, f.filename, dry_run=dry_run)
+        except Exception as e:  # arquivo corrompido / XLSX inválido
+            current_app.logger.warning("students_import: %s", e)
+            flash("Não foi possível ler o arquivo. Envie um CSV ou XLSX válido.", "danger")
+            return render_template("admin/students_import.html", report=None)
+        if not dry_run and (report.created or report.updated):
+            flash(f"{len(report.created)} aluno(s) criado(s), {len(report.updated)} atualizado(s).", "success")
+        return render_template("admin/students_import.html", report=report, dry_run=dry_run)
+
+    return render_template("admin/students_import.html", report=None)
+
 @admin_bp.route("/students/<int:student_id>/edit", methods=["GET", "POST"])
 @login_required
 @role_required("admin")
@@ -265,14 +275,17 @@ def groups_list():
     if advisor:
         base = base.filter(Group.orientador_user_id == advisor)
 
-    # filtro por aluno (nome ou RGM)
+    # filtro por aluno (nome ou RGM) ou título — subconsulta para não duplicar grupos na página
     if q:
-        like = f"%{q}%"
-        base = (base.join(GroupStudent, GroupStudent.group_id == Group.id, isouter=True)
-                    .join(Student, Student.id == GroupStudent.student_id, isouter=True)
-                    .filter((Student.name.ilike(like)) | (Student.rgm.ilike(like))))
+        match = (db.session.query(GroupStudent.group_id)
+                 .join(Student, Student.id == GroupStudent.student_id)
+                 .filter(search_index.match("student", Student.id, Student.search_key, q,
+                                            extra=[search_index.prefix(Student.rgm, q)])))
+        base = base.filter(or_(Group.id.in_(match),
+                               search_index.match("group", Group.id, Group.search_key, q)))
 
-    groups = base.order_by(Group.id.asc()).all()
+    page = keyset_paginate(base.options(joinedload(Group.orientador)), [Group.id], lambda g: (g.id,))
+    groups = page.items
 
     # carrega membros em lote (evita N+1; members é dynamic => fazemos manual)
     group_ids = [g.id for g in groups] or [0]
@@ -293,12 +306,7 @@ def groups_list():
         data.append({"g": g, "members": members_map.get(g.id, []), "orientador": orientador})
 
     # lista de orientadores para o select (ativos)
-    advisors = (
-        db.session.query(User.id, User.full_name)
-        .filter((User.role == "professor") & (User.is_active.is_(True)))
-        .order_by(User.full_name.asc())
-        .all()
-    )
+    advisors = reference_cache.professors()
 
     return render_template(
         "admin/groups_list.html",
@@ -306,6 +314,7 @@ def groups_list():
         q=q,
         advisor=advisor,
         advisors=advisors,
+        page=page,
     )
 
 @admin_bp.route("/groups/new", methods=["GET", "POST"])
@@ -325,7 +334,7 @@ def groups_new():
         missing = [r for r in lines if r not in found_rgms]
         if missing:
             flash(f"RGM(s) não encontrados: {', '.join(missing)}", "danger")
-            return render_template("admin/groups_new.html", form=form)
+            return render_template("admin/groups_new.html", form=form, lookup_max=group_members.LOOKUP_MAX)
 
         grp = Group(title=(form.title.data or "").strip() or None)
         sel = form.orientador_user_id.data
@@ -341,7 +350,7 @@ def groups_new():
         flash(f"Grupo #{grp.id} criado com {len(students)} aluno(s).", "success")
         return redirect(url_for("admin.groups_list"))
 
-    return render_template("admin/groups_new.html", form=form)
+    return render_template("admin/groups_new.html", form=form, lookup_max=group_members.LOOKUP_MAX)
 
 @admin_bp.route("/api/students/by_rgm")
 @login_required
@@ -351,27 +360,35 @@ def api_student_by_rgm():
     if not rgm:
         return jsonify({"ok": False, "error": "RGM vazio"}), 400
 
-    s = Student.query.filter_by(rgm=rgm).first()
-    if not s:
+    st = group_members.lookup_rgms([rgm]).get(rgm)
+    if not st:
         return jsonify({"ok": True, "found": False})
+    return jsonify({"ok": True, "found": True, "student": st})
 
-    gs = GroupStudent.query.filter_by(student_id=s.id).first()
-    in_group = gs is not None
-    group_id = gs.group_id if gs else None
+@admin_bp.route("/api/students/by_rgms")
+@login_required
+@role_required("admin")
+def api_students_by_rgms():
+    """
+    Lote de RGMs (?rgm=1&rgm=2 ou ?rgms=1,2,3) -> alunos + campus/oferta/grupo
+    numa consulta só. Resposta com ETag: o navegador revalida com 304.
+    """
+    rgms = group_members.parse_rgms(request.args.getlist("rgm") + [request.args.get("rgms") or ""])
+    if not rgms:
+        return jsonify({"ok": False, "error": "RGM vazio"}), 400
+    if len(rgms) > group_members.LOOKUP_MAX:
+        return jsonify({"ok": False, "error": f"máximo de {group_members.LOOKUP_MAX} RGMs por consulta"}), 400
 
-    return jsonify({
+    found = group_members.lookup_rgms(rgms)
+    resp = jsonify({
         "ok": True,
-        "found": True,
-        "student": {
-            "id": s.id,
-            "rgm": s.rgm,
-            "name": s.name,
-            "campus": s.campus.name if s.campus else "-",
-            "offering": s.offering.code if s.offering else "-",
-            "in_group": in_group,
-            "group_id": group_id
-        }
+        "students": [found[r] for r in rgms if r in found],
+        "missing": [r for r in rgms if r not in found],
     })
+    # curto e privado: o vínculo com grupo muda quando outro admin salva
+    resp.headers["Cache-Control"] = "private, max-age=30"
+    resp.add_etag()
+    return resp.make_conditional(request)
 
 @admin_bp.route("/groups/<int:group_id>/edit", methods=["GET", "POST"])
 @login_required
@@ -384,101 +401,61 @@ def groups_edit(group_id):
     if request.method == "GET":
         form.title.data = group.title or ""
         form.orientador_user_id.data = group.orientador_user_id if group.orientador_user_id is not None else -1
-        current_rgms = [gs.student.rgm for gs in group.members]
-        form.rgms.data = "\n".join(current_rgms)
+
+    def _render(status=200):
+        members = group_members.members(group.id)
+        current_rgms = [m.rgm for m in members]
+        if request.method == "GET":
+            form.rgms.data = "\n".join(current_rgms)
+        return render_template("admin/groups_edit.html",
+                               form=form, group=group, members=members, current_rgms=current_rgms), status
 
     if form.validate_on_submit():
         group.title = (form.title.data or "").strip() or None
         sel = form.orientador_user_id.data
         group.orientador_user_id = None if sel == -1 else sel
 
-        # Normaliza lista de RGMs desejados
-        lines = [ln.strip() for ln in (form.rgms.data or "").splitlines() if ln.strip()]
-        wanted_rgms = set(lines)
-
-        # Resolve RGMs -> Students
-        students = Student.query.filter(Student.rgm.in_(wanted_rgms)).all()
-        found_by_rgm = {s.rgm: s for s in students}
-        missing = [r for r in wanted_rgms if r not in found_by_rgm]
-        if missing:
-            flash(f"RGM(s) não encontrados: {', '.join(missing)}", "warning")
-
-        wanted_ids = {found_by_rgm[r].id for r in found_by_rgm}
-        current_ids = {gs.student_id for gs in group.members}
+        # manter / adicionar / remover / conflito / não encontrado — 1 SELECT
+        diff = group_members.diff(group.id, (form.rgms.data or "").splitlines())
+        if diff.missing:
+            flash(f"RGM(s) não encontrados: {', '.join(diff.missing)}", "warning")
 
         # --- DETECÇÃO DE CONFLITOS (alunos já em outro grupo) ---
         # Se não estiver reatribuindo, apenas avisa e não toca nos dados
         reassign = (request.form.get("reassign") == "1")
 
-        if wanted_ids:
-            conflicts = (
-                db.session.query(Student.id, Student.rgm, Student.name, Group.id, Group.title)
-                .join(GroupStudent, GroupStudent.student_id == Student.id)
-                .join(Group, Group.id == GroupStudent.group_id)
-                .filter(Student.id.in_(wanted_ids), GroupStudent.group_id != group.id)
-                .all()
-            )
-        else:
-            conflicts = []
-
-        if conflicts and not reassign:
+        if diff.conflicts and not reassign:
             # Só informa o problema e retorna 409 sem alterar nada
-            itens = [f"{rgm} - {name} (já no grupo #{gid}: '{gtitle}')" for sid, rgm, name, gid, gtitle in conflicts]
+            itens = [f"{rgm} - {name} (já no grupo #{gid}: '{gtitle}')" for sid, rgm, name, gid, gtitle in diff.conflicts]
             flash(
                 "Alguns alunos já pertencem a outro grupo e não foram adicionados:\n" +
                 "".join(itens) +
                 "\nDica: confirme a reatribuição marcando a opção",
                 "warning"
             )
-            # Recarrega a tela com membros atuais
-            members = [gs.student for gs in group.members]
-            current_rgms = [s.rgm for s in members]
-            return render_template("admin/groups_edit.html",
-                                   form=form, group=group, members=members, current_rgms=current_rgms), 409
+            db.session.rollback()
+            return _render(409)
 
-        # --- A PARTIR DAQUI: APLICAR MUDANÇAS ---
+        # --- A PARTIR DAQUI: APLICAR MUDANÇAS (1 DELETE + 1 INSERT) ---
         try:
-            if conflicts and reassign:
-                # Remove vínculos antigos dos conflitantes (move)
-                conflict_ids = [sid for sid, *_ in conflicts]
-                GroupStudent.query.filter(GroupStudent.student_id.in_(conflict_ids)).delete(synchronize_session=False)
-
-            # Remover quem saiu deste grupo
-            to_remove = current_ids - wanted_ids
-            if to_remove:
-                GroupStudent.query.filter(
-                    GroupStudent.group_id == group.id,
-                    GroupStudent.student_id.in_(list(to_remove))
-                ).delete(synchronize_session=False)
-
-            # Adicionar quem falta (evita duplicar quem já está)
-            to_add = wanted_ids - (current_ids - set())  # current_ids já reflete antes das remoções
-            for sid in to_add:
-                db.session.add(GroupStudent(group_id=group.id, student_id=sid))
-
+            group_members.apply(group.id, diff, reassign=reassign)
             db.session.commit()
 
             msg = "Grupo atualizado com sucesso."
-            if conflicts and reassign:
-                moved_rgms = ", ".join([rgm for _, rgm, *_ in conflicts])
+            if diff.conflicts and reassign:
+                moved_rgms = ", ".join([rgm for _, rgm, *_ in diff.conflicts])
                 msg += f" Reatribuídos: {moved_rgms}."
             flash(msg, "success")
             return redirect(url_for("admin.groups_list"))
 
         except IntegrityError:
             db.session.rollback()
-            # fallback defensivo: recalcula conflitos e avisa
+            # fallback defensivo: outro admin mexeu nos mesmos alunos ao mesmo tempo
             flash("Conflito de membros detectado. Nenhuma alteração foi aplicada.", "danger")
-            members = [gs.student for gs in group.members]
-            current_rgms = [s.rgm for s in members]
-            return render_template("admin/groups_edit.html",
-                                   form=form, group=group, members=members, current_rgms=current_rgms), 409
+            return _render(409)
 
     # GET ou formulário inválido
-    members = [gs.student for gs in group.members]
-    current_rgms = [s.rgm for s in members]
-    return render_template("admin/groups_edit.html",
-                           form=form, group=group, members=members, current_rgms=current_rgms)
+    return _render()
 
 
 @admin_bp.route("/groups/<int:group_id>/delete", methods=["POST"])
@@ -490,6 +467,7 @@ def groups_delete(group_id):
     GroupProfessor.query.filter_by(group_id=grp.id).delete()
     GroupAssessment.query.filter_by(group_id=grp.id).delete()
     BannerEvaluation.query.filter_by(group_id=grp.id).delete()
+    score_summary.delete([grp.id])
     db.session.delete(grp)
     db.session.commit()
     flash("Grupo excluído.", "success")
@@ -507,29 +485,24 @@ def groups_grades(group_id):
     form = GradeForm()
 
     if form.validate_on_submit():
-        score_ri  = Decimal("0.5") if form.relatorio_i.data  else Decimal("0.0")
-        score_rii = Decimal("0.5") if form.relatorio_ii.data else Decimal("0.0")
-        paper_val = form.paper.data
-        score_paper = Decimal(str(paper_val)) if paper_val is not None else Decimal("0.0")
-
-        upsert_assessment(group.id, INST_RI,    score_ri,    current_user.id)
-        upsert_assessment(group.id, INST_RII,   score_rii,   current_user.id)
-        upsert_assessment(group.id, INST_PAPER, score_paper, current_user.id)
+        scores = grade_service.scores_from_form(form.relatorio_i.data, form.relatorio_ii.data, form.paper.data)
+        grade_service.upsert_scores({group.id: scores}, current_user.id)  # 1 comando p/ as 3 notas
 
         db.session.commit()
         flash("Notas salvas com sucesso.", "success")
         return redirect(url_for("admin.groups_grades", group_id=group.id))
 
     # Pré-preenche
-    ri_score    = get_assessment_score(group.id, INST_RI)    or Decimal("0")
-    rii_score   = get_assessment_score(group.id, INST_RII)   or Decimal("0")
-    paper_score = get_assessment_score(group.id, INST_PAPER)
+    current = grade_service.scores_for_group(group.id)  # 1 consulta p/ as 3 notas
+    ri_score    = current.get(INST_RI)    or Decimal("0")
+    rii_score   = current.get(INST_RII)   or Decimal("0")
+    paper_score = current.get(INST_PAPER)
 
     form.relatorio_i.data  = (ri_score  >= Decimal("0.5"))
     form.relatorio_ii.data = (rii_score >= Decimal("0.5"))
     form.paper.data = float(paper_score) if paper_score is not None else None
 
-    members = [gs.student for gs in group.members]
+    members = group_members.members(group.id)
     return render_template("admin/groups_grades.html", group=group, members=members, form=form)
 
 # =============================================================================
@@ -545,8 +518,8 @@ def users_list():
 
     query = User.query
     if q:
-        like = f"%{q}%"
-        query = query.filter(or_(User.full_name.ilike(like), User.email.ilike(like)))
+        query = query.filter(search_index.match("user", User.id, User.search_key, q,
+                                                extra=[search_index.prefix(User.email, q.lower())]))
 
     # 🔧 filtro robusto por perfil
     aliases = {
@@ -570,10 +543,14 @@ def users_list():
 
         query = query.filter(or_(*conds))
 
-    users = query.order_by(User.full_name.asc()).all()
+    page = keyset_paginate(query, [User.full_name, User.id], lambda u: (u.full_name, u.id))
+    users = page.items
 
+    # contagem só para os usuários da página
+    user_ids = [u.id for u in users] or [0]
     counts = (
         db.session.query(Group.orientador_user_id, func.count(Group.id))
+        .filter(Group.orientador_user_id.in_(user_ids))
         .group_by(Group.orientador_user_id)
         .all()
     )
@@ -585,6 +562,7 @@ def users_list():
         q=q,
         role=role_param,
         group_counts=group_counts,
+        page=page,
     )
 
 
@@ -666,7 +644,7 @@ def users_edit(user_id):
 
     # Pré-seleciona ofertas atuais
     if request.method == "GET":
-        current_off_ids = [o.id for o in Offering.query.filter_by(professor_id=user.id).all()]
+        current_off_ids = [o.id for o in reference_cache.offerings() if o.professor_id == user.id]
         form.offerings.data = current_off_ids
 
     if form.validate_on_submit():
@@ -740,6 +718,7 @@ def users_edit(user_id):
                     .update({Offering.professor_id: None}, synchronize_session=False))
 
         db.session.commit()
+        identity_cache.invalidate(user.id)
 
         if raw_role != "professor":
             flash("Usuário atualizado. Ofertas desvinculadas (perfil não é Professor).", "success")
@@ -768,9 +747,78 @@ def users_delete(user_id):
 
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user_id)
     flash("Usuário excluído.", "success")
     return redirect(url_for("admin.users_list"))
 
+@admin_bp.route("/users/import", methods=["GET", "POST"])
+@login_required
+@role_required("admin")
+def users_import():
+    """Upload de CSV com avaliadores (email, nome, perfil, senha) — importação em lote."""
+    max_rows = int(current_app.config.get("USERS_IMPORT_WEB_MAX_ROWS", 20))
+    if request.method == "POST":
+        f = request.files.get("file")
+        if not f or not f.filename:
+            flash("Selecione um arquivo CSV.", "warning")
+            return render_template("admin/users_import.html", report=None)
+
+        default_role = (request.form.get("default_role") or "guest").strip().lower()
+        if default_role not in ("guest", "professor", "admin"):
+            default_role = "guest"
+        dry_run = request.form.get("dry_run") == "1"
+
+        text = user_import.decode_upload(f.read())
+        # lote pequeno, com hash no pool "import" (não ocupa vaga do login)
+        report = user_import.import_users(text, default_role=default_role, dry_run=dry_run,
+                                          max_rows=max_rows, hasher=password_service.hash_batch)
+        if report.created and not dry_run:
+            flash(f"{len(report.created)} usuário(s) criado(s).", "success")
+        return render_template("admin/users_import.html", report=report, dry_run=dry_run,
+                               max_rows=max_rows)
+
+    return render_template("admin/users_import.html", report=None, max_rows=max_rows)
+
+
+@admin_bp.route("/users/access-links", methods=["GET", "POST"])
+@login_required
+@role_required("admin")
+def users_access_links():
+    """
+    Gera links/QR de acesso de uso único para convidados (dia do pôster)
+    e mostra a folha para impressão.
+    """
+    guests = (
+        User.query
+        .filter(User.is_active.is_(True))
+        .filter(func.lower(User.role).in_(["guest", "convidado", "role.convidado"]))
+        .order_by(User.full_name.asc())
+        .all()
+    )
+
+    if request.method == "POST":
+        ids = {int(x) for x in request.form.getlist("user_ids") if x.isdigit()}
+        selected = [u for u in guests if u.id in ids]
+        if not selected:
+            flash("Selecione ao menos um convidado.", "warning")
+            return render_template("admin/access_links.html", guests=guests)
+
+        max_hours = current_app.config.get("LOGIN_TOKEN_MAX_HOURS", 72)
+        ttl = request.form.get("ttl_hours", type=float) or 12
+        ttl = max(1, min(ttl, max_hours))
+
+        issued = login_tokens.issue_tokens(selected, ttl, created_by_user_id=current_user.id)
+        db.session.commit()
+        links = [
+            {"user": u, "url": url_for("auth.login_token", token=tok, _external=True)}
+            for u, tok in issued
+        ]
+        return render_template("admin/access_links_sheet.html", links=links, ttl=ttl,
+                               generated_at=datetime.now())
+
+    return render_template("admin/access_links.html", guests=guests)
+
+
 @admin_bp.route("/users/<int:user_id>/groups")
 @login_required
 @role_required("admin")
@@ -1,9 +1,21 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, make_response, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from . import auth_bp
 from .forms import LoginForm, AccountForm
 from ..models import User
 from ..extensions import db
+from ..services.passwords import PasswordPoolBusy
+from ..services import identity_cache, login_tokens, rate_limit
+
+BUSY_MSG = "Muitos acessos simultâneos. Tente novamente em alguns segundos."
+
+
+def _busy_response(template, form):
+    """Resposta rápida quando o pool de senhas está lotado (não segura a thread)."""
+    flash(BUSY_MSG, "warning")
+    resp = make_response(render_template(template, form=form), 503)
+    resp.headers["Retry-After"] = "5"
+    return resp
 
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
@@ -11,9 +23,30 @@ def login():
         return redirect(url_for("index"))
     form = LoginForm()
     if form.validate_on_submit():
+        # throttling antes de qualquer consulta/hash
+        allowed, retry_after = rate_limit.check_login(request.remote_addr, form.email.data)
+        if not allowed:
+            current_app.logger.warning("login throttled ip=%s email=%s", request.remote_addr, form.email.data)
+            flash("Muitas tentativas de login. Aguarde um pouco e tente novamente.", "warning")
+            resp = make_response(render_template("auth/login.html", form=form), 429)
+            resp.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+            return resp
+
         user = User.query.filter_by(email=form.email.data.strip().lower()).first()
-        if user and user.check_password(form.password.data) and user.is_active:
+        try:
+            ok = bool(user) and user.check_password(form.password.data)
+        except PasswordPoolBusy:
+            return _busy_response("auth/login.html", form)
+        if ok and user.is_active:
+            # upgrade transparente do hash (formato legado / custo antigo)
+            if user.needs_rehash():
+                try:
+                    user.upgrade_password(form.password.data)
+                    db.session.commit()
+                except PasswordPoolBusy:
+                    db.session.rollback()  # tenta de novo no próximo login
             login_user(user, remember=form.remember.data)
+            identity_cache.remember(user)
             
             from flask import session
             session.pop("role", None)  # se existir legado
@@ -21,9 +54,24 @@ def login():
             flash("Bem-vindo(a)!", "success")
             next_page = request.args.get("next") or url_for("index")
             return redirect(next_page)
+        rate_limit.login_failed(request.remote_addr)
         flash("Credenciais inválidas.", "danger")
     return render_template("auth/login.html", form=form)
 
+@auth_bp.route("/login/t/<token>", methods=["GET"])
+def login_token(token):
+    """Entrada por link/QR de uso único (convidados) — só HMAC, sem hash de senha."""
+    user = login_tokens.consume(token, current_app.config.get("LOGIN_TOKEN_MAX_HOURS", 72))
+    if user is None:
+        flash("Link de acesso inválido, expirado ou já utilizado.", "danger")
+        return redirect(url_for("auth.login"))
+    if current_user.is_authenticated:
+        logout_user()
+    login_user(user)
+    identity_cache.remember(user)
+    flash("Bem-vindo(a)!", "success")
+    return redirect(url_for("index"))
+
 @auth_bp.route("/logout", methods=["POST"])
 @login_required
 def logout():
@@ -34,18 +82,20 @@ def logout():
 @auth_bp.route("/account", methods=["GET", "POST"])
 @login_required
 def account():
-    form = AccountForm(obj=current_user)
+    # current_user é um snapshot em cache (somente leitura); edita a linha real
+    user = User.query.get_or_404(current_user.id)
+    form = AccountForm(obj=user)
     if form.validate_on_submit():
         # Nome
-        current_user.full_name = form.full_name.data.strip()
+        user.full_name = form.full_name.data.strip()
 
         # E-mail (único)
         new_email = form.email.data.strip().lower()
-        if new_email != current_user.email:
-            if User.query.filter(User.email == new_email, User.id != current_user.id).first():
+        if new_email != user.email:
+            if User.query.filter(User.email == new_email, User.id != user.id).first():
                 flash("Este e-mail já está em uso.", "warning")
                 return render_template("auth/account.html", form=form)
-            current_user.email = new_email
+            user.email = new_email
 
         # Troca de senha (opcional)
         cp = (form.current_password.data or "").strip()
@@ -55,12 +105,18 @@ def account():
             if not cp or not np:
                 flash("Para trocar a senha, informe a senha atual e a nova senha.", "danger")
                 return render_template("auth/account.html", form=form)
-            if not current_user.check_password(cp):
+            try:
+                ok = user.check_password(cp)
+            except PasswordPoolBusy:
+                db.session.rollback()
+                return _busy_response("auth/account.html", form)
+            if not ok:
                 flash("Senha atual incorreta.", "danger")
                 return render_template("auth/account.html", form=form)
-            current_user.set_password(np)
+            user.set_password(np)
 
         db.session.commit()
+        identity_cache.invalidate(user.id)
         flash("Conta atualizada com sucesso.", "success")
         return redirect(url_for("auth.account"))
 
@@ -1,6 +1,18 @@
+import os
+import json
 import click
+from flask import current_app
+from flask.cli import AppGroup
 from .extensions import db
 from .models import User, Role
+from .services import passwords as password_service
+from .services import user_import
+from .services import search_index
+from .services import student_import
+from .services import score_summary
+from .services import offering_zip
+from .services import report_exports, export_cache
+from .services import delta
 
 def register_commands(app):
     @app.cli.command("create-user")
@@ -18,3 +30,173 @@ def register_commands(app):
         db.session.add(u)
         db.session.commit()
         click.echo(f"Usuário {email} criado com sucesso.")
+
+    @app.cli.command("calibrate-hashing")
+    @click.option("--budget-ms", default=250, show_default=True, type=int,
+                  help="Tempo máximo aceitável por hash/verificação neste host.")
+    @click.option("--min-rounds", default=10, show_default=True, type=int,
+                  help="Piso de segurança para o custo bcrypt.")
+    @click.option("--max-rounds", default=15, show_default=True, type=int)
+    @click.option("--write/--dry-run", default=True, show_default=True,
+                  help="Grava o custo escolhido em instance/hashing.json.")
+    def calibrate_hashing(budget_ms, min_rounds, max_rounds, write):
+        """Mede o bcrypt no host e escolhe o maior custo dentro do orçamento."""
+        chosen = min_rounds
+        for rounds in range(min_rounds, max_rounds + 1):
+            ms = password_service.measure_bcrypt(rounds) * 1000
+            click.echo(f"  rounds={rounds:2d}  {ms:8.1f} ms")
+            if ms > budget_ms:
+                if rounds == min_rounds:
+                    click.echo(f"Atenção: nem o piso ({min_rounds}) cabe em {budget_ms} ms; usando o piso.")
+                break
+            chosen = rounds
+
+        click.echo(f"Custo escolhido: BCRYPT_LOG_ROUNDS={chosen} "
+                   f"(atual: {current_app.config.get('BCRYPT_LOG_ROUNDS')})")
+        if not write:
+            return
+        path = os.path.join(current_app.instance_path, "hashing.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"BCRYPT_LOG_ROUNDS": chosen}, f)
+        click.echo(f"Gravado em {path}. Reinicie o app; hashes antigos são "
+                   f"regravados no próximo login de cada usuário.")
+
+        pending = sum(1 for (ph,) in db.session.query(User.password_hash)
+                      if password_service.needs_rehash(ph, chosen))
+        click.echo(f"Usuários com hash fora do esquema: {pending}")
+
+    @app.cli.command("import-users")
+    @click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--default-role", default="guest", show_default=True,
+                  type=click.Choice(["guest", "professor", "admin"]),
+                  help="Perfil para linhas sem coluna perfil/role.")
+    @click.option("--workers", type=int, default=None, help="Processos de hash (padrão: PASSWORD_HASH_WORKERS ou nº de cores).")
+    @click.option("--out", type=click.Path(dir_okay=False), default=None,
+                  help="CSV de saída com as senhas geradas (linhas sem senha).")
+    @click.option("--dry-run", is_flag=True, help="Só valida e relata duplicados.")
+    def import_users_cmd(csv_path, default_role, workers, out, dry_run):
+        """Importa usuários de um CSV (email, nome, perfil, senha) em uma transação."""
+        with open(csv_path, "rb") as f:
+            text = user_import.decode_upload(f.read())
+        rep = user_import.import_users(text, default_role=default_role, dry_run=dry_run, workers=workers)
+
+        for lineno, msg in rep.errors:
+            click.echo(f"[ERRO] linha {lineno}: {msg}")
+        for e in rep.duplicates_file:
+            click.echo(f"[DUP-ARQUIVO] {e}")
+        for e in rep.duplicates_db:
+            click.echo(f"[JÁ EXISTE] {e}")
+        verb = "seriam criados" if dry_run else "criados"
+        click.echo(f"{len(rep.created)} usuário(s) {verb}; {len(rep.duplicates_db)} já existiam; "
+                   f"{len(rep.duplicates_file)} repetidos no arquivo; {len(rep.errors)} erro(s).")
+
+        generated = [(e, n, pwd) for e, n, _, pwd in rep.created if pwd]
+        if generated and out:
+            import csv
+            with open(out, "w", newline="", encoding="utf-8-sig") as f:
+                w = csv.writer(f)
+                w.writerow(["email", "nome", "senha"])
+                w.writerows(generated)
+            click.echo(f"Senhas geradas gravadas em {out}")
+        elif generated:
+            click.echo(f"{len(generated)} senha(s) gerada(s); use --out para salvá-las "
+                       f"ou envie links de acesso (Usuários > Links de convidados).")
+
+    @app.cli.command("rebuild-search-index")
+    @click.option("--kind", type=click.Choice(sorted(search_index.SOURCES)), multiple=True,
+                  help="Só estes tipos (padrão: todos).")
+    def rebuild_search_index(kind):
+        """Recalcula search_key e search_tokens (alunos, grupos, usuários)."""
+        for k in (kind or sorted(search_index.SOURCES)):
+            n = search_index.reindex(k)
+            db.session.commit()
+            click.echo(f"{k}: {n} registro(s) indexados")
+
+    @app.cli.command("rebuild-summaries")
+    def rebuild_summaries():
+        """Recalcula group_score_summary a partir das notas e avaliações de banner."""
+        score_summary.refresh()
+        db.session.commit()
+        n = db.session.query(db.func.count()).select_from(score_summary.T).scalar()
+        click.echo(f"{n} grupo(s) resumidos")
+
+    @app.cli.command("export-offerings-zip")
+    @click.argument("out", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--fmt", type=click.Choice(["xlsx", "csv"]), default="xlsx", show_default=True)
+    @click.option("--offering", "codes", multiple=True, help="Código da oferta (repetível; padrão: todas).")
+    @click.option("--workers", type=int, default=None,
+                  help="Processos de renderização (padrão: EXPORT_ZIP_WORKERS).")
+    def export_offerings_zip(out, fmt, codes, workers):
+        """Gera um ZIP com uma planilha de notas por oferta."""
+        from .models import Offering
+        off_ids = None
+        if codes:
+            found = dict(db.session.query(Offering.code, Offering.id).filter(Offering.code.in_(codes)).all())
+            missing = [c for c in codes if c not in found]
+            if missing:
+                raise click.ClickException(f"Oferta(s) inexistente(s): {', '.join(missing)}")
+            off_ids = list(found.values())
+        if workers is None:
+            workers = int(current_app.config.get("EXPORT_ZIP_WORKERS", 2) or 0)
+        tmp = f"{out}.tmp"
+        with open(tmp, "wb") as f:
+            for chunk in offering_zip.iter_zip(off_ids, fmt, workers=workers):
+                f.write(chunk)
+        os.replace(tmp, out)
+        click.echo(f"{out}: {os.path.getsize(out)} bytes")
+
+    @app.cli.command("import-students")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", default=student_import.BATCH_SIZE, show_default=True, type=int)
+    @click.option("--dry-run", is_flag=True, help="Só valida e mostra o diff, sem gravar.")
+    @click.option("--verbose", "-v", is_flag=True, help="Lista cada aluno criado/atualizado.")
+    def import_students_cmd(path, batch_size, dry_run, verbose):
+        """Importa/atualiza alunos de um CSV ou XLSX (rgm, nome, campus, oferta)."""
+        with open(path, "rb") as f:
+            rep = student_import.import_roster(f, os.path.basename(path), dry_run=dry_run,
+                                               batch_size=batch_size)
+
+        for lineno, msg in rep.errors:
+            click.echo(f"[ERRO] linha {lineno}: {msg}")
+        for rgm in rep.duplicates_file:
+            click.echo(f"[DUP-ARQUIVO] {rgm}")
+        if verbose:
+            for rgm, name in rep.created:
+                click.echo(f"[NOVO] {rgm} {name}")
+            for rgm, name, changes in rep.updated:
+                click.echo(f"[ALTERADO] {rgm} {name}: {'; '.join(changes)}")
+        if rep.new_offerings:
+            click.echo(f"Ofertas novas: {', '.join(rep.new_offerings)}")
+        prefix = "(simulação) " if dry_run else ""
+        click.echo(f"{prefix}{len(rep.created)} criado(s); {len(rep.updated)} atualizado(s); "
+                   f"{len(rep.unchanged)} inalterado(s); {len(rep.duplicates_file)} repetido(s) no arquivo; "
+                   f"{len(rep.errors)} erro(s).")
+
+    @app.cli.command("prune-tombstones")
+    @click.option("--days", default=lambda: current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 180),
+                  type=float, show_default="SYNC_TOMBSTONE_RETENTION_DAYS",
+                  help="Apaga lápides mais velhas que isto.")
+    def prune_tombstones(days):
+        """Remove lápides antigas da exportação delta (sync_tombstones)."""
+        n = delta.prune(days)
+        db.session.commit()
+        click.echo(f"{n} lápide(s) removidas")
+
+    reports_cli = AppGroup("reports", help="Exportações pré-geradas (cron).")
+
+    @reports_cli.command("pregenerate")
+    @click.option("--kind", type=click.Choice(report_exports.STANDARD), multiple=True,
+                  help="Só estas exportações (padrão: todas).")
+    @click.option("--fmt", type=click.Choice(report_exports.FORMATS), multiple=True,
+                  help="Só estes formatos (padrão: csv e xlsx).")
+    def reports_pregenerate(kind, fmt):
+        """Grava no cache em disco o relatório geral, os grupos e os alunos sem grupo (escopo admin)."""
+        if not export_cache.enabled():
+            raise click.ClickException("EXPORT_CACHE_ENABLED=0: as rotas não leriam os arquivos gerados.")
+        for k in (kind or report_exports.STANDARD):
+            spec = report_exports.BUILDERS[k]()
+            for f in (fmt or report_exports.FORMATS):
+                path = report_exports.pregenerate(spec, f)
+                click.echo(f"{k}.{f}: {path} ({os.path.getsize(path)} bytes)")
+
+    app.cli.add_command(reports_cli)
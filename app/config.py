@@ -21,6 +21,13 @@ def _build_mysql_uri_from_env():
     pwd_enc  = quote_plus(pwd)
     return f"{dialect}+{driver}://{user_enc}:{pwd_enc}@{host}:{port}/{name}?charset=utf8mb4"
 
+def _positive_float(name, default):
+    """Taxa lida do ambiente; 0/negativo é erro de configuração (divide o tempo de espera)."""
+    value = float(os.getenv(name, default))
+    if value <= 0:
+        raise ValueError(f"{name} deve ser maior que zero (recebido: {value:g})")
+    return value
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "devkey-change-me")
 
@@ -44,6 +51,65 @@ class Config:
     # Log SQL (opcional para debug): defina SQLALCHEMY_ECHO=1 no .env
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO") == "1"
 
+    # Verificação de senha em pool de processos (ver app/services/passwords.py)
+    PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "1"))   # 0 = inline
+    PASSWORD_POOL_QUEUE = int(os.getenv("PASSWORD_POOL_QUEUE", "8"))       # verificações em voo
+    PASSWORD_POOL_TIMEOUT = float(os.getenv("PASSWORD_POOL_TIMEOUT", "10"))
+    # Importação de usuários: processos p/ hash em lote na CLI (0 = os.cpu_count()),
+    # pool à parte do upload pela web (não usa vaga do login) e limite desse upload
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_IMPORT_WORKERS = int(os.getenv("PASSWORD_IMPORT_WORKERS", "1"))   # 0 = inline
+    PASSWORD_IMPORT_TIMEOUT = float(os.getenv("PASSWORD_IMPORT_TIMEOUT", "20"))
+    USERS_IMPORT_WEB_MAX_ROWS = int(os.getenv("USERS_IMPORT_WEB_MAX_ROWS", "20"))
+    # Custo bcrypt; sobrescrito por instance/hashing.json (flask calibrate-hashing)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+
+    # Cache da identidade do usuário logado (segundos; 0 = desliga)
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "60"))
+    # carimbo compartilhado entre workers (trocado a cada commit que muda acesso de um usuário)
+    IDENTITY_VERSION_PATH = os.getenv("IDENTITY_VERSION_PATH")          # padrão: instance/identity.version
+    # Cache de campi/ofertas/professores dos selects (segundos; 0 = desliga).
+    # Invalidado no commit que alterar essas tabelas; o TTL só cobre outros workers.
+    REFDATA_CACHE_TTL = float(os.getenv("REFDATA_CACHE_TTL", "300"))
+
+    # Exportações XLSX: arquivo em memória até este tamanho, depois vai p/ disco (bytes)
+    EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+    # Cache em disco das exportações (ETag/304); invalidado por commit (services/export_cache.py)
+    EXPORT_CACHE_ENABLED = os.getenv("EXPORT_CACHE_ENABLED", "1") == "1"
+    EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR")                   # padrão: instance/export_cache
+    EXPORT_CACHE_MAX_AGE = float(os.getenv("EXPORT_CACHE_MAX_AGE", "86400"))
+    # Quem envia os arquivos do cache: "" (o Flask), nginx (X-Accel-Redirect) ou x-sendfile
+    EXPORT_SENDFILE = os.getenv("EXPORT_SENDFILE", "")
+    EXPORT_ACCEL_PREFIX = os.getenv("EXPORT_ACCEL_PREFIX", "/_exports/")  # location interna do Nginx
+    # Exportações em segundo plano (services/export_jobs.py)
+    EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "1"))          # threads por processo
+    EXPORT_JOBS_DIR = os.getenv("EXPORT_JOBS_DIR")                           # padrão: instance/export_jobs
+    EXPORT_JOB_RETENTION_HOURS = float(os.getenv("EXPORT_JOB_RETENTION_HOURS", "24"))
+
+    # ZIP com uma planilha por oferta (services/offering_zip.py): processos de renderização
+    # do CLI (flask export-offerings-zip); a rota web renderiza sempre no próprio processo
+    EXPORT_ZIP_WORKERS = int(os.getenv("EXPORT_ZIP_WORKERS", "2"))          # 0 = no próprio processo
+    # Exportação delta (?since= / /reports/api/changes): retenção das lápides (flask prune-tombstones)
+    SYNC_TOMBSTONE_RETENTION_DAYS = float(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "180"))
+
+    # Links de acesso de convidados (validade máxima aceita, em horas)
+    LOGIN_TOKEN_MAX_HOURS = float(os.getenv("LOGIN_TOKEN_MAX_HOURS", "72"))
+
+    # Throttling de login (token bucket por IP e por e-mail; ver services/rate_limit.py)
+    LOGIN_RATE_ENABLED = os.getenv("LOGIN_RATE_ENABLED", "1") == "1"
+    LOGIN_RATE_BACKEND = os.getenv("LOGIN_RATE_BACKEND", "memory")     # memory | sqlite
+    LOGIN_RATE_SQLITE_PATH = os.getenv("LOGIN_RATE_SQLITE_PATH")       # padrão: instance/login_rate.sqlite
+    # o balde do IP só perde ficha em login que falha; no dia do banner (convidados
+    # atrás do NAT do local) use algo como LOGIN_RATE_IP_BURST=200 / LOGIN_RATE_IP_PER_MIN=100
+    LOGIN_RATE_IP_BURST = int(os.getenv("LOGIN_RATE_IP_BURST", "60"))
+    LOGIN_RATE_IP_PER_MIN = _positive_float("LOGIN_RATE_IP_PER_MIN", "30")
+    LOGIN_RATE_EMAIL_BURST = int(os.getenv("LOGIN_RATE_EMAIL_BURST", "5"))
+    LOGIN_RATE_EMAIL_PER_MIN = _positive_float("LOGIN_RATE_EMAIL_PER_MIN", "5")
+
+    # Nº de proxies confiáveis na frente do app p/ X-Forwarded-For. 0 = não confia no
+    # cabeçalho (dev, gunicorn exposto direto); atrás do Nginx use 1 (docker-compose.yml)
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", "0"))
+
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_pre_ping": True,              # testa a conexão e reabre se caiu
         "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),  # recicla conexões a cada 30 min
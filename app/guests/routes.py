@@ -7,6 +7,7 @@ from . import guests_bp
 from ..utils.decorators import role_required
 from ..extensions import db
 from ..models import Group, GroupStudent, Student, BannerEvaluation
+from ..services import score_summary
 from sqlalchemy import or_
 
 # ---------------- Dashboard ----------------
@@ -130,6 +131,9 @@ def poster_submit():
             score=avg,
             comments=comments
         ))
+        # grava a avaliação antes do resumo (UNIQUE grupo/avaliador falha aqui, não depois)
+        db.session.flush()
+        score_summary.add_banner(group_id, avg)
 
     db.session.commit()
     flash("Avaliação registrada com sucesso!", "success")
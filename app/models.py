@@ -1,9 +1,9 @@
-import re, hashlib
-from werkzeug.security import generate_password_hash as wz_generate_password_hash, check_password_hash as wz_check_password_hash
+from werkzeug.security import generate_password_hash as wz_generate_password_hash
 from .extensions import db, bcrypt
 from flask_login import UserMixin
 from sqlalchemy import Enum, CheckConstraint, UniqueConstraint, func
 from enum import Enum as PyEnum
+from .services import passwords as password_service
 
 class Role(PyEnum):
     admin = "admin"
@@ -24,6 +24,7 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(190), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     full_name = db.Column(db.String(150), nullable=False)
+    search_key = db.Column(db.String(200), index=True)  # nome normalizado (services/search_index.py)
 
     #role = db.Column(Enum(Role), nullable=False)
     role = db.Column(db.String(20), nullable=False, default="guest")
@@ -32,6 +33,10 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, server_default=func.now())
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        db.Index("ix_users_full_name_id", "full_name", "id"),  # paginação keyset (admin)
+    )
+
     # role pode ser string ('admin' | 'professor' | 'guest') ou Enum(Role)
    # role = db.Column(db.String(20), nullable=False, default="guest")
 
@@ -73,43 +78,18 @@ class User(UserMixin, db.Model):
           - PBKDF2 (padrão Werkzeug, base64)
           - PBKDF2 no formato legado HEX (gerado no primeiro script)
           - bcrypt (flask-bcrypt)
+        O hash roda no pool de processos (services/passwords.py); pode
+        levantar PasswordPoolBusy quando a fila está cheia.
         """
-        ph = (self.password_hash or "").strip()
-        if not ph:
-            return False
-
-        # --- PBKDF2 (tanto base64 quanto o nosso formato HEX legado) ---
-        if ph.startswith("pbkdf2:"):
-            try:
-                # Formato: pbkdf2:sha256:ITER$SALT$HASH
-                parts = ph.split("$")
-                if len(parts) == 3:
-                    method_part, salt_str, stored = parts
-                    # extrai iterações (ex.: "pbkdf2:sha256:260000")
-                    iters = 260000
-                    mparts = method_part.split(":")
-                    if len(mparts) >= 3 and mparts[2].isdigit():
-                        iters = int(mparts[2])
-
-                    # Caso legado: SALT e HASH em HEX
-                    if re.fullmatch(r"[0-9a-fA-F]+", salt_str) and re.fullmatch(r"[0-9a-fA-F]+", stored):
-                        dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt_str), iters)
-                        return dk.hex() == stored
-
-                # Caso padrão (Werkzeug, base64)
-                return wz_check_password_hash(ph, password)
-            except Exception:
-                return False
-
-        # --- bcrypt ---
-        try:
-            return bcrypt.check_password_hash(ph, password)
-        except Exception:
-            # Fallback: tenta Werkzeug por via das dúvidas
-            try:
-                return wz_check_password_hash(ph, password)
-            except Exception:
-                return False
+        return password_service.check_password(self.password_hash, password)
+
+    def needs_rehash(self) -> bool:
+        """Hash fora do esquema atual (bcrypt com o custo calibrado)?"""
+        return password_service.needs_rehash(self.password_hash, password_service.current_rounds())
+
+    def upgrade_password(self, password: str):
+        """Regrava o hash no esquema atual (chamar só após check_password OK)."""
+        self.password_hash = password_service.make_hash(password)
 
 class Campus(db.Model):
     __tablename__ = "campuses"
@@ -131,21 +111,28 @@ class Student(db.Model):
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     rgm = db.Column(db.String(30), unique=True, nullable=False)
     name = db.Column(db.String(150), nullable=False)
+    search_key = db.Column(db.String(200), index=True)  # nome normalizado (services/search_index.py)
     campus_id = db.Column(db.Integer, db.ForeignKey("campuses.id"), nullable=False)
     offering_id = db.Column(db.Integer, db.ForeignKey("offerings.id"), nullable=False)
     created_at = db.Column(db.DateTime, server_default=func.now())
-    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now(),
+                           index=True)  # exportação delta (services/delta.py)
 
     campus = db.relationship("Campus")
     offering = db.relationship("Offering")
 
+    __table_args__ = (
+        db.Index("ix_students_name_id", "name", "id"),  # paginação keyset (admin)
+    )
+
 class Group(db.Model):
     __tablename__ = "tgi_groups"  # evita conflito com palavra reservada
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # Nº do grupo
     title = db.Column(db.String(200), nullable=False)  # <-- NOVO
+    search_key = db.Column(db.String(200), index=True)  # título normalizado (services/search_index.py)
     orientador_user_id = db.Column(db.BigInteger, db.ForeignKey("users.id"))
     created_at = db.Column(db.DateTime, server_default=func.now())
-    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     orientador = db.relationship("User")
 
@@ -153,6 +140,7 @@ class GroupStudent(db.Model):
     __tablename__ = "group_students"
     group_id = db.Column(db.Integer, db.ForeignKey("tgi_groups.id"), primary_key=True)
     student_id = db.Column(db.BigInteger, db.ForeignKey("students.id"), primary_key=True)
+    created_at = db.Column(db.DateTime, server_default=func.now(), index=True)  # vínculo não é alterado, só criado/apagado
 
     __table_args__ = (
         UniqueConstraint("student_id", name="uq_student_single_group"),
@@ -177,7 +165,8 @@ class GroupAssessment(db.Model):
     instrument = db.Column(Enum(Instrument), nullable=False)
     score = db.Column(db.Numeric(5,2), nullable=False)
     entered_by_user_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), nullable=False)
-    entered_at = db.Column(db.DateTime, server_default=func.now())
+    # o upsert de notas (services/grades.py) também regrava entered_at
+    entered_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     __table_args__ = (
         UniqueConstraint("group_id", "instrument", name="uq_group_instrument"),
@@ -194,7 +183,7 @@ class BannerEvaluation(db.Model):
     evaluator_user_id = db.Column(db.BigInteger, db.ForeignKey("users.id"), nullable=False)
     score = db.Column(db.Numeric(5,2), nullable=False)
     comments = db.Column(db.Text)
-    entered_at = db.Column(db.DateTime, server_default=func.now())
+    entered_at = db.Column(db.DateTime, server_default=func.now(), index=True)
 
     __table_args__ = (
         UniqueConstraint("group_id", "evaluator_user_id", name="uq_banner_once"),
@@ -203,3 +192,53 @@ class BannerEvaluation(db.Model):
 
     group = db.relationship("Group")
     evaluator = db.relationship("User")
+
+class GroupScoreSummary(db.Model):
+    """
+    Resumo das notas por grupo (uma linha por grupo), mantido na mesma
+    transação das gravações (services/score_summary.py). Leituras fazem
+    JOIN pela PK em vez de agregar group_assessments/banner_evaluations.
+    """
+    __tablename__ = "group_score_summary"
+    group_id = db.Column(db.Integer, db.ForeignKey("tgi_groups.id"), primary_key=True)
+    ri = db.Column(db.Numeric(5,2))
+    rii = db.Column(db.Numeric(5,2))
+    paper = db.Column(db.Numeric(5,2))
+    banner_sum = db.Column(db.Numeric(8,2), nullable=False, default=0, server_default="0")
+    banner_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    final = db.Column(db.Numeric(5,2))  # RI + RII + Paper + média do banner
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+
+class SyncTombstone(db.Model):
+    """Registro apagado (aluno, grupo, vínculo, nota, banner) p/ a exportação delta (services/delta.py)."""
+    __tablename__ = "sync_tombstones"
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)     # student | group | membership | assessment | banner
+    ref_id = db.Column(db.BigInteger, nullable=False)     # id do registro (membership: student_id)
+    group_id = db.Column(db.Integer)                      # grupo do registro, quando houver
+    ref = db.Column(db.String(60))                        # chave natural: rgm, instrumento, avaliador
+    deleted_at = db.Column(db.DateTime, server_default=func.now(), nullable=False, index=True)
+
+class SearchToken(db.Model):
+    """Uma linha por palavra normalizada de alunos/grupos/usuários (busca por prefixo)."""
+    __tablename__ = "search_tokens"
+    kind = db.Column(db.String(10), primary_key=True)      # student | group | user
+    token = db.Column(db.String(60), primary_key=True)
+    ref_id = db.Column(db.BigInteger, primary_key=True)
+
+    __table_args__ = (
+        db.Index("ix_search_tokens_ref", "kind", "ref_id"),
+    )
+
+class LoginToken(db.Model):
+    """Link/QR de acesso de uso único (convidados no dia do pôster)."""
+    __tablename__ = "login_tokens"
+    jti = db.Column(db.String(32), primary_key=True)   # id aleatório assinado no token
+    user_id = db.Column(db.BigInteger, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime)
+    # quem emitiu o link; excluir esse admin não pode travar (nem apagar) os links
+    created_by_user_id = db.Column(db.BigInteger, db.ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = db.Column(db.DateTime, server_default=func.now())
+
+    user = db.relationship("User", foreign_keys=[user_id])
@@ -1,23 +1,19 @@
 from decimal import Decimal
-from datetime import datetime
-from io import StringIO, BytesIO
-import csv
 
 from flask import (
     render_template, request, redirect, url_for, flash,
-    abort, Response, send_file
+    abort, jsonify, current_app
 )
 from flask_login import login_required, current_user
 
-from sqlalchemy import or_, func, case
-from sqlalchemy.orm import joinedload
+from sqlalchemy import or_, func
 
 from ..utils.decorators import role_required
 from ..extensions import db
 from . import professors_bp
 
 from app.models import (
-    Group, GroupStudent, Student, Offering, Campus, User,
+    Group, GroupStudent, Student, Offering, User,
     GroupAssessment, Instrument
 )
 
@@ -29,20 +25,10 @@ try:
 except Exception:
     openpyxl = None
 
-try:
-    from ..models import BannerEvaluation  # se não existir, ficamos sem média de banner
-except Exception:
-    BannerEvaluation = None
-
 
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
-def _stamp() -> str:
-    """Timestamp para nomes de arquivos."""
-    return datetime.now().strftime("%Y%m%d-%H%M%S")
-
-
 def _ensure_owns_group(group_id: int) -> Group:
     """Garante que o grupo pertence ao professor logado."""
     g = Group.query.get_or_404(group_id)
@@ -80,96 +66,6 @@ def _assert_offering_access(off: Offering):
     if owner_id is not None and owner_id != current_user.id and not getattr(current_user, "is_admin", False):
         abort(403)
 
-def _collect_export_rows(off: Offering):
-    """
-    Dados para CSV/XLSX:
-    [grupo, rgm, aluno, campus, oferta, orientador, ri, rii, paper, banner_media]
-    """
-    # 1) Alunos da oferta
-    students = (
-        Student.query.filter_by(offering_id=off.id)
-        .options(joinedload(Student.campus), joinedload(Student.offering))
-        .all()
-    )
-    if not students:
-        return []
-
-    student_ids = [s.id for s in students]
-
-    # 2) Mapeia aluno -> grupo
-    gs_rows = GroupStudent.query.filter(GroupStudent.student_id.in_(student_ids)).all()
-    student_group = {row.student_id: row.group_id for row in gs_rows}
-
-    group_ids = sorted({row.group_id for row in gs_rows if row.group_id is not None})
-    groups_by_id = {g.id: g for g in Group.query.filter(Group.id.in_(group_ids)).all()}
-
-    # 3) Carrega notas por grupo
-    assessments = GroupAssessment.query.filter(GroupAssessment.group_id.in_(group_ids)).all()
-    grades = {}
-    for a in assessments:
-        d = grades.setdefault(a.group_id, {})
-        # nome tolerante
-        name = getattr(a.instrument, "name", a.instrument)
-        name = (name or "").upper()
-
-        if name == "RII" or name.endswith("_II") or name == "RELATORIO_II":
-            key = "rii"
-        elif name == "RI" or name.endswith("_I") or name == "RELATORIO_I":
-            key = "ri"
-        elif "PAPER" in name:
-            key = "paper"
-        else:
-            continue
-
-        d[key] = float(a.score) if a.score is not None else None
-
-    # 4) Média de banner (se o modelo existir)
-    banner_avg = {}
-    if BannerEvaluation is not None and group_ids:
-        res = (
-            db.session.query(
-                BannerEvaluation.group_id, func.avg(BannerEvaluation.score)
-            )
-            .filter(BannerEvaluation.group_id.in_(group_ids))
-            .group_by(BannerEvaluation.group_id)
-            .all()
-        )
-        for gid, avg_ in res:
-            banner_avg[gid] = float(avg_) if avg_ is not None else None
-
-    # 5) Monta linhas
-    rows = []
-    for s in students:
-        gid = student_group.get(s.id)
-        g = groups_by_id.get(gid) if gid else None
-
-        orientador_name = "-"
-        if g is not None:
-            # tenta acessar relação (se existir) ou busca 1x por id
-            orientador_obj = getattr(g, "orientador", None) or getattr(g, "advisor", None)
-            if isinstance(orientador_obj, User):
-                orientador_name = orientador_obj.full_name
-            elif hasattr(g, "orientador_user_id") and g.orientador_user_id:
-                u = User.query.get(g.orientador_user_id)
-                if u:
-                    orientador_name = u.full_name
-
-        g_grades = grades.get(gid, {}) if gid else {}
-        rows.append([
-            gid or "-",                                  # grupo
-            s.rgm,                                       # rgm
-            s.name,                                      # aluno
-            s.campus.name if s.campus else "-",          # campus
-            s.offering.code if s.offering else "-",      # oferta
-            orientador_name,                             # orientador
-            g_grades.get("ri"),                          # RI
-            g_grades.get("rii"),                         # RII
-            g_grades.get("paper"),                       # Paper
-            (None if gid is None else banner_avg.get(gid)),  # média banner
-        ])
-    return rows
-
-
 # ------------------------------------------------------------------------------
 # Rotas
 # ------------------------------------------------------------------------------
@@ -264,7 +160,8 @@ def group_detail(group_id):
 
 # Form do professor: RI e RII como checkbox (0.5 cada), Paper como 0..4
 from .forms import GradeForm
-from app.services.grades import upsert_assessment, get_assessment_score
+from app.services import grades as grade_service
+from app.services import group_members, grade_import, gradebook, report_exports
 
 @professors_bp.route("/groups/<int:group_id>/grades", methods=["GET", "POST"])
 @login_required
@@ -274,32 +171,117 @@ def group_grades_edit(group_id):
     form = GradeForm()
 
     if form.validate_on_submit():
-        score_ri  = Decimal("0.5") if form.relatorio_i.data  else Decimal("0.0")
-        score_rii = Decimal("0.5") if form.relatorio_ii.data else Decimal("0.0")
-        paper_val = form.paper.data
-        score_paper = Decimal(str(paper_val)) if paper_val is not None else Decimal("0.0")
-
-        upsert_assessment(group.id, INST_RI,    score_ri,    current_user.id)
-        upsert_assessment(group.id, INST_RII,   score_rii,   current_user.id)
-        upsert_assessment(group.id, INST_PAPER, score_paper, current_user.id)
+        scores = grade_service.scores_from_form(form.relatorio_i.data, form.relatorio_ii.data, form.paper.data)
+        grade_service.upsert_scores({group.id: scores}, current_user.id)  # 1 comando p/ as 3 notas
 
         db.session.commit()
         flash("Notas atualizadas.", "success")
         return redirect(url_for("professors.groups_list", group_id=group.id))
 
     # Preencher estado inicial
-    ri_score    = get_assessment_score(group.id, INST_RI)    or Decimal("0")
-    rii_score   = get_assessment_score(group.id, INST_RII)   or Decimal("0")
-    paper_score = get_assessment_score(group.id, INST_PAPER) or Decimal("0")
+    current = grade_service.scores_for_group(group.id)  # 1 consulta p/ as 3 notas
+    ri_score    = current.get(INST_RI)    or Decimal("0")
+    rii_score   = current.get(INST_RII)   or Decimal("0")
+    paper_score = current.get(INST_PAPER) or Decimal("0")
 
     form.relatorio_i.data  = (ri_score  >= Decimal("0.5"))
     form.relatorio_ii.data = (rii_score >= Decimal("0.5"))
     form.paper.data = float(paper_score) if paper_score is not None else None
-    members = [gs.student for gs in group.members]
+    members = group_members.members(group.id)
     
     return render_template("professors/grades_edit.html", group=group, members=members, form=form)
 
 
+def _grid_groups(off: Offering):
+    """
+    Grupos com alunos na oferta que o professor pode lançar: todos se ele
+    é o responsável pela oferta, senão só os que orienta.
+    Rows (id, title, orientador, n_alunos), 1 consulta.
+    """
+    q = (
+        db.session.query(Group.id, Group.title, User.full_name.label("orientador"),
+                         func.count(Student.id).label("n_alunos"))
+        .join(GroupStudent, GroupStudent.group_id == Group.id)
+        .join(Student, Student.id == GroupStudent.student_id)
+        .outerjoin(User, User.id == Group.orientador_user_id)
+        .filter(Student.offering_id == off.id)
+        .group_by(Group.id, Group.title, User.full_name)
+        .order_by(Group.id.asc())
+    )
+    if off.professor_id != current_user.id:
+        q = q.filter(Group.orientador_user_id == current_user.id)
+    return q.all()
+
+
+@professors_bp.route("/offerings/<int:offering_id>/grades", methods=["GET", "POST"])
+@login_required
+@role_required("professor")
+def offering_grades_grid(offering_id):
+    """Grade estilo planilha: RI/RII/Paper de todos os grupos da oferta, salvos num POST só."""
+    off = Offering.query.get_or_404(offering_id)
+    groups = _grid_groups(off)
+    if not groups and off.professor_id != current_user.id:
+        abort(403)
+    allowed = [g.id for g in groups]
+    current = grade_service.scores_for_groups(allowed)
+    errors, submitted = {}, None
+
+    if request.method == "POST":
+        # só os grupos que estavam na tela (e que o professor pode lançar)
+        posted = {int(x) for x in request.form.getlist("gid") if x.isdigit()}
+        group_ids = [gid for gid in allowed if gid in posted]
+        changes, errors = grade_service.parse_grid(request.form, group_ids, current)
+        saved = 0
+        if changes:
+            saved = grade_service.upsert_scores(changes, current_user.id)  # 1 comando
+            db.session.commit()
+
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify({"ok": not errors, "saved": saved, "groups": len(changes), "errors": errors}), \
+                (200 if not errors else 422)
+
+        if saved:
+            flash(f"{saved} nota(s) salvas em {len(changes)} grupo(s).", "success")
+        if not errors:
+            return redirect(url_for("professors.offering_grades_grid", offering_id=off.id))
+        flash(f"{len(errors)} célula(s) com erro não foram salvas.", "warning")
+        current = grade_service.scores_for_groups(allowed)
+        submitted = request.form  # mantém o que foi digitado nas células com erro
+
+    return render_template(
+        "professors/offering_grades.html",
+        off=off, groups=groups, current=current, errors=errors, submitted=submitted,
+        RI=grade_service.RI, RII=grade_service.RII, PAPER=grade_service.PAPER,
+    )
+
+
+@professors_bp.route("/grades/import", methods=["GET", "POST"])
+@login_required
+@role_required("professor")
+def grades_import():
+    """Upload da planilha de notas (mesmo layout do export da oferta) — validação e upsert em lote."""
+    back = request.args.get("off", type=int)
+    if request.method == "POST":
+        f = request.files.get("file")
+        if not f or not f.filename:
+            flash("Selecione um arquivo XLSX ou CSV.", "warning")
+            return render_template("professors/grades_import.html", report=None, back=back)
+
+        dry_run = request.form.get("dry_run") == "1"
+        try:
+            report = grade_import.import_grades(f.stream, f.filename, current_user.id, dry_run=dry_run)
+        except Exception as e:  # arquivo corrompido / XLSX inválido
+            current_app.logger.warning("grades_import: %s", e)
+            flash("Não foi possível ler o arquivo. Envie o XLSX/CSV exportado da oferta.", "danger")
+            return render_template("professors/grades_import.html", report=None, back=back)
+        if report.updated and not dry_run:
+            flash(f"Notas de {len(report.updated)} grupo(s) atualizadas.", "success")
+        return render_template("professors/grades_import.html", report=report, dry_run=dry_run, back=back,
+                               INST_RI=INST_RI, INST_RII=INST_RII, INST_PAPER=INST_PAPER)
+
+    return render_template("professors/grades_import.html", report=None, back=back)
+
+
 @professors_bp.route("/offerings/<int:offering_id>/export/csv", methods=["GET"])
 @login_required
 @role_required("professor")
@@ -307,23 +289,7 @@ def export_offering_csv(offering_id):
     off = Offering.query.get_or_404(offering_id)
     _assert_offering_access(off)
 
-    rows = _collect_export_rows(off)
-    headers = [
-        "grupo", "rgm", "aluno", "campus", "oferta",
-        "orientador", "relatorio_i", "relatorio_ii", "paper", "banner_media"
-    ]
-
-    si = StringIO(newline="")
-    writer = csv.writer(si)
-    writer.writerow(headers)
-    for r in rows:
-        out = [(f"{v:.2f}" if isinstance(v, float) else v) for v in r]
-        writer.writerow(out)
-
-    fname = f"notas_oferta_{off.code}_{_stamp()}.csv"
-    resp = Response(si.getvalue(), mimetype="text/csv; charset=utf-8")
-    resp.headers["Content-Disposition"] = f'attachment; filename="{fname}"'
-    return resp
+    return report_exports.response(report_exports.offering_grades(off.id, off.code), "csv")
 
 
 @professors_bp.route("/offerings/<int:offering_id>/export/xlsx", methods=["GET"])
@@ -337,44 +303,7 @@ def export_offering_xlsx(offering_id):
         flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
         return redirect(url_for("professors.offerings_list"))
 
-    rows = _collect_export_rows(off)
-    headers = [
-        "Nº do grupo", "RGM", "Aluno", "Campus", "Oferta",
-        "Orientador", "Relatório I", "Relatório II", "Paper", "Apresentação de Banner (média)"
-    ]
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Notas"
-
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = openpyxl.styles.Font(bold=True)
-
-    for r in rows:
-        ws.append([round(v, 2) if isinstance(v, float) else v for v in r])
-
-    from openpyxl.utils import get_column_letter
-    for col_idx in range(1, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col_idx)].width = 22
-
-    num_fmt = "0.00"
-    for row in ws.iter_rows(min_row=2, min_col=7, max_col=10):
-        for cell in row:
-            if isinstance(cell.value, (float, int)):
-                cell.number_format = num_fmt
-
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-
-    fname = f"notas_oferta_{off.code}_{_stamp()}.xlsx"
-    return send_file(
-        bio,
-        as_attachment=True,
-        download_name=fname,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
+    return report_exports.response(report_exports.offering_grades(off.id, off.code), "xlsx")
 
 @professors_bp.get("/offerings/<int:offering_id>")
 @login_required
@@ -383,77 +312,7 @@ def offering_detail(offering_id: int):
     off = Offering.query.get_or_404(offering_id)
     _assert_offering_access(off)
 
-    # --- condições tolerantes p/ instrumentos (RI, RII, PAPER) ---
-    def _inst(*names):
-        for n in names:
-            if hasattr(Instrument, n):
-                return getattr(Instrument, n)
-        return None
-
-    def _cond(*possible_names):
-        parts = []
-        m = _inst(*possible_names)
-        if m is not None:
-            parts.append(GroupAssessment.instrument == m)
-        parts.extend(GroupAssessment.instrument == s for s in possible_names)
-        return or_(*parts)
-
-    ri_cond    = _cond("RI", "RELATORIO_I", "relatorio_i")
-    rii_cond   = _cond("RII", "RELATORIO_II", "relatorio_ii")
-    paper_cond = _cond("PAPER", "paper")
-
-    ri_col    = func.max(case((ri_cond, GroupAssessment.score), else_=None)).label("ri")
-    rii_col   = func.max(case((rii_cond, GroupAssessment.score), else_=None)).label("rii")
-    paper_col = func.max(case((paper_cond, GroupAssessment.score), else_=None)).label("paper")
-
-    # --- consulta base: TODOS alunos da oferta ---
-    q = (
-        db.session.query(
-            Student,          # aluno
-            Group,            # grupo (pode ser None)
-            User,             # orientador (pode ser None)
-            ri_col, rii_col, paper_col,
-        )
-        .filter(Student.offering_id == off.id)
-        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
-        .outerjoin(Group, GroupStudent.group_id == Group.id)
-        .outerjoin(User, Group.orientador_user_id == User.id)
-        .outerjoin(GroupAssessment, GroupAssessment.group_id == Group.id)
-        .group_by(Student.id, Group.id, User.id)
-        .order_by(Student.name.asc())
-    )
-
-    rows_base = q.all()
-
-    # --- média de BANNER por grupo (se existir o modelo) ---
-    banner_map = {}
-    try:
-        from ..models import BannerEvaluation
-        group_ids = [g.id for (_, g, _, _, _, _) in rows_base if g is not None]
-        if group_ids:
-            res = (
-                db.session.query(BannerEvaluation.group_id, func.avg(BannerEvaluation.score))
-                .filter(BannerEvaluation.group_id.in_(group_ids))
-                .group_by(BannerEvaluation.group_id)
-                .all()
-            )
-            banner_map = {gid: (float(avg) if avg is not None else None) for gid, avg in res}
-    except Exception:
-        banner_map = {}
-
-    def _f(x): return float(x) if x is not None else None
-
-    data = []
-    for s, g, orient, ri, rii, paper in rows_base:
-        ri, rii, paper = _f(ri), _f(rii), _f(paper)
-        banner = banner_map.get(g.id) if g is not None else None
-        data.append(dict(
-            student=s,
-            group=g,
-            orientador=orient,
-            ri=ri, rii=rii, paper=paper,
-            banner=banner,  # <- média real do pôster
-        ))
+    data = gradebook.rows([off.id])
 
     return render_template(
         "professors/offering_detail.html",
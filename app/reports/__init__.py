@@ -1,5 +1,5 @@
 from flask import Blueprint
 
-reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
+reports_bp = Blueprint("reports", __name__, url_prefix="/reports", template_folder="templates")
 
 from . import routes  # noqa: E402,F401
@@ -1,33 +1,24 @@
-from datetime import datetime
-from decimal import Decimal
-from io import StringIO, BytesIO
-import csv
-from collections import defaultdict
-
-from flask import request, Response, send_file, redirect, url_for, flash
+from flask import (request, redirect, url_for, flash, jsonify, abort, render_template, send_file,
+                   Response, stream_with_context)
 from flask_login import login_required, current_user
 
 from app.reports import reports_bp
 from app.utils.decorators import role_required
-from app.extensions import db
-from app.models import (
-    Student, GroupStudent, Group, GroupAssessment, BannerEvaluation,
-    Offering, User
-)
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
+from app.utils.exports import MIMETYPES
+from app.models import Offering
+from app.services import report_exports, export_jobs, offering_zip, delta
 
 # openpyxl é opcional
 try:
     import openpyxl
-    from openpyxl.styles import Font, Alignment
-    from openpyxl.utils import get_column_letter
 except Exception:
     openpyxl = None
 
-
-def _stamp() -> str:
-    return datetime.now().strftime("%Y%m%d-%H%M%S")
+# pyarrow é opcional (fmt=parquet)
+try:
+    import pyarrow as pa
+except Exception:
+    pa = None
 
 
 def _offerings_for_current_prof():
@@ -46,87 +37,61 @@ def _offerings_for_current_prof():
     return q.all()
 
 
-def _collect_rows(off_ids):
-    """
-    Monta linhas no mesmo formato do export do professor:
-    [grupo, rgm, aluno, campus, oferta, orientador, ri, rii, paper, banner_media]
-    """
-    if not off_ids:
-        return []
-
-    # 1) alunos das ofertas
-    students = (
-        Student.query
-        .filter(Student.offering_id.in_(off_ids))
-        .options(joinedload(Student.campus), joinedload(Student.offering))
-        .all()
+def _role_val() -> str:
+    role_val = getattr(current_user, "role_value", None) or (
+        current_user.role.value if hasattr(current_user.role, "value") else current_user.role
     )
-    if not students:
-        return []
+    return (role_val or "").lower()
 
-    student_ids = [s.id for s in students]
-
-    # 2) mapeia aluno -> grupo
-    gs_rows = GroupStudent.query.filter(GroupStudent.student_id.in_(student_ids)).all()
-    student_group = {row.student_id: row.group_id for row in gs_rows}
-
-    group_ids = sorted({row.group_id for row in gs_rows if row.group_id is not None})
-    groups_by_id = {g.id: g for g in Group.query.filter(Group.id.in_(group_ids)).all()}
-
-        # 3) notas por grupo (RI / RII / PAPER), tolerando Enum/strings
-    assessments = GroupAssessment.query.filter(GroupAssessment.group_id.in_(group_ids)).all()
-    grades = {}
-    for a in assessments:
-        d = grades.setdefault(a.group_id, {})
-        key = _instrument_key(a.instrument)
-        if not key:
-            continue
-        d[key] = float(a.score) if a.score is not None else None
-
-
-    # 4) média do banner (se existir)
-    banner_avg = {}
-    if group_ids and BannerEvaluation is not None:
-        res = (
-            db.session.query(BannerEvaluation.group_id, func.avg(BannerEvaluation.score))
-            .filter(BannerEvaluation.group_id.in_(group_ids))
-            .group_by(BannerEvaluation.group_id)
-            .all()
-        )
-        for gid, avg_ in res:
-            banner_avg[gid] = float(avg_) if avg_ is not None else None
-
-    # 5) linhas
-    rows = []
-    for s in students:
-        gid = student_group.get(s.id)
-        g = groups_by_id.get(gid) if gid else None
-
-        # orientador (tolerante)
-        orientador_name = "-"
-        if g is not None:
-            orient_obj = getattr(g, "orientador", None) or getattr(g, "advisor", None)
-            if isinstance(orient_obj, User):
-                orientador_name = orient_obj.full_name
-            elif hasattr(g, "orientador_user_id") and g.orientador_user_id:
-                u = User.query.get(g.orientador_user_id)
-                if u:
-                    orientador_name = u.full_name
-
-        g_grades = grades.get(gid, {}) if gid else {}
-        rows.append([
-            gid or "-",                                  # grupo
-            s.rgm,                                       # rgm
-            s.name,                                      # aluno
-            s.campus.name if s.campus else "-",          # campus
-            s.offering.code if s.offering else "-",      # oferta
-            orientador_name,                             # orientador
-            g_grades.get("ri"),                          # RI
-            g_grades.get("rii"),                         # RII
-            g_grades.get("paper"),                       # Paper
-            (None if gid is None else banner_avg.get(gid)),  # média banner
-        ])
-    return rows
+
+def _home():
+    return url_for("admin.dashboard") if _role_val() == "admin" else url_for("professors.offerings_list")
+
+
+def _scope_params(kind: str) -> dict:
+    """
+    Parâmetros de report_exports.BUILDERS[kind] para o usuário logado:
+      - admin: tudo
+      - professor: só suas ofertas (report/sem_grupo) ou grupos que orienta (groups)
+    """
+    prof = _role_val() == "professor"
+    if kind == "groups":
+        return {"only_prof": current_user.id if prof else None,
+                "max_members": request.values.get("max", type=int)}
+    # admin -> todas (sem IN: students.offering_id é NOT NULL)
+    return {"off_ids": [o.id for o in _offerings_for_current_prof()] if prof else None}
+
+
+def _since():
+    """?since=<ISO 8601> (exportação delta). Retorna (datetime|None, erro|None)."""
+    raw = request.args.get("since")
+    if not raw:
+        return None, None
+    try:
+        return delta.parse_since(raw), None
+    except ValueError:
+        return None, "Parâmetro since inválido. Use data/hora ISO 8601 (ex.: 2026-10-01T03:00:00)."
+
+
+def _respond(kind: str, fmt: str):
+    fmt = (fmt or "csv").lower()
+    since, err = _since()
+    if err:
+        flash(err, "warning")
+        return redirect(_home())
+    spec = report_exports.BUILDERS[kind](**_scope_params(kind), since=since)
+    allowed = report_exports.formats(spec)
+    if fmt not in allowed:
+        flash(f"Formato inválido. Use ?fmt={' | '.join(allowed)}.", "warning")
+        return redirect(_home())
+    if fmt == "xlsx" and openpyxl is None:
+        flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
+        # volta para um lugar seguro
+        return redirect(url_for("admin.groups_list") if kind == "groups" else _home())
+    if fmt == "parquet" and pa is None:
+        flash("Para exportar Parquet, instale 'pyarrow' (pip install pyarrow).", "warning")
+        return redirect(_home())
+    return report_exports.response(spec, fmt)
 
 
 @reports_bp.get("/export")
@@ -136,110 +101,12 @@ def export():
     """
     Admin: exporta TODOS os alunos.
     Professor: exporta SOMENTE as suas ofertas.
+    Parâmetros:
+      - fmt: csv | xlsx | jsonl | parquet (tipados p/ BI; parquet requer pyarrow)
+      - since: ISO 8601 -> só alunos alterados desde então (vale p/ as 3 exportações)
     """
-    fmt = (request.args.get("fmt") or "csv").lower()
+    return _respond("report", request.args.get("fmt"))
 
-    if getattr(current_user, "role_value", None) == "professor":
-        offs = _offerings_for_current_prof()
-        off_ids = [o.id for o in offs]
-    else:
-        # admin -> todas
-        off_ids = [o.id for o in Offering.query.all()]
-
-    rows = _collect_rows(off_ids)
-
-    # CSV
-    if fmt == "csv":
-        headers = [
-            "grupo", "rgm", "aluno", "campus", "oferta",
-            "orientador", "relatorio_i", "relatorio_ii", "paper", "banner_media"
-        ]
-        si = StringIO(newline="")
-        w = csv.writer(si)
-        w.writerow(headers)
-        for r in rows:
-            w.writerow([f"{v:.2f}" if isinstance(v, float) else v for v in r])
-        fname = f"relatorio_{_stamp()}.csv"
-        resp = Response(si.getvalue(), mimetype="text/csv; charset=utf-8")
-        resp.headers["Content-Disposition"] = f'attachment; filename="{fname}"'
-        return resp
-
-    # XLSX
-    if fmt == "xlsx":
-        if openpyxl is None:
-            flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
-            # volta para um lugar seguro
-            return redirect(url_for("admin.dashboard") if getattr(current_user, "role_value", "") == "admin"
-                            else url_for("professors.offerings_list"))
-
-        headers = [
-            "Nº do grupo", "RGM", "Aluno", "Campus", "Oferta",
-            "Orientador", "Relatório I", "Relatório II", "Paper", "Apresentação de Banner (média)"
-        ]
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Relatório"
-        ws.append(headers)
-        for cell in ws[1]:
-            cell.font = openpyxl.styles.Font(bold=True)
-
-        for r in rows:
-            ws.append([round(v, 2) if isinstance(v, float) else v for v in r])
-
-        from openpyxl.utils import get_column_letter
-        for col_idx in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col_idx)].width = 22
-
-        for row in ws.iter_rows(min_row=2, min_col=7, max_col=10):
-            for cell in row:
-                if isinstance(cell.value, (float, int)):
-                    cell.number_format = "0.00"
-
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        fname = f"relatorio_{_stamp()}.xlsx"
-        return send_file(
-            bio,
-            as_attachment=True,
-            download_name=fname,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-
-    # formarto desconhecido
-    flash("Formato inválido. Use ?fmt=csv ou ?fmt=xlsx.", "warning")
-    return redirect(url_for("admin.dashboard") if getattr(current_user, "role_value", "") == "admin"
-                    else url_for("professors.offerings_list"))
-
-# app/reports/routes.py
-
-def _instrument_key(inst) -> str | None:
-    """
-    Normaliza o nome do instrumento para uma das chaves: 'ri' | 'rii' | 'paper'.
-    Aceita Enum (usa .name) ou string; tolera underscore/espaco e acentos.
-    """
-    name = getattr(inst, "name", inst)
-    if not name:
-        return None
-    name = str(name).upper()
-
-    # normaliza acentos e separadores
-    name = (name
-            .replace("Á", "A").replace("À", "A").replace("Â", "A").replace("Ã", "A")
-            .replace("É", "E").replace("Ê", "E")
-            .replace("Í", "I")
-            .replace("Ó", "O").replace("Ô", "O")
-            .replace("Ú", "U")
-            .replace("-", " ").replace("_", " ").strip())
-
-    # matches mais comuns
-    if name in {"RI", "RELATORIO I", "RELATORIO I"}:
-        return "ri"
-    if name in {"RII", "RELATORIO II"}:
-        return "rii"
-    if "PAPER" in name:
-        return "paper"
-    return None
 
 @reports_bp.get("/groups.<fmt>")
 @login_required
@@ -254,100 +121,7 @@ def groups_export(fmt: str):
       - fmt: 'csv' | 'xlsx'
       - ?max=N  -> força o número de pares nome/rgm
     """
-    # 1) Carrega grupos (filtra por professor se necessário)
-    base = Group.query.options(joinedload(Group.orientador)).order_by(Group.id.asc())
-
-    role_val = getattr(current_user, "role_value", None) or (
-        current_user.role.value if hasattr(current_user.role, "value") else current_user.role
-    )
-    role_val = (role_val or "").lower()
-    if role_val == "professor":
-        base = base.filter(Group.orientador_user_id == current_user.id)
-
-    groups = base.all()
-    group_ids = [g.id for g in groups]
-
-    # 2) Pré-carrega membros
-    members_by_group: dict[int, list[Student]] = defaultdict(list)
-    if group_ids:
-        links = (
-            GroupStudent.query
-            .filter(GroupStudent.group_id.in_(group_ids))
-            .options(joinedload(GroupStudent.student))
-            .all()
-        )
-        for gs in links:
-            if gs.student:
-                members_by_group[gs.group_id].append(gs.student)
-
-    # 3) Decide quantos pares nome/rgm exportar
-    max_param = request.args.get("max", type=int)
-    if max_param and max_param > 0:
-        max_members = max_param
-    else:
-        # calcula automaticamente com piso mínimo de 3
-        max_members = max([len(members_by_group.get(g.id, [])) for g in groups] + [3])
-
-    # 4) Monta header achatado
-    header = ["# Grupo", "Título do trabalho", "Orientador"]
-    for i in range(1, max_members + 1):
-        header += [f"nome_{i}", f"rgm_{i}"]
-
-    # 5) Linhas
-    out_rows = []
-    for g in groups:
-        orient = g.orientador.full_name if getattr(g, "orientador", None) else "-"
-        students = sorted(members_by_group.get(g.id, []), key=lambda s: (s.name or "").upper())
-        # corta/ completa
-        pairs = [(s.name or "", s.rgm or "") for s in students[:max_members]]
-        while len(pairs) < max_members:
-            pairs.append(("", ""))
-        flat = []
-        for n, r in pairs:
-            flat += [n, r]
-        out_rows.append([g.id, (g.title or "-"), orient, *flat])
-
-    # 6) XLSX
-    if fmt.lower() == "xlsx":
-        if openpyxl is None:
-            flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
-            return redirect(url_for("admin.groups_list"))
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Grupos"
-        ws.append(header)
-        for c in ws[1]:
-            c.font = Font(bold=True)
-
-        for row in out_rows:
-            ws.append(row)
-
-        # larguras agradáveis
-        from openpyxl.utils import get_column_letter
-        for col_idx in range(1, len(header) + 1):
-            ws.column_dimensions[get_column_letter(col_idx)].width = 22
-
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        fname = f"grupos_{_stamp()}.xlsx"
-        return send_file(
-            bio,
-            as_attachment=True,
-            download_name=fname,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-
-    # 7) CSV (UTF-8 BOM; separador padrão “,” — mude para ';' se preferir)
-    si = StringIO(newline="")
-    writer = csv.writer(si)  # csv.writer(si, delimiter=';') se quiser ponto-e-vírgula
-    writer.writerow(header)
-    writer.writerows(out_rows)
-    fname = f"grupos_{_stamp()}.csv"
-    resp = Response(si.getvalue().encode("utf-8-sig"), mimetype="text/csv; charset=utf-8")
-    resp.headers["Content-Disposition"] = f'attachment; filename="{fname}"'
-    return resp
+    return _respond("groups", fmt)
 
 
 @reports_bp.get("/export_alunos_sg")
@@ -361,82 +135,117 @@ def export_alunos_sg():
     Parâmetros:
       - fmt: csv | xlsx (query string)
     """
-    fmt = (request.args.get("fmt") or "csv").lower()
-
-    # Base: alunos sem vínculo na group_students
-    base = (
-        Student.query
-        .options(joinedload(Student.campus), joinedload(Student.offering))
-        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
-        .filter(GroupStudent.student_id.is_(None))
-    )
+    return _respond("sem_grupo", request.args.get("fmt"))
 
-    # Filtro por professor (apenas suas ofertas)
-    role_val = (getattr(current_user, "role_value", None)
-                or (current_user.role.value if hasattr(current_user.role, "value") else current_user.role)
-                or "").lower()
-    if role_val == "professor":
-        offs = _offerings_for_current_prof()
-        off_ids = [o.id for o in offs]
-        if off_ids:
-            base = base.filter(Student.offering_id.in_(off_ids))
-        else:
-            # professor sem ofertas -> resultado vazio
-            students = []
-            off_ids = []
-    students = base.order_by(Student.name.asc()).all()
-
-    # Linhas
-    headers = ["Nome", "RGM", "Oferta", "Campus"]
-    rows = [
-        [
-            s.name or "-",
-            s.rgm or "-",
-            (s.offering.code if getattr(s, "offering", None) else "-"),
-            (s.campus.name if getattr(s, "campus", None) else "-"),
-        ]
-        for s in students
-    ]
-
-    # XLSX
-    if fmt == "xlsx":
-        if openpyxl is None:
-            flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
-            return redirect(url_for("admin.dashboard") if role_val == "admin" else url_for("professors.offerings_list"))
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Sem Grupo"
-        ws.append(headers)
-        for c in ws[1]:
-            c.font = Font(bold=True)
-        for r in rows:
-            ws.append(r)
-        # larguras
-        from openpyxl.utils import get_column_letter
-        for col_idx in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col_idx)].width = 28 if col_idx in (1, 4) else 16
-
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        fname = f"alunos_sem_grupo_{_stamp()}.xlsx"
-        return send_file(
-            bio,
-            as_attachment=True,
-            download_name=fname,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-
-    # CSV (com BOM para Excel)
-    si = StringIO(newline="")
-    w = csv.writer(si)
-    w.writerow(headers)
-    for r in rows:
-        w.writerow(r)
-    payload = si.getvalue().encode("utf-8-sig")
-    fname = f"alunos_sem_grupo_{_stamp()}.csv"
-    resp = Response(payload, mimetype="text/csv; charset=utf-8")
-    resp.headers["Content-Disposition"] = f'attachment; filename="{fname}"'
+
+@reports_bp.get("/offerings.zip")
+@login_required
+@role_required("admin")
+def offerings_zip():
+    """
+    ZIP com uma planilha de notas por oferta (services/offering_zip.py),
+    renderizado aqui mesmo, uma oferta por vez (o pool de processos é só do CLI).
+    Parâmetros:
+      - fmt: xlsx (padrão) | csv
+      - off: id da oferta (repetível; padrão = todas)
+    """
+    fmt = (request.args.get("fmt") or "xlsx").lower()
+    if fmt not in report_exports.FORMATS:
+        flash("Formato inválido. Use ?fmt=csv ou ?fmt=xlsx.", "warning")
+        return redirect(_home())
+    if fmt == "xlsx" and openpyxl is None:
+        flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
+        return redirect(_home())
+    off_ids = request.args.getlist("off", type=int) or None
+    resp = Response(stream_with_context(offering_zip.iter_zip(off_ids, fmt, workers=0)), mimetype="application/zip")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{offering_zip.filename(fmt)}"'
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@reports_bp.get("/api/changes")
+@login_required
+@role_required("admin")
+def api_changes():
+    """
+    Exportação delta em JSON (services/delta.py): alunos, grupos, vínculos,
+    notas e avaliações de banner criados/alterados desde `since`, mais as
+    lápides dos apagados. Use o `until` da resposta como próximo `since`.
+    """
+    if not request.args.get("since"):
+        return jsonify({"ok": False, "error": "informe ?since=<ISO 8601>"}), 400
+    since, err = _since()
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    resp = jsonify(delta.changes(since))
+    resp.headers["Cache-Control"] = "no-store"
     return resp
 
+
+# =============================================================================
+# Exportações em segundo plano (services/export_jobs.py)
+# =============================================================================
+
+def _job_json(job: dict) -> dict:
+    out = {k: job.get(k) for k in ("id", "kind", "fmt", "status", "created_at",
+                                   "started_at", "finished_at", "filename", "size", "error")}
+    out["status_url"] = url_for("reports.job_status", job_id=job["id"])
+    if job["status"] == "done":
+        out["download_url"] = url_for("reports.job_download", job_id=job["id"])
+    return out
+
+
+def _wants_json() -> bool:
+    return request.accept_mimetypes.best == "application/json" or request.args.get("format") == "json"
+
+
+def _own_job_or_404(job_id: str) -> dict:
+    job = export_jobs.get(job_id)
+    if job is None or (job["user_id"] != current_user.id and _role_val() != "admin"):
+        abort(404)
+    return job
+
+
+@reports_bp.post("/jobs")
+@login_required
+@role_required("admin", "professor")
+def job_create():
+    """Enfileira uma exportação (kind=report|groups|sem_grupo, fmt=csv|xlsx); responde na hora."""
+    kind = request.form.get("kind", "report")
+    fmt = (request.form.get("fmt") or "xlsx").lower()
+    if kind not in report_exports.BUILDERS or fmt not in report_exports.FORMATS:
+        if _wants_json():
+            return jsonify({"ok": False, "error": "kind/fmt inválidos"}), 400
+        flash("Exportação inválida.", "warning")
+        return redirect(_home())
+    if fmt == "xlsx" and openpyxl is None:
+        flash("Para exportar Excel, instale 'openpyxl' (pip install openpyxl).", "warning")
+        return redirect(_home())
+
+    job = export_jobs.enqueue(kind, _scope_params(kind), fmt, current_user.id)
+    if _wants_json():
+        return jsonify(_job_json(job)), 202
+    return redirect(url_for("reports.job_status", job_id=job["id"]))
+
+
+@reports_bp.get("/jobs/<job_id>")
+@login_required
+@role_required("admin", "professor")
+def job_status(job_id: str):
+    """Estado do job (JSON p/ polling ou página que se recarrega até terminar)."""
+    job = _job_json(_own_job_or_404(job_id))
+    if _wants_json():
+        return jsonify(job)
+    return render_template("reports/job.html", job=job, back=_home(),
+                           pending=job["status"] in export_jobs.PENDING)
+
+
+@reports_bp.get("/jobs/<job_id>/download")
+@login_required
+@role_required("admin", "professor")
+def job_download(job_id: str):
+    job = _own_job_or_404(job_id)
+    if job["status"] != "done":
+        abort(409)
+    return send_file(export_jobs.artifact_path(job), as_attachment=True,
+                     download_name=job["filename"], mimetype=MIMETYPES[job["fmt"]])
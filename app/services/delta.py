@@ -0,0 +1,256 @@
+# app/services/delta.py
+"""
+Exportação incremental ("o que mudou desde <instante>") para a sincronização
+noturna com o sistema acadêmico.
+
+Carimbos usados (todos com índice):
+  students.updated_at, tgi_groups.updated_at  -> criação/alteração
+  group_students.created_at                   -> vínculo criado (nunca é alterado)
+  group_assessments.entered_at                -> nota lançada/regravada
+  banner_evaluations.entered_at               -> avaliação de banner
+  sync_tombstones.deleted_at                  -> qualquer um dos acima apagado
+
+As lápides são gravadas pelos eventos da sessão abaixo, na mesma transação
+do DELETE — via ORM (session.delete) ou em lote (Query.delete / Core pela
+sessão: antes do DELETE, um SELECT com o mesmo WHERE lê as chaves).
+
+Os carimbos vêm do relógio do banco (func.now(), no fuso da sessão do
+banco — não no do processo do app) e têm resolução de segundos: o filtro
+é `>= since` e a resposta traz `until` (agora, no banco) para ser usado
+como próximo `since`. Registros no limite podem vir repetidos; o
+consumidor deve aplicar as mudanças de forma idempotente.
+
+`since` sem fuso é lido como hora do banco (é o formato de `until`); com
+fuso (Z, -03:00) é convertido para o fuso da sessão do banco (db_utc_offset).
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, insert, select, text, union
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import (
+    Student, Group, GroupStudent, GroupAssessment, BannerEvaluation,
+    Campus, Offering, User, SyncTombstone,
+)
+
+T = SyncTombstone.__table__
+
+
+def db_now() -> datetime:
+    return db.session.execute(select(func.now())).scalar()
+
+
+def db_utc_offset() -> timedelta:
+    """Fuso da sessão do banco (NOW() - UTC), o mesmo dos carimbos gravados."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return timedelta(0)  # CURRENT_TIMESTAMP do SQLite é UTC
+    if dialect == "mysql":
+        minutes = db.session.execute(
+            select(func.timestampdiff(text("MINUTE"), func.utc_timestamp(), func.now()))).scalar()
+        return timedelta(minutes=int(minutes))
+    if dialect == "postgresql":
+        seconds = db.session.execute(select(func.extract("timezone", func.now()))).scalar()
+        return timedelta(seconds=int(seconds))
+    # outros: diferença para o relógio UTC do app, arredondada a 15 min
+    diff = db_now() - datetime.now(timezone.utc).replace(tzinfo=None)
+    return timedelta(minutes=15 * round(diff.total_seconds() / 900))
+
+
+def parse_since(value: str, utc_offset: timedelta | None = None) -> datetime:
+    """
+    ISO 8601 ('2026-10-01', '2026-10-01T03:00:00', com ou sem fuso) ->
+    datetime ingênuo no relógio do banco. Sem fuso: já é hora do banco.
+    utc_offset: fuso da sessão do banco (padrão: db_utc_offset()).
+    """
+    dt = datetime.fromisoformat((value or "").strip().replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        if utc_offset is None:
+            utc_offset = db_utc_offset()
+        dt = dt.astimezone(timezone(utc_offset)).replace(tzinfo=None)
+    return dt
+
+
+# ------------------------------------------------------------------------------
+# Consultas
+# ------------------------------------------------------------------------------
+def _tombstoned(entity: str, since, col=T.c.ref_id):
+    return select(col).where(T.c.entity == entity, T.c.deleted_at >= since, col.is_not(None))
+
+
+def _touched_groups(since):
+    """Grupos alterados ou com nota/banner lançado ou apagado desde `since`."""
+    return union(
+        select(Group.id).where(Group.updated_at >= since),
+        select(GroupAssessment.group_id).where(GroupAssessment.entered_at >= since),
+        select(BannerEvaluation.group_id).where(BannerEvaluation.entered_at >= since),
+        _tombstoned("assessment", since, T.c.group_id),
+        _tombstoned("banner", since, T.c.group_id),
+    ).subquery()
+
+
+def changed_student_ids(since):
+    """
+    SELECT dos alunos cuja linha no gradebook pode ter mudado: o aluno, o
+    vínculo (novo ou desfeito), o grupo ou as notas/banner do grupo.
+    """
+    groups = _touched_groups(since)
+    return union(
+        select(Student.id).where(Student.updated_at >= since),
+        select(GroupStudent.student_id).where(GroupStudent.created_at >= since),
+        select(GroupStudent.student_id).where(GroupStudent.group_id.in_(select(groups.c[0]))),
+        _tombstoned("membership", since),
+    )
+
+
+def changed_group_ids(since):
+    """SELECT dos grupos alterados ou com membros entrando/saindo desde `since`."""
+    return union(
+        select(Group.id).where(Group.updated_at >= since),
+        select(GroupStudent.group_id).where(GroupStudent.created_at >= since),
+        _tombstoned("membership", since, T.c.group_id),
+    )
+
+
+def _iso(dt):
+    return dt.isoformat(sep="T", timespec="seconds") if dt is not None else None
+
+
+def _num(x):
+    return float(x) if x is not None else None
+
+
+def changes(since: datetime) -> dict:
+    """Tudo que mudou desde `since`, em dicts JSON-serializáveis."""
+    until = db_now()
+
+    students = db.session.execute(
+        select(Student.id, Student.rgm, Student.name, Campus.name, Offering.code, Student.updated_at)
+        .outerjoin(Campus, Campus.id == Student.campus_id)
+        .outerjoin(Offering, Offering.id == Student.offering_id)
+        .where(Student.updated_at >= since)
+        .order_by(Student.id)
+    )
+    groups = db.session.execute(
+        select(Group.id, Group.title, User.full_name, Group.updated_at)
+        .outerjoin(User, User.id == Group.orientador_user_id)
+        .where(Group.updated_at >= since)
+        .order_by(Group.id)
+    )
+    memberships = db.session.execute(
+        select(GroupStudent.group_id, GroupStudent.student_id, Student.rgm, GroupStudent.created_at)
+        .join(Student, Student.id == GroupStudent.student_id)
+        .where(GroupStudent.created_at >= since)
+        .order_by(GroupStudent.group_id, GroupStudent.student_id)
+    )
+    assessments = db.session.execute(
+        select(GroupAssessment.id, GroupAssessment.group_id, GroupAssessment.instrument,
+               GroupAssessment.score, GroupAssessment.entered_at)
+        .where(GroupAssessment.entered_at >= since)
+        .order_by(GroupAssessment.id)
+    )
+    banners = db.session.execute(
+        select(BannerEvaluation.id, BannerEvaluation.group_id, BannerEvaluation.evaluator_user_id,
+               BannerEvaluation.score, BannerEvaluation.entered_at)
+        .where(BannerEvaluation.entered_at >= since)
+        .order_by(BannerEvaluation.id)
+    )
+    deleted = db.session.execute(
+        select(T.c.entity, T.c.ref_id, T.c.group_id, T.c.ref, T.c.deleted_at)
+        .where(T.c.deleted_at >= since)
+        .order_by(T.c.id)
+    )
+
+    return {
+        "since": _iso(since),
+        "until": _iso(until),
+        "students": [
+            {"id": i, "rgm": rgm, "name": n, "campus": c, "offering": o, "updated_at": _iso(u)}
+            for i, rgm, n, c, o, u in students
+        ],
+        "groups": [
+            {"id": i, "title": t, "orientador": o, "updated_at": _iso(u)}
+            for i, t, o, u in groups
+        ],
+        "memberships": [
+            {"group_id": g, "student_id": s, "rgm": rgm, "created_at": _iso(c)}
+            for g, s, rgm, c in memberships
+        ],
+        "assessments": [
+            {"id": i, "group_id": g, "instrument": inst.name, "score": _num(sc), "entered_at": _iso(e)}
+            for i, g, inst, sc, e in assessments
+        ],
+        "banner_evaluations": [
+            {"id": i, "group_id": g, "evaluator_user_id": u, "score": _num(sc), "entered_at": _iso(e)}
+            for i, g, u, sc, e in banners
+        ],
+        "deleted": [
+            {"entity": e, "id": r, "group_id": g, "ref": ref, "deleted_at": _iso(d)}
+            for e, r, g, ref, d in deleted
+        ],
+    }
+
+
+def prune(days: float) -> int:
+    """Apaga lápides com mais de `days` dias. Não faz commit."""
+    limit = db_now() - timedelta(days=days)
+    return db.session.execute(T.delete().where(T.c.deleted_at < limit)).rowcount
+
+
+# ------------------------------------------------------------------------------
+# Lápides (eventos da sessão)
+# ------------------------------------------------------------------------------
+# tabela -> (entidade, colunas lidas, função colunas -> (ref_id, group_id, ref))
+_SOURCES = {
+    Student.__table__.name: ("student", (Student.id, Student.rgm),
+                             lambda i, rgm: (i, None, rgm)),
+    Group.__table__.name: ("group", (Group.id,),
+                           lambda i: (i, i, None)),
+    GroupStudent.__table__.name: ("membership", (GroupStudent.student_id, GroupStudent.group_id),
+                                  lambda s, g: (s, g, None)),
+    GroupAssessment.__table__.name: ("assessment", (GroupAssessment.id, GroupAssessment.group_id,
+                                                    GroupAssessment.instrument),
+                                     lambda i, g, inst: (i, g, getattr(inst, "name", inst))),
+    BannerEvaluation.__table__.name: ("banner", (BannerEvaluation.id, BannerEvaluation.group_id,
+                                                 BannerEvaluation.evaluator_user_id),
+                                      lambda i, g, u: (i, g, str(u))),
+}
+
+
+def _tombstone_rows(table_name: str, values) -> list:
+    entity, _, key = _SOURCES[table_name]
+    out = []
+    for v in values:
+        ref_id, group_id, ref = key(*v)
+        out.append({"entity": entity, "ref_id": ref_id, "group_id": group_id, "ref": ref})
+    return out
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    rows = []
+    for obj in session.deleted:
+        name = getattr(getattr(obj, "__table__", None), "name", None)
+        if name in _SOURCES:
+            cols = _SOURCES[name][1]
+            rows += _tombstone_rows(name, [tuple(getattr(obj, c.key) for c in cols)])
+    for r in rows:
+        session.add(SyncTombstone(**r))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(state):
+    # DELETE em lote (Query.delete() / Core pela sessão): lê as chaves antes
+    if not state.is_delete:
+        return
+    table = getattr(state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name not in _SOURCES:
+        return
+    sel = select(*_SOURCES[name][1])
+    if state.statement.whereclause is not None:
+        sel = sel.where(state.statement.whereclause)
+    rows = _tombstone_rows(name, state.session.execute(sel).all())
+    if rows:
+        state.session.execute(insert(T), rows)
@@ -0,0 +1,158 @@
+# app/services/export_cache.py
+"""
+Cache em disco das exportações (CSV/XLSX) de reports e professors.
+
+Chave = parâmetros da exportação (tipo, formato, escopo do usuário, ...)
++ "versão dos dados". A versão é um carimbo gravado em
+<EXPORT_CACHE_DIR>/VERSION e trocado a cada commit que altere alunos,
+grupos, membros, notas, avaliações de banner ou os nomes exibidos nas
+planilhas (campus, oferta, orientador). Como fica em arquivo, todos os
+workers (e a CLI) enxergam a troca na hora — sem TTL.
+
+  - mesma chave  -> arquivo já gerado, enviado direto do disco
+  - If-None-Match com a mesma ETag -> 304 sem tocar no banco
+  - arquivos com mais de EXPORT_CACHE_MAX_AGE segundos são apagados
+    quando um novo é gravado (versões antigas nunca mais são pedidas)
+
+`flask reports pregenerate` (cron) grava aqui as exportações padrão com
+ensure(); enquanto a versão não mudar, a rota só responde os cabeçalhos.
+Com EXPORT_SENDFILE=nginx|x-sendfile quem envia o arquivo é o servidor
+web (X-Accel-Redirect / X-Sendfile) — o worker Python não lê os bytes.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from flask import current_app, request, send_file
+
+from ..models import (
+    Student, Group, GroupStudent, GroupAssessment, BannerEvaluation,
+    GroupScoreSummary, Campus, Offering, User,
+)
+from .write_tracking import track_writes
+
+
+def enabled() -> bool:
+    return bool(current_app.config.get("EXPORT_CACHE_ENABLED", True))
+
+
+def cache_dir() -> str:
+    path = current_app.config.get("EXPORT_CACHE_DIR") or os.path.join(current_app.instance_path, "export_cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_version() -> str:
+    try:
+        with open(os.path.join(cache_dir(), "VERSION"), encoding="ascii") as f:
+            return f.read().strip() or "0"
+    except FileNotFoundError:
+        return "0"
+
+
+def bump() -> None:
+    """Troca o carimbo de versão (gravação atômica; vale p/ todos os processos)."""
+    d = cache_dir()
+    tmp = os.path.join(d, f".VERSION.{os.getpid()}.{uuid.uuid4().hex}")
+    with open(tmp, "w", encoding="ascii") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp, os.path.join(d, "VERSION"))
+
+
+def etag_for(parts) -> str:
+    raw = json.dumps({"p": parts, "v": data_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _prune(d: str) -> None:
+    max_age = float(current_app.config.get("EXPORT_CACHE_MAX_AGE", 86400) or 0)
+    if max_age <= 0:
+        return
+    limit = time.time() - max_age
+    for entry in os.scandir(d):
+        if entry.name == "VERSION" or not entry.is_file():
+            continue
+        try:
+            if entry.stat().st_mtime < limit:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def ensure(parts, ext: str, write) -> tuple:
+    """
+    Garante o arquivo de `parts` (lista/tupla JSON-serializável) na versão atual.
+    write(fileobj) só é chamado se ele ainda não existir. Retorna (etag, caminho).
+    """
+    etag = etag_for(parts)
+    d = cache_dir()
+    path = os.path.join(d, f"{etag}.{ext}")
+    if not os.path.exists(path):
+        tmp = os.path.join(d, f".{etag}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, path)  # outro worker gerando o mesmo arquivo: o último vence, igual
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        _prune(d)
+    return etag, path
+
+
+def _offload(path: str, filename: str, mimetype: str):
+    """Resposta vazia com X-Accel-Redirect/X-Sendfile, ou None se EXPORT_SENDFILE estiver desligado."""
+    mode = (current_app.config.get("EXPORT_SENDFILE") or "").lower()
+    if mode not in ("nginx", "x-sendfile"):
+        return None
+    resp = current_app.response_class(mimetype=mimetype)
+    if mode == "nginx":
+        # location interna do Nginx apontando (alias) para EXPORT_CACHE_DIR; ver VPS.MD
+        prefix = current_app.config.get("EXPORT_ACCEL_PREFIX") or "/_exports/"
+        resp.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + os.path.basename(path)
+    else:
+        resp.headers["X-Sendfile"] = os.path.abspath(path)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def send(parts, ext: str, filename: str, mimetype: str, write):
+    """
+    Responde a exportação identificada por `parts`.
+    write(fileobj) só é chamado se o arquivo ainda não existir no cache.
+    """
+    etag = etag_for(parts)
+    if etag in request.if_none_match:
+        resp = current_app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    etag, path = ensure(parts, ext, write)
+    resp = _offload(path, filename, mimetype)
+    if resp is None:
+        resp = send_file(path, as_attachment=True, download_name=filename, mimetype=mimetype,
+                         etag=etag, conditional=True, max_age=0)
+    else:
+        resp.set_etag(etag)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+
+# ------------------------------------------------------------------------------
+# Invalidação por eventos da sessão (services/write_tracking.py)
+# ------------------------------------------------------------------------------
+def _bump_after_commit() -> None:
+    try:
+        bump()
+    except OSError:
+        current_app.logger.warning("export_cache: não foi possível gravar VERSION", exc_info=True)
+
+
+# de User só o nome aparece nas planilhas (orientador); login não invalida
+track_writes("export_data_dirty",
+             (Student, Group, GroupStudent, GroupAssessment, BannerEvaluation,
+              GroupScoreSummary, Campus, Offering, User),
+             _bump_after_commit, attrs={User: ("full_name",)})
@@ -0,0 +1,149 @@
+# app/services/export_jobs.py
+"""
+Fila de exportações em segundo plano.
+
+Uma exportação completa (todas as ofertas em XLSX) pode passar do
+--timeout 30 do gunicorn e ocupa uma das 4 threads enquanto roda. Aqui ela
+vira um job:
+
+  enqueue()  -> grava <id>.json (status "queued") e entrega a um pool de
+                threads do próprio processo; devolve o id na hora
+  thread     -> app context próprio (sessão própria), gera o arquivo via
+                report_exports.write() em <id>.<fmt> e marca "done"/"failed"
+  get()      -> lê o JSON (funciona de qualquer worker/processo)
+
+Estado e artefatos ficam em EXPORT_JOBS_DIR (padrão instance/export_jobs).
+Arquivos com mais de EXPORT_JOB_RETENTION_HOURS são apagados a cada novo
+job. Job "queued"/"running" cujo processo morreu (restart do gunicorn,
+--max-requests) é reportado como "failed".
+"""
+import json
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from . import report_exports
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+PENDING = ("queued", "running")
+
+_lock = threading.Lock()
+_executor = None
+
+
+def jobs_dir() -> str:
+    path = current_app.config.get("EXPORT_JOBS_DIR") or os.path.join(current_app.instance_path, "export_jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = max(1, int(current_app.config.get("EXPORT_JOB_WORKERS", 1)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export-job")
+        return _executor
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _meta_path(job_id: str) -> str:
+    return os.path.join(jobs_dir(), f"{job_id}.json")
+
+
+def artifact_path(job: dict) -> str:
+    return os.path.join(jobs_dir(), f"{job['id']}.{job['fmt']}")
+
+
+def _save(job: dict) -> None:
+    path = _meta_path(job["id"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def get(job_id: str):
+    """Estado do job (dict) ou None se não existir/expirou."""
+    if not _ID_RE.match(job_id or ""):
+        return None
+    try:
+        with open(_meta_path(job_id), encoding="utf-8") as f:
+            job = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if job["status"] in PENDING and job.get("pid") != os.getpid() and not _pid_alive(job.get("pid")):
+        job.update(status="failed", error="processo reiniciado durante a exportação")
+    return job
+
+
+def prune() -> int:
+    """Apaga JSON + artefatos mais velhos que a retenção. Retorna nº de arquivos removidos."""
+    hours = float(current_app.config.get("EXPORT_JOB_RETENTION_HOURS", 24) or 0)
+    if hours <= 0:
+        return 0
+    limit = datetime.now().timestamp() - hours * 3600
+    removed = 0
+    for entry in os.scandir(jobs_dir()):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < limit:
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def enqueue(kind: str, params: dict, fmt: str, user_id) -> dict:
+    if kind not in report_exports.BUILDERS:
+        raise ValueError(f"exportação desconhecida: {kind}")
+    if fmt not in report_exports.FORMATS:
+        raise ValueError(f"formato inválido: {fmt}")
+    prune()
+    job = {
+        "id": uuid.uuid4().hex, "kind": kind, "params": params, "fmt": fmt,
+        "user_id": user_id, "status": "queued", "pid": os.getpid(),
+        "created_at": _now(), "started_at": None, "finished_at": None,
+        "filename": None, "size": None, "error": None,
+    }
+    _save(job)
+    _pool().submit(_run, current_app._get_current_object(), job)
+    return job
+
+
+def _run(app, job: dict) -> None:
+    with app.app_context():
+        job.update(status="running", started_at=_now())
+        _save(job)
+        path = artifact_path(job)
+        tmp = f"{path}.tmp"
+        try:
+            spec = report_exports.BUILDERS[job["kind"]](**job["params"])
+            with open(tmp, "wb") as f:
+                report_exports.write(spec, job["fmt"], f)
+            os.replace(tmp, path)
+            job.update(status="done", filename=report_exports.filename(spec, job["fmt"]),
+                       size=os.path.getsize(path))
+        except Exception as e:
+            app.logger.exception("export job %s falhou", job["id"])
+            job.update(status="failed", error=str(e) or e.__class__.__name__)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        job["finished_at"] = _now()
+        _save(job)
@@ -0,0 +1,147 @@
+# app/services/grade_import.py
+"""
+Importação de notas (RI, RII, Paper) a partir da planilha exportada pela
+oferta (professors.export_offering_xlsx / _csv), preenchida offline.
+
+Colunas usadas (demais são ignoradas): Nº do grupo | grupo, Relatório I,
+Relatório II, Paper. A planilha tem uma linha por aluno; as notas são do
+grupo, então linhas do mesmo grupo precisam concordar.
+
+Fluxo:
+  1. leitura em streaming (utils/spreadsheet) + validação de cada célula
+     (RI/RII: 0 ou 0,5; Paper: 0..4; vazio = não mexer)
+  2. consolidação por grupo (valores divergentes entre alunos = erro)
+  3. 1 consulta de posse para TODOS os grupos do arquivo: grupo de oferta
+     do professor ou orientado por ele; os demais são rejeitados
+  4. 1 consulta das notas atuais -> só grava o que mudou
+  5. 1 upsert em lote (grades.upsert_scores) + 1 commit
+"""
+from dataclasses import dataclass, field
+
+from sqlalchemy import or_, select
+
+from ..extensions import db
+from ..models import Group, GroupStudent, Student, Offering
+from ..utils import spreadsheet
+from . import grades, search_index
+
+
+@dataclass
+class GradeImportReport:
+    updated: list = field(default_factory=list)    # [(group_id, {Instrument: Decimal})]
+    unchanged: list = field(default_factory=list)  # [group_id]
+    rejected: list = field(default_factory=list)   # grupos inexistentes ou de outro professor
+    skipped: int = 0                               # linhas sem grupo ou sem nenhuma nota
+    errors: list = field(default_factory=list)     # [(linha, mensagem)]
+
+
+def _column(header: str):
+    h = search_index.normalize(header).replace("_", " ")
+    if "grupo" in h:
+        return "group"
+    if h in ("relatorio ii", "rii"):
+        return "rii"
+    if h in ("relatorio i", "ri"):
+        return "ri"
+    if h == "paper":
+        return "paper"
+    return None
+
+
+_PARSERS = {"ri": (grades.RI, grades.parse_report),
+            "rii": (grades.RII, grades.parse_report),
+            "paper": (grades.PAPER, grades.parse_paper)}
+
+
+def parse(stream, filename: str, report: GradeImportReport):
+    """Valida todas as linhas e devolve {group_id: {Instrument: Decimal}}."""
+    by_group, origin = {}, {}
+    header = None
+    for lineno, raw in enumerate(spreadsheet.iter_table(stream, filename), start=1):
+        if header is None:
+            header = [_column(h) for h in raw]
+            if "group" not in header:
+                report.errors.append((1, "coluna 'Nº do grupo' não encontrada"))
+                return {}
+            continue
+        rec = {k: (v or "").strip() for k, v in zip(header, raw) if k}
+        gid_raw = rec.get("group", "")
+        if gid_raw in ("", "-"):
+            report.skipped += 1
+            continue
+        if not gid_raw.isdigit():
+            report.errors.append((lineno, f"nº de grupo inválido '{gid_raw}'"))
+            continue
+        gid = int(gid_raw)
+
+        values, bad = {}, False
+        for key, (inst, parser) in _PARSERS.items():
+            try:
+                val = parser(rec.get(key))
+            except ValueError as e:
+                report.errors.append((lineno, f"grupo {gid}: {key.upper()} {e}"))
+                bad = True
+                continue
+            if val is not None:
+                values[inst] = val
+        if bad:
+            continue
+        if not values:
+            report.skipped += 1
+            continue
+
+        dest = by_group.setdefault(gid, {})
+        for inst, val in values.items():
+            if inst in dest and dest[inst] != val:
+                report.errors.append((lineno, f"grupo {gid}: {inst.name} diverge da linha "
+                                              f"{origin[(gid, inst)]} ({dest[inst]} x {val})"))
+                continue
+            dest[inst] = val
+            origin.setdefault((gid, inst), lineno)
+    return by_group
+
+
+def allowed_groups(group_ids, user_id) -> set:
+    """Grupos (dentre group_ids) que o professor pode lançar — 1 consulta."""
+    group_ids = list(group_ids)
+    if not group_ids:
+        return set()
+    owned = (
+        select(GroupStudent.group_id)
+        .join(Student, Student.id == GroupStudent.student_id)
+        .join(Offering, Offering.id == Student.offering_id)
+        .where(Offering.professor_id == user_id)
+    )
+    rows = (
+        db.session.query(Group.id)
+        .filter(Group.id.in_(group_ids))
+        .filter(or_(Group.orientador_user_id == user_id, Group.id.in_(owned)))
+    )
+    return {gid for (gid,) in rows}
+
+
+def import_grades(stream, filename: str, user_id, dry_run: bool = False) -> GradeImportReport:
+    report = GradeImportReport()
+    by_group = parse(stream, filename, report)
+    if not by_group:
+        return report
+
+    ok = allowed_groups(by_group, user_id)
+    report.rejected = sorted(gid for gid in by_group if gid not in ok)
+
+    current = grades.scores_for_groups(ok)
+    changes = {}
+    for gid in sorted(ok):
+        cur = current.get(gid, {})
+        diff = {inst: val for inst, val in by_group[gid].items()
+                if cur.get(inst) is None or cur[inst] != val}
+        if diff:
+            changes[gid] = diff
+            report.updated.append((gid, diff))
+        else:
+            report.unchanged.append(gid)
+
+    if changes and not dry_run:
+        grades.upsert_scores(changes, user_id)
+        db.session.commit()
+    return report
@@ -0,0 +1,116 @@
+# app/services/gradebook.py
+"""
+Visão única "aluno -> grupo -> notas -> banner" usada pelas exportações e
+pela página da oferta.
+
+Uma consulta só, sem agregação:
+
+  students
+    LEFT JOIN campuses / offerings / group_students / tgi_groups / users (orientador)
+    LEFT JOIN group_score_summary (PK group_id; services/score_summary.py)
+  WHERE students.offering_id IN (...)
+
+Cada aluno é exatamente uma linha. As linhas são namedtuples
+(tuplas com __slots__ vazio: sem __dict__ por linha).
+"""
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from ..utils import exports
+from . import delta
+from ..models import (
+    Student, Campus, Offering, Group, GroupStudent, User, GroupScoreSummary,
+)
+
+GradebookRow = namedtuple("GradebookRow", [
+    "student_id", "rgm", "name", "campus", "offering",
+    "group_id", "group_title", "orientador",
+    "ri", "rii", "paper", "banner", "final",
+])
+
+# layout das planilhas exportadas (e aceito de volta pelo grade_import)
+EXPORT_HEADERS_CSV = [
+    "grupo", "rgm", "aluno", "campus", "oferta",
+    "orientador", "relatorio_i", "relatorio_ii", "paper", "banner_media",
+]
+EXPORT_HEADERS_XLSX = [
+    "Nº do grupo", "RGM", "Aluno", "Campus", "Oferta",
+    "Orientador", "Relatório I", "Relatório II", "Paper", "Apresentação de Banner (média)",
+]
+EXPORT_NUM_COLS = (6, 7, 8, 9)  # RI, RII, Paper, Banner
+# exportações tipadas (jsonl/parquet): nulos em vez de "-", notas como número
+TYPED_COLUMNS = [
+    ("grupo", "int"), ("rgm", "str"), ("aluno", "str"), ("campus", "str"), ("oferta", "str"),
+    ("orientador", "str"), ("relatorio_i", "float"), ("relatorio_ii", "float"), ("paper", "float"),
+    ("banner_media", "float"), ("nota_final", "float"),
+]
+
+
+def query(offering_ids=None, since=None):
+    """
+    SELECT (sem executar). offering_ids=None -> todas as ofertas.
+    since: só alunos cuja linha mudou desde então (services/delta.py).
+    """
+    sm = GroupScoreSummary
+    stmt = (
+        select(
+            Student.id, Student.rgm, Student.name, Campus.name, Offering.code,
+            Group.id, Group.title, User.full_name,
+            sm.ri, sm.rii, sm.paper, sm.banner_sum, sm.banner_count, sm.final,
+        )
+        .select_from(Student)
+        .outerjoin(Campus, Campus.id == Student.campus_id)
+        .outerjoin(Offering, Offering.id == Student.offering_id)
+        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
+        .outerjoin(Group, Group.id == GroupStudent.group_id)
+        .outerjoin(User, User.id == Group.orientador_user_id)
+        .outerjoin(sm, sm.group_id == Group.id)
+        .order_by(Student.name.asc(), Student.id.asc())
+    )
+    if offering_ids is not None:
+        stmt = stmt.where(Student.offering_id.in_(list(offering_ids)))
+    if since is not None:
+        stmt = stmt.where(Student.id.in_(delta.changed_student_ids(since)))
+    return stmt
+
+
+def _f(x):
+    return float(x) if x is not None else None
+
+
+def iter_rows(offering_ids=None, since=None):
+    """
+    Gera GradebookRow (notas como float) a partir de uma única consulta,
+    lida com cursor de servidor em lotes (utils.exports.stream_rows).
+    """
+    if offering_ids is not None:
+        offering_ids = list(offering_ids)
+        if not offering_ids:
+            return
+    for r in exports.stream_rows(query(offering_ids, since)):
+        banner = float(r[11]) / r[12] if r[12] else None
+        yield GradebookRow(r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7],
+                           _f(r[8]), _f(r[9]), _f(r[10]), banner, _f(r[13]))
+
+
+def rows(offering_ids=None) -> list:
+    return list(iter_rows(offering_ids))
+
+
+def export_row(r: GradebookRow) -> list:
+    """Linha no layout das planilhas (EXPORT_HEADERS_*)."""
+    return [
+        r.group_id or "-", r.rgm, r.name, r.campus or "-", r.offering or "-",
+        r.orientador or "-", r.ri, r.rii, r.paper,
+        (None if r.group_id is None else r.banner),
+    ]
+
+
+def typed_row(r: GradebookRow) -> tuple:
+    """Linha no layout de TYPED_COLUMNS."""
+    return (
+        r.group_id, r.rgm, r.name, r.campus, r.offering, r.orientador,
+        r.ri, r.rii, r.paper, (None if r.group_id is None else r.banner),
+        (None if r.group_id is None else r.final),
+    )
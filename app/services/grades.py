@@ -1,22 +1,189 @@
-from decimal import Decimal
+# app/services/grades.py
+"""
+Leitura e gravação das notas de grupo (RI, RII, Paper).
+
+upsert_scores(): todas as notas de um ou vários grupos num único
+INSERT multi-linha com upsert nativo do banco, atômico sob a
+uq_group_instrument (sem SELECT prévio, sem corrida entre dois lançamentos):
+
+  MySQL   INSERT ... ON DUPLICATE KEY UPDATE
+  SQLite  INSERT ... ON CONFLICT (group_id, instrument) DO UPDATE
+
+e, no mesmo comando de transação, atualiza group_score_summary
+(score_summary.refresh) dos grupos afetados.
+
+scores_for_groups()/scores_for_group(): todas as notas em uma consulta.
+
+parse_grid(): lê a grade de lançamento de uma oferta (RI/RII/Paper por
+grupo), valida célula a célula e devolve só as notas que mudaram.
+"""
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import func
+
 from app.models import GroupAssessment, Instrument
 from app.extensions import db
+from app.services import score_summary
 
-def upsert_assessment(group_id, instrument, score, user_id):
-    ga = GroupAssessment.query.filter_by(group_id=group_id, instrument=instrument).first()
-    if ga:
-        ga.score = Decimal(str(score))
-        ga.entered_by_user_id = user_id
-    else:
-        ga = GroupAssessment(
-            group_id=group_id,
-            instrument=instrument,
-            score=Decimal(str(score)),
-            entered_by_user_id=user_id
+RI = Instrument.RELATORIO_I
+RII = Instrument.RELATORIO_II
+PAPER = Instrument.PAPER
+
+REPORT_SCORE = Decimal("0.5")  # RI/RII entregue
+PAPER_MAX = Decimal("4")
+
+
+def scores_from_form(ri_checked, rii_checked, paper) -> dict:
+    """Checkboxes RI/RII (0,5 cada) + Paper (0..4) -> {Instrument: Decimal}."""
+    return {
+        RI: REPORT_SCORE if ri_checked else Decimal("0.0"),
+        RII: REPORT_SCORE if rii_checked else Decimal("0.0"),
+        PAPER: Decimal(str(paper)) if paper is not None else Decimal("0.0"),
+    }
+
+
+def parse_paper(raw):
+    """'3,5' -> Decimal('3.50'); '' ou '-' -> None; inválido -> ValueError com a mensagem."""
+    raw = (raw or "").strip().replace(",", ".")
+    if raw in ("", "-"):
+        return None
+    try:
+        val = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError("valor não numérico")
+    if not val.is_finite() or val < 0 or val > PAPER_MAX:
+        raise ValueError(f"deve estar entre 0 e {PAPER_MAX}")
+    return val.quantize(Decimal("0.01"))
+
+
+def parse_report(raw):
+    """RI/RII: '0' | '0,5' | '0.50' -> Decimal; '' ou '-' -> None; outro valor -> ValueError."""
+    raw = (raw or "").strip().replace(",", ".")
+    if raw in ("", "-"):
+        return None
+    try:
+        val = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError("valor não numérico")
+    if val not in (Decimal("0"), REPORT_SCORE):
+        raise ValueError(f"deve ser 0 ou {REPORT_SCORE}".replace(".", ","))
+    return val
+
+
+def parse_grid(form, group_ids, current: dict):
+    """
+    Campos do formulário por grupo: ri-<id> / rii-<id> (checkbox) e paper-<id>.
+    current: {group_id: {Instrument: Decimal}} (scores_for_groups).
+
+    Retorna (mudanças {group_id: {Instrument: Decimal}}, erros {"<id>.paper": msg}).
+    Célula inválida não impede as demais; nota ainda inexistente que
+    continua vazia/desmarcada não é gravada.
+    """
+    changes, errors = {}, {}
+    for gid in group_ids:
+        cur = current.get(gid, {})
+        wanted = {
+            RI: REPORT_SCORE if form.get(f"ri-{gid}") else Decimal("0.0"),
+            RII: REPORT_SCORE if form.get(f"rii-{gid}") else Decimal("0.0"),
+        }
+        try:
+            paper = parse_paper(form.get(f"paper-{gid}"))
+            wanted[PAPER] = paper if paper is not None else Decimal("0.0")
+        except ValueError as e:
+            errors[f"{gid}.paper"] = f"Paper: {e}"
+
+        for inst, val in wanted.items():
+            old = cur.get(inst)
+            if old is None and val == 0:
+                continue
+            if old is not None and Decimal(old) == val:
+                continue
+            changes.setdefault(gid, {})[inst] = val
+    return changes, errors
+
+
+def _upsert_stmt(dialect_name):
+    t = GroupAssessment.__table__
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(t)
+        return stmt.on_duplicate_key_update(
+            score=stmt.inserted.score,
+            entered_by_user_id=stmt.inserted.entered_by_user_id,
+            entered_at=func.now(),
+        )
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(t)
+        return stmt.on_conflict_do_update(
+            index_elements=[t.c.group_id, t.c.instrument],
+            set_={
+                "score": stmt.excluded.score,
+                "entered_by_user_id": stmt.excluded.entered_by_user_id,
+                "entered_at": func.now(),
+            },
         )
-        db.session.add(ga)
-    return ga
+    return None
+
+
+def upsert_scores(rows, user_id) -> int:
+    """
+    rows: [(group_id, Instrument, score)] ou {group_id: {Instrument: score}}.
+    Grava tudo num único comando. Não faz commit. Retorna nº de notas enviadas.
+    """
+    if isinstance(rows, dict):
+        rows = [(gid, inst, score) for gid, by_inst in rows.items() for inst, score in by_inst.items()]
+    payload = [
+        {"group_id": gid, "instrument": inst, "score": Decimal(str(score)), "entered_by_user_id": user_id}
+        for gid, inst, score in rows
+    ]
+    if not payload:
+        return 0
+
+    stmt = _upsert_stmt(db.session.get_bind().dialect.name)
+    if stmt is not None:
+        db.session.execute(stmt, payload)
+        score_summary.refresh({p["group_id"] for p in payload})
+        return len(payload)
+
+    # outros bancos: SELECT + UPDATE/INSERT por nota (comportamento antigo)
+    for p in payload:
+        ga = GroupAssessment.query.filter_by(group_id=p["group_id"], instrument=p["instrument"]).first()
+        if ga:
+            ga.score = p["score"]
+            ga.entered_by_user_id = user_id
+        else:
+            db.session.add(GroupAssessment(**p))
+    score_summary.refresh({p["group_id"] for p in payload})
+    return len(payload)
+
+
+def scores_for_groups(group_ids) -> dict:
+    """{group_id: {Instrument: Decimal}} numa consulta (grupos sem nota ficam de fora)."""
+    group_ids = list(group_ids)
+    out = {}
+    if not group_ids:
+        return out
+    rows = (
+        db.session.query(GroupAssessment.group_id, GroupAssessment.instrument, GroupAssessment.score)
+        .filter(GroupAssessment.group_id.in_(group_ids))
+    )
+    for gid, inst, score in rows:
+        out.setdefault(gid, {})[inst] = score
+    return out
+
+
+def scores_for_group(group_id) -> dict:
+    return scores_for_groups([group_id]).get(group_id, {})
+
+
+# --- compatibilidade: uma nota por chamada ---
+def upsert_assessment(group_id, instrument, score, user_id):
+    upsert_scores([(group_id, instrument, score)], user_id)
+
 
 def get_assessment_score(group_id, instrument):
-    ga = GroupAssessment.query.filter_by(group_id=group_id, instrument=instrument).first()
-    return ga.score if ga else None
+    return scores_for_group(group_id).get(instrument)
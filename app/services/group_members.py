@@ -0,0 +1,142 @@
+# app/services/group_members.py
+"""
+Consultas de vínculo aluno <-> grupo usadas pelos formulários de grupos.
+
+lookup_rgms(): resolve vários RGMs de uma vez — aluno, campus, oferta e
+grupo atual numa única consulta com JOINs (antes: 1 request HTTP + 3-4
+consultas por RGM digitado).
+
+diff()/apply(): edição de membros de um grupo com custo fixo —
+  1 SELECT classifica manter / adicionar / remover / conflito (aluno em
+  outro grupo) / não encontrado; depois 1 DELETE em lote e 1 INSERT
+  multi-linha, independente do tamanho do grupo.
+
+members(): lista para exibição (rgm, nome, campus, oferta) numa consulta.
+"""
+from dataclasses import dataclass, field
+
+from sqlalchemy import select, or_
+
+from ..extensions import db
+from ..models import Student, Campus, Offering, Group, GroupStudent
+
+LOOKUP_MAX = 200  # RGMs por chamada
+
+
+def parse_rgms(raw) -> list[str]:
+    """Aceita lista ou texto (quebra de linha, vírgula, ponto e vírgula, espaço); mantém a ordem, sem repetidos."""
+    if isinstance(raw, str):
+        raw = [raw]
+    out, seen = [], set()
+    for chunk in raw or []:
+        for r in (chunk or "").replace(",", " ").replace(";", " ").split():
+            if r not in seen:
+                seen.add(r)
+                out.append(r)
+    return out
+
+
+def lookup_rgms(rgms) -> dict[str, dict]:
+    """
+    {rgm: {id, rgm, name, campus, offering, in_group, group_id}} para os RGMs
+    encontrados (1 SELECT com LEFT JOIN em campus, oferta e group_students).
+    """
+    rgms = list(rgms)
+    if not rgms:
+        return {}
+    rows = (
+        db.session.query(Student.id, Student.rgm, Student.name,
+                         Campus.name, Offering.code, GroupStudent.group_id)
+        .outerjoin(Campus, Campus.id == Student.campus_id)
+        .outerjoin(Offering, Offering.id == Student.offering_id)
+        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
+        .filter(Student.rgm.in_(rgms))
+        .all()
+    )
+    return {
+        rgm: {
+            "id": sid,
+            "rgm": rgm,
+            "name": name,
+            "campus": campus or "-",
+            "offering": code or "-",
+            "in_group": group_id is not None,
+            "group_id": group_id,
+        }
+        for sid, rgm, name, campus, code, group_id in rows
+    }
+
+
+@dataclass
+class MembershipDiff:
+    # itens: (student_id, rgm, nome, group_id_atual, título_do_grupo_atual)
+    keep: list = field(default_factory=list)
+    add: list = field(default_factory=list)
+    remove: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)
+    missing: list = field(default_factory=list)  # RGMs sem aluno
+
+
+def diff(group_id: int, wanted_rgms) -> MembershipDiff:
+    """Compara os RGMs desejados com os membros atuais do grupo (1 SELECT)."""
+    wanted = parse_rgms(wanted_rgms)
+    wanted_set = set(wanted)
+    cond = Student.id.in_(select(GroupStudent.student_id).where(GroupStudent.group_id == group_id))
+    if wanted:
+        cond = or_(Student.rgm.in_(wanted), cond)
+    rows = (
+        db.session.query(Student.id, Student.rgm, Student.name, GroupStudent.group_id, Group.title)
+        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
+        .outerjoin(Group, Group.id == GroupStudent.group_id)
+        .filter(cond)
+        .order_by(Student.name.asc(), Student.id.asc())
+        .all()
+    )
+
+    d = MembershipDiff()
+    found = set()
+    for row in rows:
+        item = tuple(row)
+        _, rgm, _, gid, _ = item
+        if rgm in wanted_set:
+            found.add(rgm)
+            if gid == group_id:
+                d.keep.append(item)
+            elif gid is None:
+                d.add.append(item)
+            else:
+                d.conflicts.append(item)
+        else:
+            d.remove.append(item)
+    d.missing = [r for r in wanted if r not in found]
+    return d
+
+
+def apply(group_id: int, d: MembershipDiff, reassign: bool = False) -> None:
+    """
+    Aplica o diff: 1 DELETE (saídas + conflitantes, se reassign) e 1 INSERT
+    multi-linha. Não faz commit.
+    """
+    t = GroupStudent.__table__
+    moved = d.conflicts if reassign else []
+    drop_ids = [sid for sid, *_ in d.remove] + [sid for sid, *_ in moved]
+    if drop_ids:
+        # uq_student_single_group: o aluno só tem um vínculo, então student_id basta
+        db.session.execute(t.delete().where(t.c.student_id.in_(drop_ids)))
+    add_ids = [sid for sid, *_ in d.add] + [sid for sid, *_ in moved]
+    if add_ids:
+        db.session.execute(t.insert(), [{"group_id": group_id, "student_id": sid} for sid in add_ids])
+
+
+def members(group_id: int):
+    """Rows (id, rgm, name, campus, offering) dos membros, ordenadas por nome."""
+    return (
+        db.session.query(Student.id, Student.rgm, Student.name,
+                         Campus.name.label("campus"), Offering.code.label("offering"))
+        .join(GroupStudent, GroupStudent.student_id == Student.id)
+        .outerjoin(Campus, Campus.id == Student.campus_id)
+        .outerjoin(Offering, Offering.id == Student.offering_id)
+        .filter(GroupStudent.group_id == group_id)
+        .order_by(Student.name.asc(), Student.id.asc())
+        .all()
+    )
@@ -0,0 +1,170 @@
+# app/services/identity_cache.py
+"""
+Cache curto da identidade do usuário logado.
+
+O user_loader do Flask-Login roda em TODA request autenticada (inclusive
+fragmentos de modal). Em vez de `SELECT ... FROM users` a cada vez,
+guardamos por alguns segundos só o que o app lê de current_user
+(id, email, full_name, role, is_active) num objeto leve.
+
+- TTL: IDENTITY_CACHE_TTL (segundos; 0 desliga o cache)
+- Invalidação explícita: invalidate(user_id) após alterar/excluir o usuário
+- Contadores de hit/miss: stats()
+
+O cache é por processo, mas toda consulta confere um carimbo de versão
+compartilhado (arquivo IDENTITY_VERSION_PATH, padrão instance/identity.version,
+como o VERSION do export_cache). Qualquer commit que altere e-mail, nome,
+perfil ou is_active de um usuário — ou o exclua — troca o carimbo
+(services/write_tracking.py), e todos os workers descartam o snapshot na
+próxima request: desativar/rebaixar alguém não espera o TTL.
+"""
+import os
+import time
+import threading
+import uuid
+
+from flask import current_app
+from flask_login import UserMixin
+
+from ..models import User
+from .write_tracking import track_writes
+
+_lock = threading.Lock()
+_entries: dict[int, tuple[float, str, "CachedIdentity"]] = {}  # id -> (expira_em, versão, snapshot)
+_hits = 0
+_misses = 0
+
+
+class CachedIdentity(UserMixin):
+    """Snapshot somente-leitura de User com a mesma interface usada nas views."""
+
+    def __init__(self, id, email, full_name, role, is_active):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.role = role
+        self._active = bool(is_active)
+
+    @property
+    def is_active(self) -> bool:
+        return self._active
+
+    @property
+    def role_value(self) -> str:
+        rv = self.role
+        if rv is not None and hasattr(rv, "value"):
+            return (rv.value or "guest").lower()
+        if isinstance(rv, str):
+            return (rv or "guest").lower()
+        return "guest"
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role_value == "admin"
+
+    @property
+    def is_professor(self) -> bool:
+        return self.role_value == "professor"
+
+    @classmethod
+    def from_user(cls, u) -> "CachedIdentity":
+        return cls(u.id, u.email, u.full_name, u.role, u.is_active)
+
+
+def _version_path() -> str:
+    return (current_app.config.get("IDENTITY_VERSION_PATH")
+            or os.path.join(current_app.instance_path, "identity.version"))
+
+
+def shared_version() -> str:
+    try:
+        with open(_version_path(), encoding="ascii") as f:
+            return f.read().strip() or "0"
+    except OSError:
+        return "0"
+
+
+def bump() -> None:
+    """Troca o carimbo compartilhado (gravação atômica): todos os workers descartam o cache."""
+    path = _version_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex}"
+    with open(tmp, "w", encoding="ascii") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp, path)
+
+
+def get(user_id: int, loader):
+    """
+    Retorna a identidade do cache; em miss chama loader(user_id) -> User|None
+    e guarda o snapshot.
+    """
+    global _hits, _misses
+    ttl = float(current_app.config.get("IDENTITY_CACHE_TTL", 60) or 0)
+    now = time.monotonic()
+    version = shared_version() if ttl > 0 else None
+
+    if ttl > 0:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] > now and entry[1] == version:
+            with _lock:
+                _hits += 1
+            return entry[2]
+
+    with _lock:
+        _misses += 1
+    u = loader(user_id)
+    if u is None:
+        return None
+    ident = CachedIdentity.from_user(u)
+    if ttl > 0:
+        with _lock:
+            # versão lida antes do loader: troca durante a carga => miss na próxima
+            _entries[user_id] = (now + ttl, version, ident)
+    return ident
+
+
+def remember(u) -> None:
+    """Pré-carrega o snapshot (ex.: logo após o login, que já tem o User em mãos)."""
+    ttl = float(current_app.config.get("IDENTITY_CACHE_TTL", 60) or 0)
+    if ttl > 0 and u is not None:
+        with _lock:
+            _entries[u.id] = (time.monotonic() + ttl, shared_version(), CachedIdentity.from_user(u))
+
+
+def invalidate(user_id) -> None:
+    """Descarta a identidade (chamar depois de alterar/excluir o usuário)."""
+    if user_id is None:
+        return
+    with _lock:
+        _entries.pop(int(user_id), None)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> dict:
+    with _lock:
+        total = _hits + _misses
+        return {
+            "hits": _hits,
+            "misses": _misses,
+            "hit_ratio": round(_hits / total, 4) if total else None,
+            "entries": len(_entries),
+        }
+
+
+# ------------------------------------------------------------------------------
+# Invalidação entre workers por eventos da sessão
+# ------------------------------------------------------------------------------
+def _bump_after_commit() -> None:
+    try:
+        bump()
+    except OSError:
+        current_app.logger.warning("identity_cache: não foi possível gravar o carimbo", exc_info=True)
+
+
+track_writes("identity_dirty", (User,), _bump_after_commit,
+             attrs={User: ("email", "full_name", "role", "is_active")})
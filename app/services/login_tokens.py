@@ -0,0 +1,84 @@
+# app/services/login_tokens.py
+"""
+Links de acesso (magic link / QR) para convidados no dia do pôster.
+
+O token é assinado com HMAC-SHA256 (itsdangerous + SECRET_KEY) e carrega
+o id do usuário e um `jti` aleatório. A verificação é só uma comparação
+HMAC em tempo constante + um UPDATE pela PK em login_tokens para marcar
+o uso: nenhum bcrypt/PBKDF2 envolvido, então centenas de convidados podem
+entrar em poucos minutos sem esgotar a CPU.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from ..extensions import db
+from ..models import LoginToken, User
+
+_SALT = "guest-login-token"
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(
+        current_app.config["SECRET_KEY"],
+        salt=_SALT,
+        signer_kwargs={"digest_method": hashlib.sha256},
+    )
+
+
+def issue_tokens(users, ttl_hours: float, created_by_user_id=None) -> list[tuple]:
+    """
+    Gera um token por usuário (uma única transação). Retorna [(user, token)].
+    Não faz commit.
+    """
+    s = _serializer()
+    expires_at = datetime.utcnow() + timedelta(hours=ttl_hours)
+    out, rows = [], []
+    for u in users:
+        jti = secrets.token_hex(16)
+        rows.append({
+            "jti": jti,
+            "user_id": u.id,
+            "expires_at": expires_at,
+            "created_by_user_id": created_by_user_id,
+        })
+        out.append((u, s.dumps({"u": u.id, "j": jti})))
+    if rows:
+        db.session.execute(LoginToken.__table__.insert(), rows)
+    return out
+
+
+def consume(token: str, max_age_hours: float):
+    """
+    Valida a assinatura/validade e marca o token como usado (atômico).
+    Retorna o User ou None (inválido, expirado, já usado, usuário inativo).
+    """
+    try:
+        data = _serializer().loads(token, max_age=int(max_age_hours * 3600))
+        user_id, jti = int(data["u"]), str(data["j"])
+    except (BadSignature, SignatureExpired, KeyError, TypeError, ValueError):
+        return None
+
+    now = datetime.utcnow()
+    # uso único: só um request consegue virar used_at de NULL para agora
+    res = db.session.execute(
+        LoginToken.__table__.update()
+        .where(LoginToken.jti == jti,
+               LoginToken.user_id == user_id,
+               LoginToken.used_at.is_(None),
+               LoginToken.expires_at > now)
+        .values(used_at=now)
+    )
+    if res.rowcount != 1:
+        db.session.rollback()
+        return None
+
+    user = db.session.get(User, user_id)
+    if user is None or not user.is_active:
+        db.session.rollback()
+        return None
+    db.session.commit()
+    return user
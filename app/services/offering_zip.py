@@ -0,0 +1,120 @@
+# app/services/offering_zip.py
+"""
+ZIP com uma planilha de notas por oferta (CSV ou XLSX).
+
+  1. as linhas de cada oferta são lidas (gradebook, cursor de servidor) só
+     quando a planilha dela vai ser renderizada — nunca todas de uma vez
+  2. na web a renderização é no próprio processo, uma oferta por vez; o
+     pool de processos ("spawn", como o de senhas — openpyxl é CPU pura e
+     não divide bem o GIL) fica para o CLI (flask export-offerings-zip)
+  3. os arquivos entram no ZIP conforme ficam prontos; o zipfile escreve
+     num destino sem seek (data descriptors) e cada pedaço é entregue na
+     hora — o ZIP inteiro nunca fica em memória. Com pool, no máximo
+     2 × workers planilhas ficam em voo (linhas enviadas ou bytes prontos).
+
+EXPORT_ZIP_WORKERS = nº de processos do CLI (0 = renderiza no próprio processo).
+"""
+import io
+import multiprocessing
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from werkzeug.utils import secure_filename
+
+from ..models import Offering
+from ..utils import exports
+from . import gradebook
+
+
+class _Sink:
+    """Destino só-escrita do zipfile; os bytes escritos são recolhidos por drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def render(fmt: str, rows) -> bytes:
+    """Planilha de uma oferta (roda no processo filho: só dados simples, sem app/DB)."""
+    buf = io.BytesIO()
+    if fmt == "xlsx":
+        exports.write_xlsx(buf, gradebook.EXPORT_HEADERS_XLSX, rows,
+                           sheet_title="Notas", num_cols=gradebook.EXPORT_NUM_COLS)
+    else:
+        exports.write_csv(buf, gradebook.EXPORT_HEADERS_CSV, rows)
+    return buf.getvalue()
+
+
+def _member_name(code: str, fmt: str) -> str:
+    return f"notas_oferta_{secure_filename(code) or 'oferta'}.{fmt}"
+
+
+def offerings(offering_ids=None) -> list:
+    """[(id, código)] das ofertas pedidas, por código (ofertas sem aluno também entram)."""
+    q = Offering.query.with_entities(Offering.id, Offering.code).order_by(Offering.code.asc())
+    if offering_ids is not None:
+        q = q.filter(Offering.id.in_(list(offering_ids)))
+    return q.all()
+
+
+def sheet_rows(offering_id: int):
+    """Linhas da planilha de uma oferta (gerador sobre o cursor do gradebook)."""
+    return (gradebook.export_row(r) for r in gradebook.iter_rows([offering_id]))
+
+
+def iter_zip(offering_ids=None, fmt: str = "xlsx", workers: int = 0):
+    """
+    Gera os bytes do ZIP em pedaços (um por planilha + diretório central).
+    workers > 0 só no CLI: cada filho reimporta o app, o que não cabe numa requisição.
+    """
+    offs = offerings(offering_ids)
+    sink = _Sink()
+    stamp = datetime.now().timetuple()[:6]
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        def add(code, payload):
+            zf.writestr(zipfile.ZipInfo(_member_name(code, fmt), date_time=stamp), payload,
+                        compress_type=zipfile.ZIP_DEFLATED)
+            return sink.drain()
+
+        if workers <= 0 or len(offs) <= 1:
+            for off_id, code in offs:
+                yield add(code, render(fmt, sheet_rows(off_id)))
+        else:
+            workers = min(workers, len(offs))
+            ctx = multiprocessing.get_context("spawn")
+            todo = iter(offs)
+            pending = {}
+
+            def submit_next():
+                nxt = next(todo, None)
+                if nxt is not None:
+                    off_id, code = nxt
+                    pending[ex.submit(render, fmt, list(sheet_rows(off_id)))] = code
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+                for _ in range(2 * workers):
+                    submit_next()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        code = pending.pop(fut)  # solta os bytes junto com o future
+                        yield add(code, fut.result())
+                        submit_next()
+    yield sink.drain()  # diretório central
+
+
+def filename(fmt: str) -> str:
+    return f"notas_por_oferta_{fmt}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.zip"
@@ -0,0 +1,265 @@
+# app/services/passwords.py
+"""
+Verificação de senha fora do worker web.
+
+bcrypt/PBKDF2 seguram a CPU (e o GIL) por centenas de ms. Com gunicorn
+em 1 worker x 4 threads, uma rajada de logins trava todas as outras
+requests. Aqui a verificação roda num pool pequeno de processos com fila
+limitada; quando a fila enche, o chamador recebe PasswordPoolBusy e pode
+responder "tente novamente" na hora, em vez de empilhar threads.
+
+Config (app.config / .env):
+  PASSWORD_POOL_WORKERS  -> nº de processos (0 = verifica inline, como antes)
+  PASSWORD_POOL_QUEUE    -> máximo de verificações em voo (rodando + na fila)
+  PASSWORD_POOL_TIMEOUT  -> segundos esperando o resultado antes de desistir
+  PASSWORD_HASH_WORKERS  -> processos do hash_many (importação pela CLI);
+                            0 = os.cpu_count() (cores do host — num container
+                            com limite de CPU, informe o valor)
+  PASSWORD_IMPORT_WORKERS -> processos do pool à parte do upload de usuários
+                            pela web (hash_batch); 0 = inline
+  PASSWORD_IMPORT_TIMEOUT -> segundos esperando um lote do upload
+  BCRYPT_LOG_ROUNDS      -> custo bcrypt; `flask calibrate-hashing` grava o
+                            valor medido em instance/hashing.json
+
+Todo hash que não for bcrypt com o custo vigente é regravado no próximo
+login bem-sucedido (ver auth.login), então os formatos PBKDF2 somem com o
+tempo.
+
+Obs.: o pool usa "spawn"; scripts próprios que chamem check_password com o
+pool ligado precisam do guard `if __name__ == "__main__":` (gunicorn,
+`flask ...` e run.py já estão ok).
+"""
+import os
+import re
+import hashlib
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as _bcrypt
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash as wz_check_password_hash
+
+_HEX_RE = re.compile(r"[0-9a-fA-F]+")
+
+
+class PasswordPoolBusy(Exception):
+    """Fila de verificação cheia (ou resultado demorou demais)."""
+
+
+def verify_password_hash(ph: str, password: str) -> bool:
+    """
+    Verifica a senha contra o hash armazenado aceitando:
+      - PBKDF2 (padrão Werkzeug, base64)
+      - PBKDF2 no formato legado HEX (gerado no primeiro script)
+      - bcrypt
+    Função pura (sem app/DB) para poder rodar em outro processo.
+    """
+    ph = (ph or "").strip()
+    if not ph:
+        return False
+
+    # --- bcrypt (formato alvo; caminho rápido sem regex) ---
+    if ph.startswith("$2"):
+        try:
+            return _bcrypt.checkpw(password.encode("utf-8"), ph.encode("utf-8"))
+        except Exception:
+            return False
+
+    # --- PBKDF2 (tanto base64 quanto o nosso formato HEX legado) ---
+    if ph.startswith("pbkdf2:"):
+        try:
+            # Formato: pbkdf2:sha256:ITER$SALT$HASH
+            parts = ph.split("$")
+            if len(parts) == 3:
+                method_part, salt_str, stored = parts
+                # extrai iterações (ex.: "pbkdf2:sha256:260000")
+                iters = 260000
+                mparts = method_part.split(":")
+                if len(mparts) >= 3 and mparts[2].isdigit():
+                    iters = int(mparts[2])
+
+                # Caso legado: SALT e HASH em HEX
+                if _HEX_RE.fullmatch(salt_str) and _HEX_RE.fullmatch(stored):
+                    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt_str), iters)
+                    return dk.hex() == stored
+
+            # Caso padrão (Werkzeug, base64)
+            return wz_check_password_hash(ph, password)
+        except Exception:
+            return False
+
+    # Fallback: tenta Werkzeug por via das dúvidas
+    try:
+        return wz_check_password_hash(ph, password)
+    except Exception:
+        return False
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Gera hash bcrypt com o custo informado (função pura, roda no pool)."""
+    return _bcrypt.hashpw(password.encode("utf-8"), _bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def needs_rehash(ph: str, rounds: int) -> bool:
+    """True se o hash não é bcrypt ou foi gerado com custo diferente do atual."""
+    ph = (ph or "").strip()
+    parts = ph.split("$")
+    # bcrypt: $2b$12$<salt+hash>
+    if not ph.startswith("$2") or len(parts) != 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != int(rounds)
+
+
+def measure_bcrypt(rounds: int, samples: int = 3) -> float:
+    """Tempo médio (s) de um hash bcrypt com esse custo neste host."""
+    salt = _bcrypt.gensalt(rounds)
+    t0 = time.perf_counter()
+    for _ in range(samples):
+        _bcrypt.hashpw(b"calibrate-hashing", salt)
+    return (time.perf_counter() - t0) / samples
+
+
+# ------------------------------------------------------------------------------
+# Pools (um de cada por processo; recriados se o gunicorn fizer fork depois)
+#   "login"  -> check_password / make_hash (PASSWORD_POOL_*)
+#   "import" -> hash_batch, upload de usuários pela web (PASSWORD_IMPORT_*)
+# ------------------------------------------------------------------------------
+_lock = threading.Lock()
+_pools = {}  # nome -> (pool, vagas, pid)
+
+
+def _get_pool(name: str, workers: int, queue: int):
+    pid = os.getpid()
+    entry = _pools.get(name)
+    if entry is not None and entry[2] == pid:
+        return entry[0], entry[1]
+    with _lock:
+        entry = _pools.get(name)
+        if entry is None or entry[2] != pid:
+            # "spawn": evita fork de processo com threads (gthread) e funciona no Windows
+            ctx = multiprocessing.get_context("spawn")
+            entry = (ProcessPoolExecutor(max_workers=workers, mp_context=ctx),
+                     threading.BoundedSemaphore(max(queue, workers)), pid)
+            _pools[name] = entry
+    return entry[0], entry[1]
+
+
+def _reset_pool(name: str = "login"):
+    """Descarta um pool quebrado (processo filho morreu); o próximo uso recria."""
+    with _lock:
+        entry = _pools.pop(name, None)
+    if entry is not None:
+        entry[0].shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    """
+    Executa fn(*args) no pool do login respeitando a fila; PasswordPoolBusy se
+    lotado ou se o resultado passar de PASSWORD_POOL_TIMEOUT. No timeout o job
+    é cancelado: se ainda estava na fila, sai dela e a vaga volta na hora; se
+    já estava rodando num processo, não há como interromper — ele termina e
+    só então devolve a vaga.
+    """
+    cfg = current_app.config
+    pool, slots = _get_pool("login", int(cfg.get("PASSWORD_POOL_WORKERS", 0)),
+                            int(cfg.get("PASSWORD_POOL_QUEUE", 8)))
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        fut = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        slots.release()
+        _reset_pool()
+        raise PasswordPoolBusy()
+    # a vaga volta quando o job termina de fato ou é cancelado (ver timeout abaixo)
+    fut.add_done_callback(lambda _f: slots.release())
+    try:
+        return fut.result(timeout=float(cfg.get("PASSWORD_POOL_TIMEOUT", 10)))
+    except FutureTimeout:
+        fut.cancel()  # o cliente já desistiu; o done_callback devolve a vaga
+        raise PasswordPoolBusy()
+    except BrokenProcessPool:
+        _reset_pool()
+        raise PasswordPoolBusy()
+
+
+def _pool_enabled() -> bool:
+    return has_app_context() and int(current_app.config.get("PASSWORD_POOL_WORKERS", 0) or 0) > 0
+
+
+def current_rounds() -> int:
+    """Custo bcrypt vigente (BCRYPT_LOG_ROUNDS, calibrado por `flask calibrate-hashing`)."""
+    cfg = current_app.config if has_app_context() else {}
+    return int(cfg.get("BCRYPT_LOG_ROUNDS", 12))
+
+
+def check_password(ph: str, password: str) -> bool:
+    """
+    Verifica a senha no pool de processos (ou inline se o pool estiver
+    desligado / fora do app). Levanta PasswordPoolBusy se não houver vaga.
+    """
+    if not _pool_enabled():
+        return verify_password_hash(ph, password)
+    return _run(verify_password_hash, ph, password)
+
+
+def hash_many(passwords, rounds: int | None = None, workers: int | None = None) -> list[str]:
+    """
+    Hash bcrypt de vários passwords em paralelo (PASSWORD_HASH_WORKERS
+    processos; 0/ausente = os.cpu_count()). Só para a CLI (flask
+    import-users): cria um pool próprio e pode levar minutos. Com 1 worker
+    ou poucos itens roda inline.
+    """
+    passwords = list(passwords)
+    rounds = current_rounds() if rounds is None else rounds
+    if workers is None and has_app_context():
+        workers = int(current_app.config.get("PASSWORD_HASH_WORKERS", 0) or 0)
+    workers = min(max(workers or os.cpu_count() or 1, 1), len(passwords))
+    if workers <= 1 or len(passwords) < 8:
+        return [hash_password(p, rounds) for p in passwords]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        chunk = max(1, len(passwords) // (workers * 4))
+        return list(ex.map(hash_password, passwords, [rounds] * len(passwords), chunksize=chunk))
+
+
+def hash_batch(passwords) -> list[str]:
+    """
+    Hash de um lote pequeno (upload de usuários pela web) no pool "import",
+    separado do pool do login: nenhum login espera atrás do upload. Um lote
+    por worker do pool em voo; PasswordPoolBusy se já houver outro ou se
+    passar de PASSWORD_IMPORT_TIMEOUT.
+    """
+    passwords = list(passwords)
+    rounds = current_rounds()
+    cfg = current_app.config
+    workers = int(cfg.get("PASSWORD_IMPORT_WORKERS", 1) or 0)
+    if workers <= 0 or not passwords:
+        return [hash_password(p, rounds) for p in passwords]
+    pool, slots = _get_pool("import", workers, 1)
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    futs = []
+    try:
+        futs = [pool.submit(hash_password, p, rounds) for p in passwords]
+        deadline = time.monotonic() + float(cfg.get("PASSWORD_IMPORT_TIMEOUT", 20))
+        return [f.result(timeout=max(0.0, deadline - time.monotonic())) for f in futs]
+    except FutureTimeout:
+        raise PasswordPoolBusy()
+    except BrokenProcessPool:
+        _reset_pool("import")
+        raise PasswordPoolBusy()
+    finally:
+        for f in futs:
+            f.cancel()  # só os que ainda não começaram
+        slots.release()
+
+
+def make_hash(password: str) -> str:
+    """Hash bcrypt com o custo vigente (no pool, se ligado)."""
+    if not _pool_enabled():
+        return hash_password(password, current_rounds())
+    return _run(hash_password, password, current_rounds())
@@ -0,0 +1,182 @@
+# app/services/rate_limit.py
+"""
+Throttling de login com token bucket (por IP e por e-mail).
+
+Cada tentativa de POST em auth.login consome 1 ficha do balde do e-mail
+ANTES de qualquer hash de senha. O balde do IP é só conferido nessa hora
+e perde 1 ficha apenas quando o login falha (login_failed): no dia do
+banner os convidados entram todos pelo mesmo NAT do local, e logins
+certos não devem esgotar o IP. Balde vazio => 429 na hora, sem gastar
+bcrypt.
+
+Backends (LOGIN_RATE_BACKEND):
+  - "memory": dict + lock, por processo (todas as threads do worker)
+  - "sqlite": arquivo em instance/ (LOGIN_RATE_SQLITE_PATH), compartilhado
+              por todas as threads e workers do gunicorn na mesma máquina
+
+Parâmetros: LOGIN_RATE_IP_BURST / LOGIN_RATE_IP_PER_MIN e
+LOGIN_RATE_EMAIL_BURST / LOGIN_RATE_EMAIL_PER_MIN (capacidade do balde e
+fichas devolvidas por minuto; o IP conta só falhas, então pode ser bem
+mais folgado que o e-mail).
+"""
+import os
+import time
+import sqlite3
+import threading
+
+from flask import current_app
+
+_MAX_IDLE = 3600  # s sem uso -> entrada pode ser descartada
+
+
+class MemoryBuckets:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._counters: dict[str, int] = {}
+
+    def take(self, key: str, capacity: float, per_sec: float, now: float, cost: int = 1):
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * per_sec)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= cost  # cost=0: só confere
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 50_000:
+                self._prune(now)
+        return allowed, (0.0 if allowed else (1 - tokens) / per_sec)
+
+    def _prune(self, now):
+        for k in [k for k, (_, ts) in self._buckets.items() if now - ts > _MAX_IDLE]:
+            del self._buckets[k]
+
+    def incr(self, name: str):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+
+class SQLiteBuckets:
+    """Baldes num arquivo SQLite (WAL); BEGIN IMMEDIATE serializa as atualizações."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None or getattr(self._local, "pid", None) != os.getpid():
+            c = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.execute("CREATE TABLE IF NOT EXISTS buckets (k TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL)")
+            c.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn, self._local.pid = c, os.getpid()
+        return c
+
+    def take(self, key: str, capacity: float, per_sec: float, now: float, cost: int = 1):
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            row = c.execute("SELECT tokens, ts FROM buckets WHERE k = ?", (key,)).fetchone()
+            tokens, ts = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - ts) * per_sec)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= cost  # cost=0: só confere
+            c.execute("INSERT INTO buckets (k, tokens, ts) VALUES (?, ?, ?) "
+                      "ON CONFLICT(k) DO UPDATE SET tokens = excluded.tokens, ts = excluded.ts",
+                      (key, tokens, now))
+            if now - self._last_prune > 300:
+                c.execute("DELETE FROM buckets WHERE ts < ?", (now - _MAX_IDLE,))
+                self._last_prune = now
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        return allowed, (0.0 if allowed else (1 - tokens) / per_sec)
+
+    def incr(self, name: str):
+        self._conn().execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def counters(self) -> dict:
+        return {n: v for n, v in self._conn().execute("SELECT name, value FROM counters")}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                cfg = current_app.config
+                if (cfg.get("LOGIN_RATE_BACKEND") or "memory").lower() == "sqlite":
+                    path = cfg.get("LOGIN_RATE_SQLITE_PATH") or os.path.join(current_app.instance_path, "login_rate.sqlite")
+                    _backend = SQLiteBuckets(path)
+                else:
+                    _backend = MemoryBuckets()
+    return _backend
+
+
+def _ip_bucket(cfg):
+    return (float(cfg.get("LOGIN_RATE_IP_BURST", 60)),
+            float(cfg.get("LOGIN_RATE_IP_PER_MIN", 30)) / 60.0)
+
+
+def check_login(ip: str | None, email: str | None):
+    """
+    Confere o balde do IP (sem consumir) e consome 1 ficha do e-mail.
+    Retorna (permitido, retry_after_s). Desligado com LOGIN_RATE_ENABLED = False.
+    """
+    cfg = current_app.config
+    if not cfg.get("LOGIN_RATE_ENABLED", True):
+        return True, 0.0
+    b = _get_backend()
+    now = time.time()
+
+    ok, wait = b.take(f"ip:{ip or '-'}", *_ip_bucket(cfg), now, cost=0)
+    if not ok:
+        b.incr("rejected_ip")
+        return False, wait
+
+    if email:
+        ok, wait = b.take(f"email:{email.strip().lower()}", float(cfg.get("LOGIN_RATE_EMAIL_BURST", 5)),
+                          float(cfg.get("LOGIN_RATE_EMAIL_PER_MIN", 5)) / 60.0, now)
+        if not ok:
+            b.incr("rejected_email")
+            return False, wait
+
+    b.incr("allowed")
+    return True, 0.0
+
+
+def login_failed(ip: str | None) -> None:
+    """Senha errada / usuário inexistente ou inativo: consome 1 ficha do IP."""
+    cfg = current_app.config
+    if not cfg.get("LOGIN_RATE_ENABLED", True):
+        return
+    _get_backend().take(f"ip:{ip or '-'}", *_ip_bucket(cfg), time.time())
+
+
+def stats() -> dict:
+    c = _get_backend().counters()
+    allowed = c.get("allowed", 0)
+    rejected = c.get("rejected_ip", 0) + c.get("rejected_email", 0)
+    total = allowed + rejected
+    return {
+        "backend": type(_get_backend()).__name__,
+        "allowed": allowed,
+        "rejected_ip": c.get("rejected_ip", 0),
+        "rejected_email": c.get("rejected_email", 0),
+        "reject_ratio": round(rejected / total, 4) if total else None,
+    }
@@ -0,0 +1,104 @@
+# app/services/reference_cache.py
+"""
+Cache versionado dos dados de referência usados nos selects do admin
+(campi, ofertas com dono, professores ativos).
+
+São conjuntos pequenos e quase estáticos, mas eram consultados em todo
+GET/POST de students_*, groups_* e users_*. Aqui ficam em memória até
+algum commit alterar Campus, Offering ou User:
+
+  - eventos da sessão (services/write_tracking.py) anotam que houve
+    escrita nessas tabelas — via ORM (flush) ou via Core (INSERT em lote)
+  - no commit a versão é incrementada e o cache descartado
+  - rollback descarta a anotação sem invalidar nada
+
+Por processo, como o identity_cache: outros workers (ou a CLI) enxergam
+a mudança ao expirar REFDATA_CACHE_TTL (segundos; 0 desliga o cache).
+"""
+import time
+import threading
+
+from flask import current_app
+from sqlalchemy import func
+
+from ..extensions import db
+from ..models import Campus, Offering, User
+from .write_tracking import track_writes
+
+_lock = threading.Lock()
+_version = 0
+_entries: dict[str, tuple[int, float, object]] = {}  # nome -> (versão, expira_em, valor)
+
+
+def version() -> int:
+    return _version
+
+
+def invalidate() -> None:
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
+
+
+def _cached(name: str, loader):
+    ttl = float(current_app.config.get("REFDATA_CACHE_TTL", 300) or 0)
+    now = time.monotonic()
+    v = _version
+    if ttl > 0:
+        entry = _entries.get(name)
+        if entry is not None and entry[0] == v and entry[1] > now:
+            return entry[2]
+    value = loader()
+    if ttl > 0:
+        with _lock:
+            # só guarda se ninguém invalidou enquanto carregávamos
+            if v == _version:
+                _entries[name] = (v, now + ttl, value)
+    return value
+
+
+# ------------------------------------------------------------------------------
+# Conjuntos cacheados (Rows/tuplas, nunca objetos ORM presos à sessão)
+# ------------------------------------------------------------------------------
+def campuses() -> list[tuple]:
+    """Rows (id, name) ordenadas por nome."""
+    return _cached("campuses", lambda: (
+        db.session.query(Campus.id, Campus.name).order_by(Campus.name.asc()).all()
+    ))
+
+
+def offerings() -> list[tuple]:
+    """Rows (id, code, description, professor_id, professor_name) ordenadas por código."""
+    return _cached("offerings", lambda: (
+        db.session.query(Offering.id, Offering.code, Offering.description,
+                         Offering.professor_id, User.full_name.label("professor_name"))
+        .outerjoin(User, User.id == Offering.professor_id)
+        .order_by(Offering.code.asc())
+        .all()
+    ))
+
+
+def professors() -> list[tuple]:
+    """[(id, rótulo)] dos professores ativos (role em string; aceita legado 'Role.professor')."""
+    return _cached("professors", lambda: [
+        (uid, full_name or email) for uid, full_name, email in (
+            db.session.query(User.id, User.full_name, User.email)
+            .filter(User.is_active.is_(True))
+            .filter(func.lower(User.role).in_(("professor", "role.professor")))
+            .order_by(User.full_name.asc())
+        )
+    ])
+
+
+def stats() -> dict:
+    with _lock:
+        return {"version": _version, "entries": sorted(_entries)}
+
+
+# ------------------------------------------------------------------------------
+# Invalidação por eventos da sessão
+# ------------------------------------------------------------------------------
+# para User só interessam as colunas que aparecem nos selects
+track_writes("refdata_dirty", (Campus, Offering, User), invalidate,
+             attrs={User: ("full_name", "email", "role", "is_active")})
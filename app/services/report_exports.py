@@ -0,0 +1,226 @@
+# app/services/report_exports.py
+"""
+Definição das exportações padrão (o QUE sai em cada planilha), separada
+das rotas para poder ser gerada fora de uma requisição (fila de jobs,
+CLI, ZIP por oferta).
+
+Cada função devolve um ExportSpec; `response()` responde na requisição
+(streaming + cache em disco) e `write()` grava num arquivo qualquer.
+Nada aqui depende de current_user: o escopo (ofertas, professor) vem
+nos parâmetros, que também formam a chave de cache.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import groupby
+from typing import Callable, Iterable
+
+from sqlalchemy import select, func
+
+from ..extensions import db
+from ..models import Student, Group, GroupStudent, Offering, Campus, User
+from ..utils import exports
+from . import gradebook, export_cache, delta
+
+FORMATS = ("csv", "xlsx")
+TYPED_FORMATS = ("jsonl", "parquet")   # só p/ specs com `columns` (dados do gradebook)
+
+
+@dataclass
+class ExportSpec:
+    name: str                          # prefixo do nome do arquivo
+    key: tuple                         # parâmetros (cache/jobs); JSON-serializável
+    header_csv: list
+    header_xlsx: list
+    rows: Callable[[], Iterable]       # gera as linhas (consulta só roda ao iterar)
+    xlsx: dict = field(default_factory=dict)  # sheet_title, widths, num_cols
+    columns: list = None               # [(nome, "int"|"float"|"str")] -> jsonl/parquet
+    typed_rows: Callable[[], Iterable] = None
+
+
+def formats(spec: ExportSpec) -> tuple:
+    return FORMATS + TYPED_FORMATS if spec.columns else FORMATS
+
+
+def filename(spec: ExportSpec, fmt: str) -> str:
+    return f"{spec.name}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+
+
+def response(spec: ExportSpec, fmt: str):
+    fname = filename(spec, fmt)
+    if export_cache.enabled():
+        # arquivo gravado direto no cache (ETag/304); as linhas só são lidas se ele não existir
+        return export_cache.send([fmt, *spec.key], fmt, fname, exports.MIMETYPES[fmt],
+                                 lambda f: write(spec, fmt, f))
+    if fmt == "jsonl":
+        return exports.jsonl_response(spec.columns, spec.typed_rows(), fname)
+    if fmt == "parquet":
+        return exports.parquet_response(spec.columns, spec.typed_rows(), fname)
+    if fmt == "xlsx":
+        return exports.xlsx_response(spec.header_xlsx, spec.rows(), fname, **spec.xlsx)
+    return exports.csv_response(spec.header_csv, spec.rows(), fname)
+
+
+def write(spec: ExportSpec, fmt: str, fileobj) -> None:
+    if fmt == "jsonl":
+        exports.write_jsonl(fileobj, spec.columns, spec.typed_rows())
+    elif fmt == "parquet":
+        exports.write_parquet(fileobj, spec.columns, spec.typed_rows())
+    elif fmt == "xlsx":
+        exports.write_xlsx(fileobj, spec.header_xlsx, spec.rows(), **spec.xlsx)
+    else:
+        exports.write_csv(fileobj, spec.header_csv, spec.rows())
+
+
+def pregenerate(spec: ExportSpec, fmt: str) -> str:
+    """Grava `spec` no cache em disco (mesma chave de response()); retorna o caminho."""
+    _, path = export_cache.ensure([fmt, *spec.key], fmt, lambda f: write(spec, fmt, f))
+    os.utime(path)  # já existia (dados parados): renova p/ o _prune não apagar
+    return path
+
+
+# ------------------------------------------------------------------------------
+# Exportações
+# ------------------------------------------------------------------------------
+def _since_key(since):
+    return since.isoformat() if since is not None else None
+
+
+def gradebook_report(off_ids=None, since=None) -> ExportSpec:
+    """
+    Aluno -> grupo -> notas; off_ids=None = todas as ofertas.
+    since: só as linhas que mudaram desde então (apagados: ver delta.changes()).
+    """
+    off_ids = None if off_ids is None else sorted(off_ids)
+    return ExportSpec(
+        name="relatorio" if since is None else "relatorio_delta",
+        key=("report", "all" if off_ids is None else off_ids, _since_key(since)),
+        header_csv=gradebook.EXPORT_HEADERS_CSV,
+        header_xlsx=gradebook.EXPORT_HEADERS_XLSX,
+        rows=lambda: (gradebook.export_row(r) for r in gradebook.iter_rows(off_ids, since)),
+        columns=gradebook.TYPED_COLUMNS,
+        typed_rows=lambda: (gradebook.typed_row(r) for r in gradebook.iter_rows(off_ids, since)),
+        xlsx={"sheet_title": "Relatório", "num_cols": gradebook.EXPORT_NUM_COLS},
+    )
+
+
+def offering_grades(offering_id: int, code: str) -> ExportSpec:
+    """Planilha de notas de uma oferta (a mesma que o grade_import aceita de volta)."""
+    return ExportSpec(
+        name=f"notas_oferta_{code}",
+        key=("offering", offering_id),
+        header_csv=gradebook.EXPORT_HEADERS_CSV,
+        header_xlsx=gradebook.EXPORT_HEADERS_XLSX,
+        rows=lambda: (gradebook.export_row(r) for r in gradebook.iter_rows([offering_id])),
+        columns=gradebook.TYPED_COLUMNS,
+        typed_rows=lambda: (gradebook.typed_row(r) for r in gradebook.iter_rows([offering_id])),
+        xlsx={"sheet_title": "Notas", "num_cols": gradebook.EXPORT_NUM_COLS},
+    )
+
+
+def groups(only_prof=None, max_members=None, since=None) -> ExportSpec:
+    """
+    Grupos em colunas achatadas: # Grupo, Título, Orientador, nome_1, rgm_1, ...
+    only_prof: só grupos orientados por este usuário.
+    max_members: nº de pares nome/rgm (None = maior grupo, piso 3).
+    since: só grupos alterados ou com membros entrando/saindo desde então.
+    """
+    if not max_members or max_members <= 0:
+        sizes = (
+            select(func.count(GroupStudent.student_id).label("n"))
+            .select_from(Group)
+            .join(GroupStudent, GroupStudent.group_id == Group.id)
+            .group_by(Group.id)
+        )
+        if only_prof is not None:
+            sizes = sizes.where(Group.orientador_user_id == only_prof)
+        biggest = db.session.execute(select(func.max(sizes.subquery().c.n))).scalar()
+        max_members = max(biggest or 0, 3)
+
+    header = ["# Grupo", "Título do trabalho", "Orientador"]
+    for i in range(1, max_members + 1):
+        header += [f"nome_{i}", f"rgm_{i}"]
+
+    # grupo x membro numa consulta ordenada, lida em streaming
+    stmt = (
+        select(Group.id, Group.title, User.full_name, Student.name, Student.rgm)
+        .select_from(Group)
+        .outerjoin(User, User.id == Group.orientador_user_id)
+        .outerjoin(GroupStudent, GroupStudent.group_id == Group.id)
+        .outerjoin(Student, Student.id == GroupStudent.student_id)
+        .order_by(Group.id.asc(), func.upper(Student.name).asc())
+    )
+    if only_prof is not None:
+        stmt = stmt.where(Group.orientador_user_id == only_prof)
+    if since is not None:
+        stmt = stmt.where(Group.id.in_(delta.changed_group_ids(since)))
+
+    def rows():
+        for gid, members in groupby(exports.stream_rows(stmt), key=lambda r: r[0]):
+            members = list(members)
+            _, title, orient, _, _ = members[0]
+            # corta/ completa
+            pairs = [(n or "", r or "") for (_, _, _, n, r) in members if r is not None]
+            pairs = pairs[:max_members]
+            while len(pairs) < max_members:
+                pairs.append(("", ""))
+            flat = []
+            for n, r in pairs:
+                flat += [n, r]
+            yield [gid, (title or "-"), (orient or "-"), *flat]
+
+    return ExportSpec(
+        name="grupos" if since is None else "grupos_delta",
+        key=("groups", only_prof, max_members, _since_key(since)),
+        header_csv=header,
+        header_xlsx=header,
+        rows=rows,
+        xlsx={"sheet_title": "Grupos"},
+    )
+
+
+def without_group(off_ids=None, since=None) -> ExportSpec:
+    """
+    Alunos sem grupo; off_ids=None = todas as ofertas.
+    since: só os alterados ou que saíram de um grupo desde então.
+    """
+    off_ids = None if off_ids is None else sorted(off_ids)
+    stmt = (
+        select(Student.name, Student.rgm, Offering.code, Campus.name)
+        .select_from(Student)
+        .outerjoin(Offering, Offering.id == Student.offering_id)
+        .outerjoin(Campus, Campus.id == Student.campus_id)
+        .outerjoin(GroupStudent, GroupStudent.student_id == Student.id)
+        .where(GroupStudent.student_id.is_(None))
+        .order_by(Student.name.asc())
+    )
+    if off_ids is not None:
+        # professor sem ofertas -> resultado vazio
+        stmt = stmt.where(Student.offering_id.in_(off_ids))
+    if since is not None:
+        stmt = stmt.where(Student.id.in_(delta.changed_student_ids(since)))
+
+    def rows():
+        for name, rgm, off_code, campus in exports.stream_rows(stmt):
+            yield [name or "-", rgm or "-", off_code or "-", campus or "-"]
+
+    header = ["Nome", "RGM", "Oferta", "Campus"]
+    return ExportSpec(
+        name="alunos_sem_grupo" if since is None else "alunos_sem_grupo_delta",
+        key=("sem_grupo", "all" if off_ids is None else off_ids, _since_key(since)),
+        header_csv=header,
+        header_xlsx=header,
+        rows=rows,
+        xlsx={"sheet_title": "Sem Grupo", "widths": [28, 16, 16, 28]},
+    )
+
+
+# nome -> construtor (jobs e CLI recebem o nome + parâmetros JSON)
+BUILDERS = {
+    "report": gradebook_report,
+    "groups": groups,
+    "sem_grupo": without_group,
+}
+
+# exportações do admin (escopo completo) que o cron deixa prontas
+STANDARD = ("report", "groups", "sem_grupo")
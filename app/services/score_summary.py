@@ -0,0 +1,140 @@
+# app/services/score_summary.py
+"""
+Manutenção de group_score_summary (uma linha por grupo: ri, rii, paper,
+banner_sum, banner_count, final).
+
+Quem grava notas chama estas funções ANTES do commit, na mesma transação:
+
+  - grades.upsert_scores  -> refresh(grupos afetados)
+  - guests.poster_submit  -> add_banner(grupo, nota)   (incremento)
+  - admin.groups_delete   -> delete(grupo)
+
+`flask rebuild-summaries` recalcula tudo a partir das tabelas de origem
+(refresh sem filtro). Nota final = RI + RII + Paper + média do banner.
+"""
+from sqlalchemy import select, func, case, literal, true
+
+from ..extensions import db
+from ..models import Group, GroupAssessment, BannerEvaluation, GroupScoreSummary, Instrument
+
+T = GroupScoreSummary.__table__
+
+
+def final_expr(ri, rii, paper, banner_sum, banner_count):
+    # "* 1.0" evita divisão inteira no SQLite (NUMERIC sem casas vira INTEGER)
+    banner = case((banner_count > 0, banner_sum * 1.0 / banner_count), else_=0)
+    return func.round(
+        func.coalesce(ri, 0) + func.coalesce(rii, 0) + func.coalesce(paper, 0) + banner, 2
+    )
+
+
+def _source_select(group_ids=None):
+    """SELECT agregado das tabelas de origem, já no formato de group_score_summary."""
+    def pick(inst):
+        return func.max(case((GroupAssessment.instrument == inst, GroupAssessment.score), else_=None))
+
+    sc = select(
+        GroupAssessment.group_id.label("group_id"),
+        pick(Instrument.RELATORIO_I).label("ri"),
+        pick(Instrument.RELATORIO_II).label("rii"),
+        pick(Instrument.PAPER).label("paper"),
+    ).group_by(GroupAssessment.group_id)
+    bn = select(
+        BannerEvaluation.group_id.label("group_id"),
+        func.sum(BannerEvaluation.score).label("s"),
+        func.count(BannerEvaluation.id).label("n"),
+    ).group_by(BannerEvaluation.group_id)
+    groups = select(Group.id)
+    if group_ids is not None:
+        sc = sc.where(GroupAssessment.group_id.in_(group_ids))
+        bn = bn.where(BannerEvaluation.group_id.in_(group_ids))
+        groups = groups.where(Group.id.in_(group_ids))
+    sc, bn, g = sc.subquery("sc"), bn.subquery("bn"), groups.subquery("g")
+
+    b_sum = func.coalesce(bn.c.s, literal(0))
+    b_cnt = func.coalesce(bn.c.n, literal(0))
+    return (
+        select(g.c.id, sc.c.ri, sc.c.rii, sc.c.paper, b_sum, b_cnt,
+               final_expr(sc.c.ri, sc.c.rii, sc.c.paper, b_sum, b_cnt))
+        .select_from(g)
+        .outerjoin(sc, sc.c.group_id == g.c.id)
+        .outerjoin(bn, bn.c.group_id == g.c.id)
+    )
+
+
+_COLUMNS = ["group_id", "ri", "rii", "paper", "banner_sum", "banner_count", "final"]
+
+
+def _upsert_from(source, dialect_name):
+    """
+    INSERT ... SELECT que sobrescreve a linha existente (mesmos dialetos do
+    grades._upsert_stmt). None nos demais bancos.
+    """
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(T).from_select(_COLUMNS, source)
+        return stmt.on_duplicate_key_update({**{c: stmt.inserted[c] for c in _COLUMNS[1:]},
+                                             "updated_at": func.now()})
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        # "WHERE true": no SQLite, ON CONFLICT depois de um SELECT com JOIN é ambíguo sem WHERE
+        stmt = insert(T).from_select(_COLUMNS, source.where(true()))
+        return stmt.on_conflict_do_update(index_elements=[T.c.group_id],
+                                          set_={**{c: stmt.excluded[c] for c in _COLUMNS[1:]},
+                                                "updated_at": func.now()})
+    return None
+
+
+def refresh(group_ids=None) -> None:
+    """
+    Recalcula o resumo dos grupos dados (None = todos) com um upsert
+    INSERT ... SELECT: dois avaliadores salvando o 1º banner do mesmo grupo
+    ao mesmo tempo não colidem na PK. Sem filtro, também apaga linhas de
+    grupos que não existem mais. Não faz commit.
+    """
+    if group_ids is not None:
+        group_ids = sorted(set(group_ids))
+        if not group_ids:
+            return
+    db.session.flush()  # notas/avaliações pendentes na sessão entram no cálculo
+    source = _source_select(group_ids)
+    stmt = _upsert_from(source, db.session.get_bind().dialect.name)
+    if stmt is None:
+        # outros bancos: DELETE + INSERT ... SELECT
+        delete = T.delete()
+        if group_ids is not None:
+            delete = delete.where(T.c.group_id.in_(group_ids))
+        db.session.execute(delete)
+        db.session.execute(T.insert().from_select(_COLUMNS, source))
+        return
+    if group_ids is None:
+        db.session.execute(T.delete().where(T.c.group_id.not_in(select(Group.id))))
+    db.session.execute(stmt)
+
+
+def add_banner(group_id: int, score) -> None:
+    """Soma uma avaliação de banner ao resumo (UPDATE incremental). Não faz commit."""
+    new_sum = T.c.banner_sum + score
+    new_cnt = T.c.banner_count + 1
+    # MySQL avalia o SET da esquerda p/ a direita: `final` vem antes e
+    # enxerga os valores antigos, como nos demais bancos.
+    res = db.session.execute(
+        T.update()
+        .where(T.c.group_id == group_id)
+        .ordered_values(
+            (T.c.final, final_expr(T.c.ri, T.c.rii, T.c.paper, new_sum, new_cnt)),
+            (T.c.banner_sum, new_sum),
+            (T.c.banner_count, new_cnt),
+        )
+    )
+    if res.rowcount == 0:
+        refresh([group_id])  # grupo ainda sem resumo: calcula da origem (upsert)
+
+
+def delete(group_ids) -> None:
+    group_ids = list(group_ids)
+    if group_ids:
+        db.session.execute(T.delete().where(T.c.group_id.in_(group_ids)))
@@ -0,0 +1,158 @@
+# app/services/search_index.py
+"""
+Chave de busca normalizada + índice de tokens (alunos, grupos, usuários).
+
+`ilike('%q%')` com curinga no início nunca usa índice. Em vez disso:
+
+  - coluna `search_key` (minúsculas, sem acento, espaços colapsados) com
+    índice B-tree -> busca por prefixo: search_key LIKE 'joao da%'
+  - tabela `search_tokens(kind, token, ref_id)` com uma linha por palavra
+    -> "silva" encontra "João da Silva": token LIKE 'silva%'
+
+As duas são mantidas por eventos do mapper (insert/update/delete via ORM).
+Inserções em lote via Core (importações) devem chamar reindex() depois.
+"""
+import re
+import unicodedata
+
+from sqlalchemy import event, inspect, select, and_, or_
+
+from ..extensions import db
+from ..models import Student, Group, User, SearchToken
+
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+TOKEN_MAX = 60
+KEY_MAX = 200
+
+# kind -> (Model, atributo fonte)
+SOURCES = {
+    "student": (Student, "name"),
+    "group": (Group, "title"),
+    "user": (User, "full_name"),
+}
+
+
+def normalize(text) -> str:
+    """'  João  da SILVA ' -> 'joao da silva'"""
+    if not text:
+        return ""
+    s = unicodedata.normalize("NFKD", str(text))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return _WS_RE.sub(" ", s.lower()).strip()[:KEY_MAX]
+
+
+def tokenize(text) -> list[str]:
+    return sorted({t[:TOKEN_MAX] for t in _TOKEN_RE.findall(normalize(text))})
+
+
+def _like_prefix(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def match(kind: str, id_col, key_col, q: str, extra=()):
+    """
+    Condição indexada para a busca `q`:
+      prefixo de search_key  OU  todas as palavras casam prefixo de algum token
+      OU  qualquer condição extra (ex.: prefixo de RGM/e-mail)
+    """
+    nq = normalize(q)
+    conds = list(extra)
+    if nq:
+        conds.append(key_col.like(_like_prefix(nq), escape="\\"))
+        words = _TOKEN_RE.findall(nq)
+        if words:
+            conds.append(and_(*[
+                id_col.in_(
+                    select(SearchToken.ref_id).where(
+                        SearchToken.kind == kind,
+                        SearchToken.token.like(_like_prefix(w[:TOKEN_MAX]), escape="\\"),
+                    )
+                )
+                for w in words
+            ]))
+    return or_(*conds) if conds else None
+
+
+def prefix(col, q: str):
+    """col LIKE 'q%' (escapado) — usa o índice da coluna."""
+    return col.like(_like_prefix((q or "").strip()), escape="\\")
+
+
+# ------------------------------------------------------------------------------
+# Manutenção
+# ------------------------------------------------------------------------------
+def _token_rows(kind, ref_id, text):
+    return [{"kind": kind, "ref_id": ref_id, "token": t} for t in tokenize(text)]
+
+
+def _write_tokens(connection, kind, pairs):
+    """pairs: [(id, texto)] -> regrava os tokens desses ids."""
+    pairs = list(pairs)
+    if not pairs:
+        return
+    t = SearchToken.__table__
+    ids = [i for i, _ in pairs]
+    for i in range(0, len(ids), 1000):
+        connection.execute(t.delete().where(t.c.kind == kind, t.c.ref_id.in_(ids[i:i + 1000])))
+    rows = [r for ref_id, text in pairs for r in _token_rows(kind, ref_id, text)]
+    if rows:
+        connection.execute(t.insert(), rows)
+
+
+def reindex(kind: str, ids=None, chunk: int = 1000) -> int:
+    """
+    Recalcula search_key + tokens (todos, ou só `ids`) em lotes. Não faz commit.
+    Retorna o nº de linhas processadas.
+    """
+    model, attr = SOURCES[kind]
+    src = getattr(model, attr)
+    conn = db.session.connection()
+    done, last_id = 0, None
+    id_filter = None if ids is None else set(ids)
+    while True:
+        q = select(model.id, src).order_by(model.id).limit(chunk)
+        if last_id is not None:
+            q = q.where(model.id > last_id)
+        if id_filter is not None:
+            q = q.where(model.id.in_(id_filter))
+        rows = conn.execute(q).all()
+        if not rows:
+            break
+        conn.execute(
+            model.__table__.update().where(model.__table__.c.id == db.bindparam("_id")),
+            [{"_id": i, "search_key": normalize(text)} for i, text in rows],
+        )
+        _write_tokens(conn, kind, rows)
+        done += len(rows)
+        last_id = rows[-1][0]
+    return done
+
+
+def _register(kind, model, attr):
+    @event.listens_for(model, "before_insert")
+    def _before_insert(mapper, connection, target):
+        target.search_key = normalize(getattr(target, attr))
+
+    @event.listens_for(model, "before_update")
+    def _before_update(mapper, connection, target):
+        if inspect(target).attrs[attr].history.has_changes():
+            target.search_key = normalize(getattr(target, attr))
+
+    @event.listens_for(model, "after_insert")
+    def _after_insert(mapper, connection, target):
+        _write_tokens(connection, kind, [(target.id, getattr(target, attr))])
+
+    @event.listens_for(model, "after_update")
+    def _after_update(mapper, connection, target):
+        if inspect(target).attrs[attr].history.has_changes():
+            _write_tokens(connection, kind, [(target.id, getattr(target, attr))])
+
+    @event.listens_for(model, "after_delete")
+    def _after_delete(mapper, connection, target):
+        t = SearchToken.__table__
+        connection.execute(t.delete().where(t.c.kind == kind, t.c.ref_id == target.id))
+
+
+for _kind, (_model, _attr) in SOURCES.items():
+    _register(_kind, _model, _attr)
@@ -0,0 +1,189 @@
+# app/services/student_import.py
+"""
+Importação em lote da lista de alunos (roster) via CSV ou XLSX.
+
+Colunas aceitas (cabeçalho, sem diferenciar maiúsculas):
+  rgm | ra | matricula
+  nome | name | aluno
+  campus
+  oferta | offering | codigo | turma     (código da oferta, ex.: 2025.1)
+
+O arquivo é lido em streaming (utils/spreadsheet: csv / openpyxl read_only) e
+guardado só como tuplas. Depois:
+
+  campi    -> reference_cache (nenhuma consulta); campus desconhecido = erro
+  ofertas  -> 1 SELECT ... IN (códigos); as que faltam entram num INSERT só
+              (mesmo comportamento do cadastro manual, que cria a oferta)
+  alunos   -> lotes de BATCH_SIZE: 1 SELECT ... WHERE rgm IN (lote),
+              1 INSERT multi-linha p/ novos e 1 UPDATE executemany p/ alterados
+
+Tudo numa transação; o relatório traz criados / atualizados / inalterados.
+"""
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import Student, Offering
+from ..utils import spreadsheet
+from . import reference_cache, search_index
+
+BATCH_SIZE = 500
+
+_HEADER_ALIASES = {
+    "rgm": "rgm", "ra": "rgm", "matricula": "rgm", "matrícula": "rgm",
+    "nome": "name", "name": "name", "aluno": "name",
+    "campus": "campus",
+    "oferta": "offering", "offering": "offering", "codigo": "offering",
+    "código": "offering", "turma": "offering",
+}
+
+
+@dataclass
+class RosterReport:
+    created: list = field(default_factory=list)          # [(rgm, nome)]
+    updated: list = field(default_factory=list)          # [(rgm, nome, ["campo: antes -> depois", ...])]
+    unchanged: list = field(default_factory=list)        # [rgm]
+    new_offerings: list = field(default_factory=list)    # [código]
+    duplicates_file: list = field(default_factory=list)  # RGMs repetidos no arquivo
+    errors: list = field(default_factory=list)           # [(linha, mensagem)]
+
+
+# ------------------------------------------------------------------------------
+# Leitura em streaming
+# ------------------------------------------------------------------------------
+def iter_rows(stream, filename: str = ""):
+    """Gera (linha, {rgm, name, campus, offering}) a partir de um arquivo binário."""
+    rows = spreadsheet.iter_table(stream, filename)
+    header = None
+    for lineno, raw in enumerate(rows, start=1):
+        if header is None:
+            header = [_HEADER_ALIASES.get((h or "").strip().lower()) for h in raw]
+            continue
+        rec = {}
+        for key, v in zip(header, raw):
+            if key:
+                rec[key] = " ".join((v or "").split())
+        if any(rec.values()):
+            yield lineno, rec
+
+
+# ------------------------------------------------------------------------------
+# Importação
+# ------------------------------------------------------------------------------
+def parse(stream, filename: str = "", report: RosterReport | None = None):
+    """Valida as linhas e devolve [(linha, rgm, nome, campus_id, código_oferta)]."""
+    report = report or RosterReport()
+    campus_by_key = {search_index.normalize(c.name): c.id for c in reference_cache.campuses()}
+    rows, seen = [], set()
+    for lineno, rec in iter_rows(stream, filename):
+        rgm, name = rec.get("rgm", ""), rec.get("name", "")
+        campus, code = rec.get("campus", ""), rec.get("offering", "")
+        if not rgm:
+            report.errors.append((lineno, "RGM ausente"))
+            continue
+        if not name:
+            report.errors.append((lineno, f"{rgm}: nome ausente"))
+            continue
+        if len(rgm) > 30 or len(code) > 50:
+            report.errors.append((lineno, f"{rgm}: RGM ou código de oferta longo demais"))
+            continue
+        campus_id = campus_by_key.get(search_index.normalize(campus))
+        if campus_id is None:
+            report.errors.append((lineno, f"{rgm}: campus desconhecido '{campus}'"))
+            continue
+        if not code:
+            report.errors.append((lineno, f"{rgm}: oferta ausente"))
+            continue
+        if rgm in seen:
+            report.duplicates_file.append(rgm)
+            continue
+        seen.add(rgm)
+        rows.append((lineno, rgm, name[:150], campus_id, code))
+    return rows, report
+
+
+def _resolve_offerings(codes, report, dry_run):
+    """código -> id com 1 SELECT; cria as faltantes num INSERT só."""
+    codes = sorted(set(codes))
+    ids = {}
+    for i in range(0, len(codes), 1000):
+        chunk = codes[i:i + 1000]
+        ids.update(db.session.query(Offering.code, Offering.id).filter(Offering.code.in_(chunk)).all())
+    missing = [c for c in codes if c not in ids]
+    report.new_offerings = missing
+    if missing and not dry_run:
+        db.session.execute(Offering.__table__.insert(), [{"code": c, "description": None} for c in missing])
+        for i in range(0, len(missing), 1000):
+            chunk = missing[i:i + 1000]
+            ids.update(db.session.query(Offering.code, Offering.id).filter(Offering.code.in_(chunk)).all())
+    return ids
+
+
+def import_roster(stream, filename: str = "", dry_run: bool = False,
+                  batch_size: int = BATCH_SIZE) -> RosterReport:
+    rows, report = parse(stream, filename)
+    if not rows:
+        return report
+
+    off_ids = _resolve_offerings([r[4] for r in rows], report, dry_run)
+    campus_names = {c.id: c.name for c in reference_cache.campuses()}
+    t = Student.__table__
+    touched = []  # ids (novos ou renomeados) para reindexar tokens de busca
+
+    try:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            current = {
+                r.rgm: r for r in db.session.query(
+                    Student.id, Student.rgm, Student.name, Student.campus_id, Student.offering_id,
+                ).filter(Student.rgm.in_([b[1] for b in batch]))
+            }
+            inserts, updates = [], []
+            for _, rgm, name, campus_id, code in batch:
+                off_id = off_ids.get(code)
+                cur = current.get(rgm)
+                if cur is None:
+                    report.created.append((rgm, name))
+                    inserts.append({"rgm": rgm, "name": name, "campus_id": campus_id,
+                                    "offering_id": off_id, "search_key": search_index.normalize(name)})
+                    continue
+                changes = []
+                if cur.name != name:
+                    changes.append(f"nome: {cur.name} -> {name}")
+                if cur.campus_id != campus_id:
+                    changes.append(f"campus: {campus_names.get(cur.campus_id, cur.campus_id)} -> {campus_names[campus_id]}")
+                if cur.offering_id != off_id:
+                    changes.append(f"oferta: -> {code}")
+                if not changes:
+                    report.unchanged.append(rgm)
+                    continue
+                report.updated.append((rgm, name, changes))
+                updates.append({"_id": cur.id, "name": name, "campus_id": campus_id,
+                                "offering_id": off_id, "search_key": search_index.normalize(name)})
+                if cur.name != name:
+                    touched.append(cur.id)
+
+            if dry_run:
+                continue
+            if inserts:
+                db.session.execute(t.insert(), inserts)
+                touched.extend(sid for (sid,) in db.session.query(Student.id)
+                               .filter(Student.rgm.in_([r["rgm"] for r in inserts])))
+            if updates:
+                db.session.execute(t.update().where(t.c.id == bindparam("_id")), updates)
+
+        if dry_run:
+            db.session.rollback()
+            return report
+        # INSERT/UPDATE via Core não disparam os eventos do search_index
+        if touched:
+            search_index.reindex("student", touched)
+        db.session.commit()
+    except IntegrityError:
+        # alguém cadastrou um desses RGMs/códigos entre a leitura e a gravação
+        db.session.rollback()
+        report.errors.append((0, "conflito de RGM/oferta durante a gravação; nada foi importado — rode novamente"))
+        report.created, report.updated, report.unchanged = [], [], []
+    return report
@@ -0,0 +1,163 @@
+# app/services/user_import.py
+"""
+Importação em lote de usuários (avaliadores/convidados/professores) via CSV.
+
+Colunas aceitas (cabeçalho, sem diferenciar maiúsculas):
+  email | e-mail
+  nome  | full_name | name
+  perfil | role          (admin | professor | guest/convidado; padrão: --default-role)
+  senha | password       (opcional; se vazio gera uma senha aleatória)
+
+Fluxo: lê tudo -> valida -> 1 SELECT para e-mails já existentes ->
+hash -> 1 INSERT multi-linha -> 1 commit.
+
+O hash bcrypt é o custo dominante (centenas de ms cada). A CLI usa
+passwords.hash_many (um processo por core); o upload pela web aceita no
+máximo USERS_IMPORT_WEB_MAX_ROWS usuários novos e faz o hash no pool
+"import" (passwords.hash_batch), separado do pool do login.
+"""
+import csv
+import io
+import secrets
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import User
+from . import passwords as password_service
+from . import search_index
+
+_HEADER_ALIASES = {
+    "email": "email", "e-mail": "email",
+    "nome": "full_name", "full_name": "full_name", "name": "full_name",
+    "perfil": "role", "role": "role",
+    "senha": "password", "password": "password",
+}
+
+_ROLE_ALIASES = {
+    "admin": "admin",
+    "professor": "professor", "orientador": "professor",
+    "guest": "guest", "convidado": "guest", "avaliador": "guest",
+}
+
+
+@dataclass
+class ImportReport:
+    created: list = field(default_factory=list)          # [(email, full_name, role, senha_gerada|None)]
+    duplicates_db: list = field(default_factory=list)    # e-mails que já existem em users
+    duplicates_file: list = field(default_factory=list)  # e-mails repetidos no próprio arquivo
+    errors: list = field(default_factory=list)           # [(linha, mensagem)]
+
+
+def decode_upload(raw: bytes) -> str:
+    """Decodifica o arquivo tentando utf-8 (com/sem BOM) e depois cp1252/latin-1."""
+    for enc in ("utf-8-sig", "cp1252", "latin-1"):
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def _reader(text: str) -> csv.DictReader:
+    sample = text[:8192]
+    counts = {",": sample.count(","), ";": sample.count(";"), "\t": sample.count("\t")}
+    delimiter = max(counts, key=counts.get) or ","
+    return csv.DictReader(io.StringIO(text, newline=""), delimiter=delimiter)
+
+
+def parse_rows(text: str, default_role: str = "guest", report: ImportReport | None = None):
+    """Valida o CSV e devolve [(linha, email, full_name, role, senha|None)]."""
+    report = report or ImportReport()
+    rows, seen = [], set()
+    reader = _reader(text)
+    for lineno, raw in enumerate(reader, start=2):
+        rec = {}
+        for k, v in raw.items():
+            key = _HEADER_ALIASES.get((k or "").strip().lower())
+            if key:
+                rec[key] = (v or "").strip()
+
+        email = rec.get("email", "").lower()
+        name = " ".join(rec.get("full_name", "").split())
+        role = _ROLE_ALIASES.get(rec.get("role", "").lower() or default_role)
+        pwd = rec.get("password") or None
+
+        if not email or "@" not in email:
+            report.errors.append((lineno, "e-mail ausente ou inválido"))
+            continue
+        if not name:
+            report.errors.append((lineno, f"{email}: nome ausente"))
+            continue
+        if role is None:
+            report.errors.append((lineno, f"{email}: perfil inválido '{rec.get('role')}'"))
+            continue
+        if pwd is not None and len(pwd) < 6:
+            report.errors.append((lineno, f"{email}: senha com menos de 6 caracteres"))
+            continue
+        if email in seen:
+            report.duplicates_file.append(email)
+            continue
+        seen.add(email)
+        rows.append((lineno, email, name[:150], role, pwd))
+    return rows, report
+
+
+def import_users(text: str, default_role: str = "guest", dry_run: bool = False,
+                 workers: int | None = None, max_rows: int | None = None,
+                 hasher=None) -> ImportReport:
+    """
+    max_rows: limite de usuários novos (acima dele nada é gravado; dry_run não tem limite).
+    hasher: list[senha] -> list[hash]; padrão passwords.hash_many(workers=workers).
+    """
+    rows, report = parse_rows(text, default_role)
+    if not rows:
+        return report
+
+    # duplicados contra o índice único users.email (1 consulta por lote de 500)
+    emails = [r[1] for r in rows]
+    existing = set()
+    for i in range(0, len(emails), 500):
+        chunk = emails[i:i + 500]
+        existing.update(e.lower() for (e,) in db.session.query(User.email).filter(User.email.in_(chunk)))
+    report.duplicates_db = [e for e in emails if e in existing]
+    rows = [r for r in rows if r[1] not in existing]
+    if not rows or dry_run:
+        report.created = [(email, name, role, None) for _, email, name, role, _ in rows]
+        return report
+
+    if max_rows is not None and len(rows) > max_rows:
+        report.errors.append((0, f"{len(rows)} usuário(s) novo(s); pela web o limite é {max_rows} por arquivo. "
+                                 f"Divida o arquivo ou use `flask import-users`."))
+        return report
+
+    plain = [pwd or secrets.token_urlsafe(9) for *_, pwd in rows]
+    try:
+        hashes = (hasher or (lambda pw: password_service.hash_many(pw, workers=workers)))(plain)
+    except password_service.PasswordPoolBusy:
+        report.errors.append((0, "servidor ocupado gerando senhas; nada foi importado — tente novamente"))
+        return report
+
+    payload = [
+        {"email": email, "full_name": name, "role": role, "is_active": True, "password_hash": h,
+         "search_key": search_index.normalize(name)}
+        for (_, email, name, role, _), h in zip(rows, hashes)
+    ]
+    try:
+        db.session.execute(User.__table__.insert(), payload)
+        # INSERT via Core não dispara eventos do mapper: indexa os tokens aqui
+        new_ids = [i for (i,) in db.session.query(User.id).filter(User.email.in_([p["email"] for p in payload]))]
+        search_index.reindex("user", new_ids)
+        db.session.commit()
+    except IntegrityError:
+        # alguém criou um desses e-mails entre a checagem e o INSERT
+        db.session.rollback()
+        report.errors.append((0, "conflito de e-mail durante a gravação; nada foi importado — rode novamente"))
+        return report
+
+    report.created = [
+        (email, name, role, (None if pwd else generated))
+        for (_, email, name, role, pwd), generated in zip(rows, plain)
+    ]
+    return report
@@ -0,0 +1,61 @@
+# app/services/write_tracking.py
+"""
+"Houve escrita nestas tabelas?" por eventos da sessão, para caches que se
+invalidam no commit (reference_cache, export_cache).
+
+  - before_flush: objetos novos/apagados/alterados dos modelos vigiados
+    (para alguns modelos, só mudanças em certas colunas contam)
+  - do_orm_execute: INSERT/UPDATE/DELETE via Core pela sessão (upserts,
+    imports em lote, resumo de notas)
+  - after_commit: se houve escrita, chama on_commit()
+  - rollback da transação externa descarta a anotação sem chamar nada
+
+A anotação fica em session.info[key], uma chave por cache.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+def track_writes(key: str, models: tuple, on_commit, attrs: dict | None = None) -> None:
+    """
+    Registra os eventos. attrs = {Modelo: ("coluna", ...)}: objetos alterados
+    desse modelo só contam se uma dessas colunas mudou (ex.: User).
+    """
+    tables = {m.__table__.name for m in models}
+    attrs = attrs or {}
+
+    def touches(obj) -> bool:
+        if not isinstance(obj, models):
+            return False
+        for model, names in attrs.items():
+            if isinstance(obj, model):
+                st = inspect(obj)
+                return any(st.attrs[a].history.has_changes() for a in names)
+        return True
+
+    @event.listens_for(Session, "before_flush")
+    def _before_flush(session, flush_context, instances):
+        if session.info.get(key):
+            return
+        if any(isinstance(o, models) for o in session.new) \
+                or any(isinstance(o, models) for o in session.deleted) \
+                or any(touches(o) for o in session.dirty):
+            session.info[key] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _do_orm_execute(state):
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return
+        table = getattr(state.statement, "table", None)
+        if getattr(table, "name", None) in tables:
+            state.session.info[key] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session):
+        if session.info.pop(key, False):
+            on_commit()
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _after_rollback(session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(key, None)
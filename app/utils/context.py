@@ -1,7 +1,10 @@
 from flask_login import current_user
 from ..models import Role
+from .pagination import page_url
 
 def register_context(app):
+    app.jinja_env.globals["page_url"] = page_url
+
     @app.context_processor
     def inject_auth_flags():
         role = "guest"
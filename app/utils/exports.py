@@ -0,0 +1,210 @@
+# app/utils/exports.py
+"""
+Respostas de exportação em streaming (sem montar o arquivo inteiro em memória).
+
+- stream_rows(): executa um SELECT com cursor do lado do servidor
+  (stream_results -> SSCursor no PyMySQL) e entrega as linhas em lotes
+  de yield_per; memória constante, qualquer que seja o nº de alunos.
+- csv_response(): Response com gerador; o BOM UTF-8 (Excel) sai uma vez,
+  junto do cabeçalho, e os dados vão em blocos de ~CSV_CHUNK bytes.
+- xlsx_response(): openpyxl em modo write-only (linhas vão direto p/ o
+  XML, sem manter células em memória) gravado num SpooledTemporaryFile
+  (memória até EXPORT_SPOOL_MAX_BYTES, depois disco) e enviado com send_file.
+- jsonl_response()/parquet_response(): linhas tipadas (números como número,
+  nulos como null) p/ BI; JSON Lines em streaming como o CSV, Parquet
+  (opcional: pyarrow) gravado em row groups de PARQUET_ROW_GROUP linhas.
+  Colunas = lista de (nome, "int" | "float" | "str").
+"""
+import csv
+import io
+import json
+import tempfile
+
+from flask import Response, current_app, send_file, stream_with_context
+
+from ..extensions import db
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+except Exception:
+    openpyxl = None
+
+# pyarrow é opcional (só p/ fmt=parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIMETYPE = "text/csv; charset=utf-8"
+JSONL_MIMETYPE = "application/x-ndjson"
+PARQUET_MIMETYPE = "application/vnd.apache.parquet"
+MIMETYPES = {"csv": CSV_MIMETYPE, "xlsx": XLSX_MIMETYPE,
+             "jsonl": JSONL_MIMETYPE, "parquet": PARQUET_MIMETYPE}
+
+YIELD_PER = 1000
+PARQUET_ROW_GROUP = 10_000
+CSV_CHUNK = 64 * 1024
+BOM = "\ufeff"
+
+
+def stream_rows(stmt, yield_per: int = YIELD_PER):
+    """Itera as linhas de `stmt` com cursor de servidor, yield_per por vez."""
+    stmt = stmt.execution_options(stream_results=True, yield_per=yield_per)
+    yield from db.session.execute(stmt)
+
+
+def fmt_cell(v):
+    """Notas (float) com 2 casas; demais valores como estão."""
+    return f"{v:.2f}" if isinstance(v, float) else v
+
+
+def _iter_csv(header, rows):
+    buf = io.StringIO(newline="")
+    w = csv.writer(buf)
+    buf.write(BOM)
+    w.writerow(header)
+    yield buf.getvalue()  # primeiro byte sai antes da consulta terminar
+    buf.seek(0)
+    buf.truncate()
+    for row in rows:
+        w.writerow([fmt_cell(v) for v in row])
+        if buf.tell() >= CSV_CHUNK:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def write_csv(fileobj, header, rows):
+    """Grava o CSV (com BOM) num arquivo binário."""
+    for chunk in _iter_csv(header, rows):
+        fileobj.write(chunk.encode("utf-8"))
+
+
+def csv_response(header, rows, filename: str) -> Response:
+    """
+    rows: iterável (de preferência um gerador sobre stream_rows) consumido
+    durante o envio; o contexto da requisição fica ativo até o fim.
+    """
+    resp = Response(stream_with_context(_iter_csv(header, rows)),
+                    mimetype=CSV_MIMETYPE)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def write_xlsx(fileobj, header, rows, sheet_title="Planilha", widths=22,
+               num_cols=(), num_format="0.00"):
+    """
+    Grava uma planilha (write-only) em `fileobj`.
+
+    widths: largura única ou lista por coluna.
+    num_cols: índices (0-based) das colunas numéricas; valores float são
+    arredondados a 2 casas e recebem `num_format`.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    if not isinstance(widths, (list, tuple)):
+        widths = [widths] * len(header)
+    for idx, w in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = w
+
+    bold = Font(bold=True)
+    head = []
+    for h in header:
+        c = WriteOnlyCell(ws, value=h)
+        c.font = bold
+        head.append(c)
+    ws.append(head)
+
+    num_cols = frozenset(num_cols)
+    for row in rows:
+        out = list(row)
+        for i in num_cols:
+            v = out[i] if i < len(out) else None
+            if isinstance(v, (float, int)) and not isinstance(v, bool):
+                c = WriteOnlyCell(ws, value=round(v, 2) if isinstance(v, float) else v)
+                c.number_format = num_format
+                out[i] = c
+        ws.append(out)
+    wb.save(fileobj)
+
+
+def xlsx_response(header, rows, filename: str, **opts):
+    """Planilha em SpooledTemporaryFile + send_file (arquivo fechado ao fim do envio)."""
+    return _spooled_response(lambda f: write_xlsx(f, header, rows, **opts), filename, XLSX_MIMETYPE)
+
+
+def _spooled_response(write, filename: str, mimetype: str):
+    tmp = tempfile.SpooledTemporaryFile(max_size=current_app.config.get("EXPORT_SPOOL_MAX_BYTES",
+                                                                        8 * 1024 * 1024))
+    try:
+        write(tmp)
+        tmp.seek(0)
+    except Exception:
+        tmp.close()
+        raise
+    return send_file(tmp, as_attachment=True, download_name=filename, mimetype=mimetype)
+
+
+# ------------------------------------------------------------------------------
+# Exportações tipadas
+# ------------------------------------------------------------------------------
+def _iter_jsonl(columns, rows):
+    names = [n for n, _ in columns]
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(json.dumps(dict(zip(names, row)), ensure_ascii=False, separators=(",", ":")))
+        buf.write("\n")
+        if buf.tell() >= CSV_CHUNK:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def write_jsonl(fileobj, columns, rows):
+    for chunk in _iter_jsonl(columns, rows):
+        fileobj.write(chunk.encode("utf-8"))
+
+
+def jsonl_response(columns, rows, filename: str) -> Response:
+    """Um objeto JSON por linha, em streaming."""
+    resp = Response(stream_with_context(_iter_jsonl(columns, rows)), mimetype=JSONL_MIMETYPE)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def write_parquet(fileobj, columns, rows, row_group_size: int = PARQUET_ROW_GROUP):
+    """Grava Parquet um row group por vez (só um lote de linhas em memória)."""
+    if pa is None:
+        raise RuntimeError("pyarrow não está instalado")
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    schema = pa.schema([(n, types[t]) for n, t in columns])
+    cols = [[] for _ in columns]
+
+    with pq.ParquetWriter(fileobj, schema, compression="snappy") as writer:
+        def flush():
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+            for c in cols:
+                c.clear()
+
+        for row in rows:
+            for c, v in zip(cols, row):
+                c.append(v)
+            if len(cols[0]) >= row_group_size:
+                flush()
+        if cols[0]:
+            flush()
+
+
+def parquet_response(columns, rows, filename: str):
+    """Parquet em SpooledTemporaryFile (o rodapé só existe no fim)."""
+    return _spooled_response(lambda f: write_parquet(f, columns, rows), filename, PARQUET_MIMETYPE)
@@ -0,0 +1,123 @@
+# app/utils/pagination.py
+"""
+Paginação por keyset (seek) para as listas do admin.
+
+Em vez de OFFSET (que lê e descarta todas as linhas anteriores), a página
+seguinte começa "depois da última chave vista":
+
+    WHERE (name, id) > (:last_name, :last_id) ORDER BY name, id LIMIT :n
+
+Com índice nas colunas de ordenação o custo é o mesmo na página 1 ou 500.
+O cursor é a tupla de chaves da borda da página, serializada em base64
+(só ordenação, não é dado sensível).
+"""
+import json
+import base64
+from dataclasses import dataclass
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+DEFAULT_SIZE = 50
+MAX_SIZE = 200
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    size: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        return values if isinstance(values, list) else None
+    except Exception:
+        return None
+
+
+def _after(columns, values, reverse=False):
+    """(c1, c2, ...) > (v1, v2, ...) expandido em OR/AND (portável MySQL/SQLite)."""
+    conds = []
+    for i, col in enumerate(columns):
+        cmp = col < values[i] if reverse else col > values[i]
+        conds.append(and_(*[columns[j] == values[j] for j in range(i)], cmp))
+    return or_(*conds)
+
+
+def page_args():
+    """Lê ?size=&after=&before= da request."""
+    size = request.args.get("size", type=int) or DEFAULT_SIZE
+    size = max(1, min(size, MAX_SIZE))
+    return size, request.args.get("after"), request.args.get("before")
+
+
+def page_url(**changes) -> str:
+    """URL da página atual trocando só o cursor (mantém q/campus/off/role/size)."""
+    args = request.args.to_dict()
+    args.pop("after", None)
+    args.pop("before", None)
+    args.update({k: v for k, v in changes.items() if v is not None})
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def keyset_paginate(query, columns, key_of, size=None, after=None, before=None) -> KeysetPage:
+    """
+    query   -> Query já filtrada (sem order_by)
+    columns -> colunas de ordenação (ASC), a última deve ser única (ex.: id)
+    key_of  -> função item -> tupla com os valores dessas colunas
+    """
+    if size is None:
+        size, after, before = page_args()
+
+    before_vals = decode_cursor(before)
+    after_vals = decode_cursor(after) if before_vals is None else None
+    if before_vals is not None and len(before_vals) != len(columns):
+        before_vals = None
+    if after_vals is not None and len(after_vals) != len(columns):
+        after_vals = None
+
+    if before_vals is not None:
+        # página anterior: anda para trás e inverte
+        q = query.filter(_after(columns, before_vals, reverse=True)).order_by(*[c.desc() for c in columns])
+        rows = q.limit(size + 1).all()
+        has_more = len(rows) > size
+        rows = list(reversed(rows[:size]))
+        page = KeysetPage(rows, size)
+        if rows:
+            page.next_cursor = encode_cursor(key_of(rows[-1]))
+            if has_more:
+                page.prev_cursor = encode_cursor(key_of(rows[0]))
+        return page
+
+    q = query
+    if after_vals is not None:
+        q = q.filter(_after(columns, after_vals))
+    rows = q.order_by(*[c.asc() for c in columns]).limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+    page = KeysetPage(rows, size)
+    if rows:
+        if has_more:
+            page.next_cursor = encode_cursor(key_of(rows[-1]))
+        if after_vals is not None:
+            page.prev_cursor = encode_cursor(key_of(rows[0]))
+    return page
@@ -0,0 +1,77 @@
+# app/utils/spreadsheet.py
+"""
+Leitura em streaming de planilhas enviadas (CSV ou XLSX) como listas de strings.
+
+- CSV: encoding detectado numa amostra (utf-8 com/sem BOM, cp1252, latin-1)
+  e delimitador , ; ou TAB; lido linha a linha, sem carregar o arquivo.
+- XLSX: openpyxl em modo read_only (linhas sob demanda, memória constante).
+"""
+import codecs
+import csv
+import io
+import os
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+XLSX_EXTS = (".xlsx", ".xlsm")
+SNIFF_BYTES = 8192
+
+
+def _sniff_encoding(sample: bytes, complete: bool = False) -> str:
+    """
+    complete=False: a amostra é um prefixo do arquivo e pode terminar no meio
+    de um caractere UTF-8 (ex.: "ç" = 2 bytes) — o decoder incremental aceita
+    essa sequência incompleta no fim em vez de cair para cp1252.
+    """
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(sample, final=complete)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _iter_csv(stream):
+    sample = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    enc = _sniff_encoding(sample, complete=len(sample) < SNIFF_BYTES)
+    text = io.TextIOWrapper(stream, encoding=enc, errors="replace", newline="")
+    head = sample.decode("latin-1")
+    counts = {",": head.count(","), ";": head.count(";"), "\t": head.count("\t")}
+    reader = csv.reader(text, delimiter=max(counts, key=counts.get) or ",")
+    try:
+        yield from reader
+    finally:
+        text.detach()  # não fecha o stream do chamador
+
+
+def _cell(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _iter_xlsx(stream):
+    if openpyxl is None:
+        raise RuntimeError("Para importar XLSX, instale 'openpyxl' (pip install openpyxl).")
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield [_cell(v) for v in row]
+    finally:
+        wb.close()
+
+
+def iter_table(stream, filename: str = ""):
+    """Gera cada linha (lista de str) de um arquivo binário CSV/XLSX, cabeçalho incluído."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return _iter_xlsx(stream) if ext in XLSX_EXTS else _iter_csv(stream)
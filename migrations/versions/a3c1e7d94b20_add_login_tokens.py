@@ -0,0 +1,39 @@
+"""add login_tokens (links de acesso de uso único)
+
+Revision ID: a3c1e7d94b20
+Revises: 02f54080b574
+Create Date: 2026-10-17 09:12:40.118233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1e7d94b20'
+down_revision = '02f54080b574'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'login_tokens',
+        sa.Column('jti', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by_user_id', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    with op.batch_alter_table('login_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_login_tokens_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('login_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_login_tokens_user_id'))
+    op.drop_table('login_tokens')
@@ -0,0 +1,32 @@
+"""indices para paginação keyset (students.name+id, users.full_name+id)
+
+Revision ID: b7d2f0c18e55
+Revises: a3c1e7d94b20
+Create Date: 2026-10-17 10:05:12.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f0c18e55'
+down_revision = 'a3c1e7d94b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_name_id', ['name', 'id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_full_name_id', ['full_name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_full_name_id')
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_name_id')
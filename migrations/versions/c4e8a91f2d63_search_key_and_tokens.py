@@ -0,0 +1,86 @@
+"""search_key normalizado + search_tokens (busca indexada)
+
+Revision ID: c4e8a91f2d63
+Revises: b7d2f0c18e55
+Create Date: 2026-10-17 11:20:48.551307
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a91f2d63'
+down_revision = 'b7d2f0c18e55'
+branch_labels = None
+depends_on = None
+
+CHUNK = 1000
+
+# (kind, tabela, coluna fonte)
+SOURCES = [
+    ("student", "students", "name"),
+    ("group", "tgi_groups", "title"),
+    ("user", "users", "full_name"),
+]
+
+
+# cópia congelada de app/services/search_index.normalize/tokenize
+def _normalize(text):
+    if not text:
+        return ""
+    s = unicodedata.normalize("NFKD", str(text))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", s.lower()).strip()[:200]
+
+
+def _tokens(text):
+    return sorted({t[:60] for t in re.findall(r"[0-9a-z]+", _normalize(text))})
+
+
+def upgrade():
+    for _, table, _ in SOURCES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_key', sa.String(length=200), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_search_key'), ['search_key'], unique=False)
+
+    tokens = op.create_table(
+        'search_tokens',
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('token', sa.String(length=60), nullable=False),
+        sa.Column('ref_id', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'token', 'ref_id'),
+    )
+    op.create_index('ix_search_tokens_ref', 'search_tokens', ['kind', 'ref_id'], unique=False)
+
+    # backfill em lotes (keyset por id) para não travar tabelas grandes
+    bind = op.get_bind()
+    for kind, table, col in SOURCES:
+        t = sa.table(table, sa.column('id'), sa.column(col), sa.column('search_key'))
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(t.c.id, t.c[col]).where(t.c.id > last_id).order_by(t.c.id).limit(CHUNK)
+            ).all()
+            if not rows:
+                break
+            bind.execute(
+                t.update().where(t.c.id == sa.bindparam('_id')).values(search_key=sa.bindparam('_key')),
+                [{'_id': i, '_key': _normalize(v)} for i, v in rows],
+            )
+            tok_rows = [{'kind': kind, 'token': tok, 'ref_id': i} for i, v in rows for tok in _tokens(v)]
+            if tok_rows:
+                bind.execute(tokens.insert(), tok_rows)
+            last_id = rows[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_search_tokens_ref', table_name='search_tokens')
+    op.drop_table('search_tokens')
+    for _, table, _ in reversed(SOURCES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_search_key'))
+            batch_op.drop_column('search_key')
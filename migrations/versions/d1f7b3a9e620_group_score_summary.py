@@ -0,0 +1,57 @@
+"""group_score_summary (resumo de notas por grupo)
+
+Revision ID: d1f7b3a9e620
+Revises: c4e8a91f2d63
+Create Date: 2026-10-17 15:02:11.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f7b3a9e620'
+down_revision = 'c4e8a91f2d63'
+branch_labels = None
+depends_on = None
+
+# cópia congelada de app/services/score_summary.refresh() (sem filtro)
+BACKFILL = """
+INSERT INTO group_score_summary (group_id, ri, rii, paper, banner_sum, banner_count, final)
+SELECT g.id, sc.ri, sc.rii, sc.paper, COALESCE(bn.s, 0), COALESCE(bn.n, 0),
+       ROUND(COALESCE(sc.ri, 0) + COALESCE(sc.rii, 0) + COALESCE(sc.paper, 0)
+             + CASE WHEN COALESCE(bn.n, 0) > 0 THEN bn.s * 1.0 / bn.n ELSE 0 END, 2)
+FROM tgi_groups g
+LEFT JOIN (
+    SELECT group_id,
+           MAX(CASE WHEN instrument = 'RELATORIO_I' THEN score END) AS ri,
+           MAX(CASE WHEN instrument = 'RELATORIO_II' THEN score END) AS rii,
+           MAX(CASE WHEN instrument = 'PAPER' THEN score END) AS paper
+    FROM group_assessments GROUP BY group_id
+) sc ON sc.group_id = g.id
+LEFT JOIN (
+    SELECT group_id, SUM(score) AS s, COUNT(id) AS n
+    FROM banner_evaluations GROUP BY group_id
+) bn ON bn.group_id = g.id
+"""
+
+
+def upgrade():
+    op.create_table(
+        'group_score_summary',
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('ri', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('rii', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('paper', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('banner_sum', sa.Numeric(precision=8, scale=2), server_default='0', nullable=False),
+        sa.Column('banner_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('final', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['tgi_groups.id'], ),
+        sa.PrimaryKeyConstraint('group_id'),
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_table('group_score_summary')
@@ -0,0 +1,72 @@
+"""exportação delta: índices de updated_at/entered_at, group_students.created_at e sync_tombstones
+
+Revision ID: e5a2c8d4b713
+Revises: d1f7b3a9e620
+Create Date: 2026-10-17 18:40:27.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a2c8d4b713'
+down_revision = 'd1f7b3a9e620'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('ref_id', sa.BigInteger(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=True),
+        sa.Column('ref', sa.String(length=60), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_deleted_at', ['deleted_at'], unique=False)
+
+    # vínculos já existentes recebem o instante da migração (entram no 1º delta)
+    with op.batch_alter_table('group_students', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(),
+                                      server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True))
+        batch_op.create_index('ix_group_students_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('tgi_groups', schema=None) as batch_op:
+        batch_op.create_index('ix_tgi_groups_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('group_assessments', schema=None) as batch_op:
+        batch_op.create_index('ix_group_assessments_entered_at', ['entered_at'], unique=False)
+
+    with op.batch_alter_table('banner_evaluations', schema=None) as batch_op:
+        batch_op.create_index('ix_banner_evaluations_entered_at', ['entered_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('banner_evaluations', schema=None) as batch_op:
+        batch_op.drop_index('ix_banner_evaluations_entered_at')
+
+    with op.batch_alter_table('group_assessments', schema=None) as batch_op:
+        batch_op.drop_index('ix_group_assessments_entered_at')
+
+    with op.batch_alter_table('tgi_groups', schema=None) as batch_op:
+        batch_op.drop_index('ix_tgi_groups_updated_at')
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_updated_at')
+
+    with op.batch_alter_table('group_students', schema=None) as batch_op:
+        batch_op.drop_index('ix_group_students_created_at')
+        batch_op.drop_column('created_at')
+
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_deleted_at')
+
+    op.drop_table('sync_tombstones')
@@ -0,0 +1,130 @@
+# scripts/bench_login_pool.py
+"""
+Benchmark: latência (p50/p95) de OUTRAS rotas enquanto N logins rodam juntos.
+
+Sobe o app normalmente (ex.: gunicorn como no Dockerfile) e rode:
+
+    python scripts/bench_login_pool.py --base http://127.0.0.1:8000 \
+        --email convidado@tgi.edu --password 123456 --logins 50
+
+Compare PASSWORD_POOL_WORKERS=0 (hash inline, comportamento antigo) com
+PASSWORD_POOL_WORKERS=1..2. Logins recusados pelo pool (HTTP 503) também
+são contados — são a "resposta rápida" esperada quando a fila enche.
+Desligue o throttling de login (LOGIN_RATE_ENABLED=0) durante o teste,
+senão as 50 tentativas do mesmo IP/e-mail viram 429 antes do hash.
+Só usa a stdlib (urllib), não precisa instalar nada.
+"""
+import argparse
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def _opener():
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+
+def _timed_get(opener, url):
+    t0 = time.perf_counter()
+    try:
+        with opener.open(url, timeout=60) as r:
+            r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - t0, status
+
+
+def _login(base, email, password, results):
+    op = _opener()
+    try:
+        with op.open(f"{base}/login", timeout=60) as r:
+            html = r.read().decode("utf-8", "replace")
+        m = CSRF_RE.search(html)
+        data = {"email": email, "password": password}
+        if m:
+            data["csrf_token"] = m.group(1)
+        body = urllib.parse.urlencode(data).encode()
+        t0 = time.perf_counter()
+        try:
+            with op.open(f"{base}/login", data=body, timeout=60) as r:
+                r.read()
+                status = r.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        results.append((time.perf_counter() - t0, status))
+    except Exception as e:  # conexão recusada/timeout contam como erro
+        results.append((None, repr(e)))
+
+
+def _pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, int(round(p / 100.0 * len(values) + 0.5)) - 1))
+    return values[k]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default="http://127.0.0.1:8000")
+    ap.add_argument("--email", required=True, help="usuário existente (força o hash de verdade)")
+    ap.add_argument("--password", required=True)
+    ap.add_argument("--logins", type=int, default=50, help="logins simultâneos")
+    ap.add_argument("--probe", default="/login", help="rota 'leve' medida durante a rajada")
+    ap.add_argument("--probe-interval", type=float, default=0.05)
+    args = ap.parse_args()
+    base = args.base.rstrip("/")
+
+    # baseline da rota sonda, sem carga
+    op = _opener()
+    idle = [_timed_get(op, base + args.probe)[0] for _ in range(20)]
+
+    login_results = []
+    probe_lat = []
+    stop = threading.Event()
+
+    def probe():
+        po = _opener()
+        while not stop.is_set():
+            dt, _ = _timed_get(po, base + args.probe)
+            probe_lat.append(dt)
+            time.sleep(args.probe_interval)
+
+    pt = threading.Thread(target=probe, daemon=True)
+    pt.start()
+
+    threads = [threading.Thread(target=_login, args=(base, args.email, args.password, login_results))
+               for _ in range(args.logins)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    stop.set()
+    pt.join()
+
+    ok = sum(1 for _, s in login_results if s in (200, 302))
+    busy = sum(1 for _, s in login_results if s == 503)
+    other = len(login_results) - ok - busy
+    lat_ok = [dt for dt, s in login_results if dt is not None]
+
+    print(f"rota sonda: {args.probe}")
+    print(f"  ociosa   p50={statistics.median(idle)*1000:8.1f} ms  p95={_pct(idle, 95)*1000:8.1f} ms")
+    print(f"  sob carga p50={statistics.median(probe_lat)*1000:8.1f} ms  p95={_pct(probe_lat, 95)*1000:8.1f} ms"
+          f"  (n={len(probe_lat)})")
+    print(f"logins: {len(login_results)} em {wall:.2f}s  ok={ok}  503(busy)={busy}  outros={other}")
+    if lat_ok:
+        print(f"  login p50={statistics.median(lat_ok)*1000:8.1f} ms  p95={_pct(lat_ok, 95)*1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
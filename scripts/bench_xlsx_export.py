@@ -0,0 +1,93 @@
+# scripts/bench_xlsx_export.py
+"""
+Benchmark: pico de memória (RSS) ao gerar o XLSX de notas com N linhas.
+
+Compara, cada um num processo novo (o pico de RSS não diminui):
+
+  workbook   openpyxl.Workbook() normal + BytesIO (como era antes)
+  writeonly  utils/exports.write_xlsx (write-only + SpooledTemporaryFile)
+
+    python scripts/bench_xlsx_export.py --rows 20000
+
+As linhas são sintéticas, no layout de gradebook.EXPORT_HEADERS_XLSX, e
+geradas sob demanda (o gerador não conta no pico). Mede só a planilha;
+a leitura do banco já é em streaming (utils/exports.stream_rows).
+Linux/macOS (usa resource.getrusage).
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SPOOL_MAX = 8 * 1024 * 1024
+
+
+def _rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB; macOS: bytes
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _rows(n):
+    for i in range(n):
+        gid = i // 4 + 1
+        yield [gid, f"R{i:07d}", f"Aluno de Teste {i:06d}", "Campus Centro", "2025.1",
+               f"Prof. Orientador {gid % 300}", 0.5, 0.5, 3.25 + (i % 3) / 4, 4.0 + (i % 5) / 5]
+
+
+def _child(mode, n):
+    from app.services.gradebook import EXPORT_HEADERS_XLSX, EXPORT_NUM_COLS
+    from app.utils import exports
+    import openpyxl
+
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    if mode == "workbook":
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(EXPORT_HEADERS_XLSX)
+        for cell in ws[1]:
+            cell.font = openpyxl.styles.Font(bold=True)
+        for r in _rows(n):
+            ws.append([round(v, 2) if isinstance(v, float) else v for v in r])
+        for row in ws.iter_rows(min_row=2, min_col=7, max_col=10):
+            for cell in row:
+                cell.number_format = "0.00"
+        out = io.BytesIO()
+        wb.save(out)
+        size = out.tell()
+    else:
+        out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+        exports.write_xlsx(out, EXPORT_HEADERS_XLSX, _rows(n), sheet_title="Notas",
+                           num_cols=EXPORT_NUM_COLS)
+        size = out.tell()
+        out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"{mode:10s} linhas={n:6d}  pico RSS={_rss_mb():7.1f} MB  "
+          f"(+{_rss_mb() - base:6.1f} MB)  arquivo={size / 1024:8.1f} KB  {elapsed:6.2f} s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--mode", choices=["workbook", "writeonly", "both"], default="both")
+    ap.add_argument("--_child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._child:
+        _child(args.mode, args.rows)
+        return
+    modes = ["workbook", "writeonly"] if args.mode == "both" else [args.mode]
+    for m in modes:
+        subprocess.run([sys.executable, __file__, "--_child", "--mode", m, "--rows", str(args.rows)],
+                       check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import contextlib
+import os
+
+import pytest
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+# app/config.py lê o ambiente na importação; nada de MySQL nos testes
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions import db  # noqa: E402
+
+
+# PK BigInteger com autoincremento só funciona no SQLite como INTEGER
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # create_app() copia Config; o engine é criado ali mesmo (db.init_app)
+    for key, value in {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "WTF_CSRF_ENABLED": False,
+        "PASSWORD_POOL_WORKERS": 0,
+        "LOGIN_RATE_ENABLED": False,
+        "EXPORT_CACHE_ENABLED": False,
+        "EXPORT_CACHE_DIR": str(tmp_path / "export_cache"),
+        "EXPORT_JOBS_DIR": str(tmp_path / "export_jobs"),
+        "EXPORT_ZIP_WORKERS": 0,
+        "IDENTITY_VERSION_PATH": str(tmp_path / "identity.version"),
+    }.items():
+        monkeypatch.setattr(Config, key, value, raising=False)
+
+    app = create_app()
+    app.config.update(TESTING=True, BCRYPT_LOG_ROUNDS=4)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login():
+    def _login(client, email, password="secret1"):
+        r = client.post("/login", data={"email": email, "password": password})
+        assert r.status_code == 302, r.status_code
+    return _login
+
+
+@pytest.fixture
+def count_queries(app):
+    """Uso: `with count_queries() as sql: ...`; sql = statements enviados ao banco no bloco."""
+    @contextlib.contextmanager
+    def _count():
+        sql = []
+
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            sql.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _on_execute)
+        try:
+            yield sql
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _on_execute)
+    return _count
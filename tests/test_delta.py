@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import User, Campus, Offering, Student, Group, GroupStudent
+from app.services import delta
+
+BRT = timedelta(hours=-3)
+
+
+@pytest.mark.parametrize("raw,offset,expected", [
+    ("2026-10-01", BRT, datetime(2026, 10, 1)),
+    ("2026-10-01T03:00:00", BRT, datetime(2026, 10, 1, 3)),              # sem fuso: hora do banco
+    ("2026-10-01T06:00:00Z", BRT, datetime(2026, 10, 1, 3)),             # UTC -> banco em -03:00
+    ("2026-10-01T06:00:00+00:00", timedelta(0), datetime(2026, 10, 1, 6)),
+    ("2026-10-01T03:00:00-03:00", timedelta(0), datetime(2026, 10, 1, 6)),
+])
+def test_parse_since_uses_the_database_time_zone(raw, offset, expected):
+    assert delta.parse_since(raw, offset) == expected
+
+
+def test_parse_since_defaults_to_the_session_offset(app):
+    assert delta.db_utc_offset() == timedelta(0)  # SQLite: CURRENT_TIMESTAMP em UTC
+    assert delta.parse_since("2026-10-01T03:00:00-03:00") == datetime(2026, 10, 1, 6)
+    with pytest.raises(ValueError):
+        delta.parse_since("ontem")
+
+
+@pytest.fixture
+def roster(app):
+    prof = User(email="p@x.com", full_name="Prof", role="professor")
+    prof.set_password("secret1")
+    campus, off = Campus(name="Centro"), Offering(code="2025.1")
+    db.session.add_all([prof, campus, off])
+    db.session.flush()
+    students = [Student(rgm=f"R{n}", name=f"Aluno {n}", campus_id=campus.id, offering_id=off.id)
+                for n in range(3)]
+    g = Group(title="G", orientador_user_id=prof.id)
+    db.session.add_all([*students, g])
+    db.session.flush()
+    db.session.add_all(GroupStudent(group_id=g.id, student_id=s.id) for s in students)
+    db.session.commit()
+    return {"group_id": g.id, "students": [(s.id, s.rgm) for s in students]}
+
+
+def test_orm_and_bulk_deletes_leave_tombstones(roster):
+    since = delta.db_now() - timedelta(seconds=1)
+    (s0, _), (s1, _), (s2, rgm2) = roster["students"]
+
+    # vínculo desfeito pelo ORM, aluno apagado em lote (Query.delete)
+    db.session.delete(GroupStudent.query.filter_by(student_id=s0).one())
+    GroupStudent.query.filter_by(student_id=s2).delete()
+    Student.query.filter_by(id=s2).delete()
+    db.session.commit()
+
+    out = delta.changes(since)
+    deleted = {(d["entity"], d["id"]): d for d in out["deleted"]}
+    assert ("membership", s0) in deleted and ("membership", s2) in deleted
+    assert deleted[("student", s2)]["ref"] == rgm2
+    assert ("student", s1) not in deleted
+
+    # nada depois de `until`
+    assert delta.changes(delta.parse_since(out["until"]) + timedelta(seconds=1))["deleted"] == []
+
+
+def test_changes_endpoint_accepts_an_aware_since(roster, client, login):
+    admin = User(email="a@x.com", full_name="Admin", role="admin")
+    admin.set_password("secret1")
+    db.session.add(admin)
+    db.session.commit()
+    login(client, "a@x.com")
+
+    since = (delta.db_now() - timedelta(hours=1)).isoformat() + "Z"
+    sid = roster["students"][1][0]
+    GroupStudent.query.filter_by(student_id=sid).delete()
+    Student.query.filter_by(id=sid).delete()
+    db.session.commit()
+
+    r = client.get("/reports/api/changes", query_string={"since": since})
+    assert r.status_code == 200
+    assert {(d["entity"], d["id"]) for d in r.get_json()["deleted"]} == {("membership", sid), ("student", sid)}
+    assert client.get("/reports/api/changes?since=xx").status_code == 400
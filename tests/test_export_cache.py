@@ -0,0 +1,20 @@
+from app.extensions import db
+from app.models import Campus, User
+
+
+def test_cached_export_etag_and_invalidation(app, client, login):
+    app.config["EXPORT_CACHE_ENABLED"] = True
+    admin = User(email="a@x.com", full_name="Admin", role="admin")
+    admin.set_password("secret1")
+    db.session.add_all([admin, Campus(name="Centro")])
+    db.session.commit()
+    login(client, "a@x.com")
+
+    r = client.get("/reports/export?fmt=csv")
+    assert r.status_code == 200 and r.headers["Content-Type"].startswith("text/csv")
+    etag = r.headers["ETag"].strip('"')
+    assert client.get("/reports/export?fmt=csv", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+    db.session.add(Campus(name="Norte"))
+    db.session.commit()
+    assert client.get("/reports/export?fmt=csv", headers={"If-None-Match": f'"{etag}"'}).status_code == 200
@@ -0,0 +1,122 @@
+"""
+Nº de statements do gradebook e das exportações: constante, qualquer que
+seja o nº de alunos/grupos (sem N+1). Cada rota é medida com poucos dados,
+os dados crescem ~10x e a medida se repete.
+"""
+import itertools
+
+import pytest
+
+from app.extensions import db
+from app.models import (
+    User, Campus, Offering, Student, Group, GroupStudent, BannerEvaluation, Instrument,
+)
+from app.services import gradebook, grades, score_summary
+
+_seq = itertools.count()
+
+
+@pytest.fixture
+def base(app):
+    """Campus, oferta do professor, admin, professor e 3 avaliadores de banner."""
+    campus = Campus(name="Centro")
+    off = Offering(code="2025.1")
+    db.session.add_all([campus, off])
+    users = {}
+    for email, role in [("a@x.com", "admin"), ("p@x.com", "professor"),
+                        ("g1@x.com", "guest"), ("g2@x.com", "guest"), ("g3@x.com", "guest")]:
+        u = User(email=email, full_name=email.split("@")[0], role=role)
+        u.set_password("secret1")
+        users[email] = u
+    db.session.add_all(users.values())
+    db.session.flush()
+    off.professor_id = users["p@x.com"].id
+    db.session.commit()
+    return {"campus_id": campus.id, "offering_id": off.id, "prof_id": users["p@x.com"].id,
+            "admin_id": users["a@x.com"].id,
+            "evaluators": [users[e].id for e in ("g1@x.com", "g2@x.com", "g3@x.com")]}
+
+
+def grow(base, n_groups, per_group, loose):
+    """n_groups grupos com per_group alunos, notas e banners + `loose` alunos sem grupo."""
+    def student():
+        n = next(_seq)
+        return Student(rgm=f"R{n:05d}", name=f"Aluno {n}",
+                       campus_id=base["campus_id"], offering_id=base["offering_id"])
+
+    scores, group_ids = [], []
+    for _ in range(n_groups):
+        g = Group(title=f"Grupo {next(_seq)}", orientador_user_id=base["prof_id"])
+        members = [student() for _ in range(per_group)]
+        db.session.add(g)
+        db.session.add_all(members)
+        db.session.flush()
+        db.session.add_all(GroupStudent(group_id=g.id, student_id=s.id) for s in members)
+        db.session.add_all(BannerEvaluation(group_id=g.id, evaluator_user_id=u, score=4)
+                           for u in base["evaluators"][:2])
+        scores += [(g.id, Instrument.RELATORIO_I, 1.5), (g.id, Instrument.RELATORIO_II, 2),
+                   (g.id, Instrument.PAPER, 2.5)]
+        group_ids.append(g.id)
+    db.session.add_all(student() for _ in range(loose))
+    db.session.flush()
+    grades.upsert_scores(scores, base["admin_id"])
+    score_summary.refresh(group_ids)
+    db.session.commit()
+
+
+def test_iter_rows_is_one_statement(base, count_queries):
+    grow(base, n_groups=2, per_group=3, loose=2)
+    with count_queries() as sql:
+        small = list(gradebook.iter_rows())
+    assert len(sql) == 1
+
+    grow(base, n_groups=20, per_group=4, loose=15)
+    with count_queries() as sql:
+        big = list(gradebook.iter_rows([base["offering_id"]]))
+    assert len(sql) == 1
+    assert (len(small), len(big)) == (8, 8 + 95)
+
+    graded = [r for r in big if r.group_id is not None]
+    assert all(r.banner == 4.0 and r.final == 10.0 for r in graded)
+    assert all(r.final is None and r.banner is None for r in big if r.group_id is None)
+
+
+ADMIN_URLS = [
+    "/reports/export?fmt=csv",
+    "/reports/export?fmt=xlsx",
+    "/reports/groups.csv",
+    "/reports/groups.xlsx",
+    "/reports/export_alunos_sg?fmt=csv",
+    "/reports/export_alunos_sg?fmt=xlsx",
+]
+PROF_URLS = [
+    "/professors/offerings/{off}",
+    "/professors/offerings/{off}/export/csv",
+    "/professors/offerings/{off}/export/xlsx",
+]
+
+
+def _measure(client, url, count_queries):
+    client.get(url)  # aquece caches por processo (identidade, dados de referência)
+    with count_queries() as sql:
+        r = client.get(url)
+        body = r.data  # consome o streaming dentro da medição
+    assert r.status_code == 200, (url, r.status_code)
+    assert body
+    return len(sql)
+
+
+@pytest.mark.parametrize("email,url", [("a@x.com", u) for u in ADMIN_URLS]
+                         + [("p@x.com", u) for u in PROF_URLS])
+def test_statement_count_independent_of_size(base, client, login, count_queries, email, url):
+    url = url.format(off=base["offering_id"])
+    login(client, email)
+
+    grow(base, n_groups=2, per_group=3, loose=2)
+    small = _measure(client, url, count_queries)
+
+    grow(base, n_groups=20, per_group=4, loose=15)
+    big = _measure(client, url, count_queries)
+
+    assert small == big, f"{url}: {small} statements com poucos dados, {big} com 10x mais"
+    assert big <= 6, f"{url}: {big} statements"
@@ -0,0 +1,54 @@
+from app.extensions import db
+from app.models import User
+from app.services import identity_cache
+
+
+def _user(role="professor"):
+    u = User(email="p@x.com", full_name="Prof", role=role)
+    u.set_password("secret1")
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def test_access_changes_bump_the_shared_version(app):
+    u = _user()
+    v = identity_cache.shared_version()
+
+    u.password_hash = "x"  # não aparece no snapshot
+    db.session.commit()
+    assert identity_cache.shared_version() == v
+
+    u.is_active = False
+    db.session.commit()
+    assert identity_cache.shared_version() != v
+
+
+def test_bump_from_another_worker_discards_the_snapshot(app):
+    u = _user()
+    loads = []
+
+    def loader(uid):
+        loads.append(uid)
+        return db.session.get(User, uid)
+
+    identity_cache.clear()
+    assert identity_cache.get(u.id, loader).is_professor
+    assert identity_cache.get(u.id, loader).is_professor
+    assert len(loads) == 1
+
+    # outro worker rebaixa o usuário: aqui só o carimbo em disco muda
+    db.session.execute(User.__table__.update().where(User.id == u.id).values(role="guest"))
+    db.session.commit()
+    assert not identity_cache.get(u.id, loader).is_professor
+    assert len(loads) == 2
+
+
+def test_deactivated_user_is_logged_out_on_next_request(app, client, login):
+    u = _user(role="admin")
+    login(client, "p@x.com")
+    assert client.get("/reports/export?fmt=csv").status_code == 200
+
+    u.is_active = False
+    db.session.commit()
+    assert client.get("/reports/export?fmt=csv").status_code != 200
@@ -0,0 +1,70 @@
+import csv
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.extensions import db
+from app.models import User, Campus, Offering, Student
+from app.services import offering_zip
+
+
+@pytest.fixture
+def offerings(app):
+    campus = Campus(name="Centro")
+    admin = User(email="a@x.com", full_name="Admin", role="admin")
+    admin.set_password("secret1")
+    offs = [Offering(code=c) for c in ("2025.1", "2025.2", "2026.1")]
+    db.session.add_all([campus, admin, *offs])
+    db.session.flush()
+    for i, off in enumerate(offs[:2]):  # 2026.1 fica sem alunos
+        db.session.add_all(Student(rgm=f"R{i}{n}", name=f"Aluno {i}{n}", campus_id=campus.id,
+                                   offering_id=off.id) for n in range(3))
+    db.session.commit()
+    return {o.code: o.id for o in offs}
+
+
+def _sheets(data: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {name: list(csv.reader(io.StringIO(zf.read(name).decode("utf-8-sig"))))
+                for name in zf.namelist()}
+
+
+def _check(sheets):
+    assert sorted(sheets) == ["notas_oferta_2025.1.csv", "notas_oferta_2025.2.csv",
+                              "notas_oferta_2026.1.csv"]
+    assert [len(rows) - 1 for _, rows in sorted(sheets.items())] == [3, 3, 0]
+    assert {r[4] for r in sheets["notas_oferta_2025.2.csv"][1:]} == {"2025.2"}
+
+
+def test_web_zip_renders_inline(offerings, client, login, monkeypatch):
+    def no_pool(*a, **kw):
+        raise AssertionError("a rota web não deve abrir pool de processos")
+    monkeypatch.setattr(offering_zip, "ProcessPoolExecutor", no_pool)
+
+    login(client, "a@x.com")
+    r = client.get("/reports/offerings.zip?fmt=csv")
+    assert r.status_code == 200
+    _check(_sheets(r.data))
+
+
+def test_cli_pool(offerings):
+    data = b"".join(offering_zip.iter_zip(None, "csv", workers=2))
+    _check(_sheets(data))
+
+
+def test_pool_in_flight_is_bounded(offerings, monkeypatch):
+    class InlinePool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context=None):
+            super().__init__(max_workers)
+    monkeypatch.setattr(offering_zip, "ProcessPoolExecutor", InlinePool)
+    loaded = []
+    real = offering_zip.sheet_rows
+    monkeypatch.setattr(offering_zip, "sheet_rows", lambda oid: loaded.append(oid) or real(oid))
+
+    chunks = offering_zip.iter_zip(None, "csv", workers=1)
+    first = next(chunks)
+    assert len(loaded) == 2  # 2 × workers, não as 3 ofertas
+    _check(_sheets(first + b"".join(chunks)))
+    assert len(loaded) == 3
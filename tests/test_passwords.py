@@ -0,0 +1,35 @@
+import threading
+import time
+
+import pytest
+
+from app.services import passwords
+
+
+@pytest.fixture
+def slow_pool(app):
+    app.config.update(PASSWORD_POOL_WORKERS=1, PASSWORD_POOL_QUEUE=4, PASSWORD_POOL_TIMEOUT=0.5)
+    yield app
+    passwords._reset_pool()
+
+
+def test_timed_out_jobs_that_never_started_give_their_slot_back(slow_pool):
+    errors = []
+
+    def call():
+        with slow_pool.app_context():
+            try:
+                passwords._run(time.sleep, 2)
+            except passwords.PasswordPoolBusy:
+                errors.append(True)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+
+    _, slots = passwords._get_pool("login", 1, 4)
+    # 1 rodando + 1 já entregue ao processo (não canceláveis) seguram vaga; o 3º saiu da fila
+    assert slots._value == 2
@@ -0,0 +1,49 @@
+import pytest
+
+from app.config import _positive_float
+from app.extensions import db
+from app.models import User
+from app.services import rate_limit
+
+
+@pytest.fixture
+def throttled(app, monkeypatch):
+    app.config.update(LOGIN_RATE_ENABLED=True, LOGIN_RATE_BACKEND="memory",
+                      LOGIN_RATE_IP_BURST=3, LOGIN_RATE_IP_PER_MIN=1,
+                      LOGIN_RATE_EMAIL_BURST=50, LOGIN_RATE_EMAIL_PER_MIN=1)
+    monkeypatch.setattr(rate_limit, "_backend", rate_limit.MemoryBuckets())
+    for n in range(6):
+        u = User(email=f"g{n}@x.com", full_name=f"Convidado {n}", role="guest")
+        u.set_password("secret1")
+        db.session.add(u)
+    db.session.commit()
+    return app
+
+
+def _post(app, email, password="secret1"):
+    # um cliente novo por login (mesmo IP), como convidados atrás do mesmo NAT
+    return app.test_client().post("/login", data={"email": email, "password": password}).status_code
+
+
+def test_successful_logins_do_not_drain_the_ip(throttled):
+    assert [_post(throttled, f"g{n}@x.com") for n in range(6)] == [302] * 6
+
+
+def test_failed_logins_drain_the_ip(throttled):
+    assert [_post(throttled, "g0@x.com", "errada") for _ in range(3)] == [200] * 3
+    assert _post(throttled, "g1@x.com") == 429
+
+
+def test_forwarded_for_is_ignored_without_proxy(throttled):
+    client = throttled.test_client()
+    for n in range(4):
+        r = client.post("/login", data={"email": "g0@x.com", "password": "errada"},
+                        headers={"X-Forwarded-For": f"10.0.0.{n}"})
+    assert r.status_code == 429
+
+
+@pytest.mark.parametrize("value", ["0", "-5"])
+def test_zero_refill_rate_is_rejected_at_config_load(monkeypatch, value):
+    monkeypatch.setenv("LOGIN_RATE_IP_PER_MIN", value)
+    with pytest.raises(ValueError, match="LOGIN_RATE_IP_PER_MIN"):
+        _positive_float("LOGIN_RATE_IP_PER_MIN", "30")
@@ -0,0 +1,57 @@
+from app.extensions import db
+from app.models import User, Group, BannerEvaluation, GroupScoreSummary
+from app.services import score_summary
+
+
+def _group_with_banner():
+    prof = User(email="p@x.com", full_name="Prof", role="professor")
+    guest = User(email="g@x.com", full_name="Conv", role="guest")
+    for u in (prof, guest):
+        u.set_password("secret1")
+    db.session.add_all([prof, guest])
+    db.session.flush()
+    g = Group(title="G", orientador_user_id=prof.id)
+    db.session.add(g)
+    db.session.flush()
+    db.session.add(BannerEvaluation(group_id=g.id, evaluator_user_id=guest.id, score=4))
+    db.session.commit()
+    return g.id
+
+
+def test_refresh_upserts_over_a_row_written_meanwhile(app, count_queries):
+    gid = _group_with_banner()
+    # linha gravada por outra requisição (1º banner concorrente), com valores já velhos
+    db.session.add(GroupScoreSummary(group_id=gid, banner_sum=0, banner_count=0, final=0))
+    db.session.commit()
+
+    with count_queries() as sql:
+        score_summary.refresh([gid])
+        db.session.commit()
+    assert not any(s.lstrip().upper().startswith("DELETE") for s in sql)
+
+    row = db.session.get(GroupScoreSummary, gid)
+    db.session.refresh(row)
+    assert (row.banner_count, float(row.banner_sum), float(row.final)) == (1, 4.0, 4.0)
+
+
+def test_add_banner_creates_the_missing_row(app):
+    gid = _group_with_banner()
+    db.session.query(GroupScoreSummary).delete()
+    db.session.commit()
+
+    score_summary.add_banner(gid, 4)  # 0 linhas no UPDATE -> refresh da origem
+    db.session.commit()
+    assert db.session.get(GroupScoreSummary, gid).banner_count == 1
+
+
+def test_full_rebuild_drops_rows_of_deleted_groups(app):
+    gid = _group_with_banner()
+    score_summary.refresh()
+    db.session.commit()
+    db.session.query(BannerEvaluation).delete()
+    db.session.query(Group).delete()  # sem score_summary.delete(): resta linha órfã
+    db.session.commit()
+
+    score_summary.refresh()
+    db.session.commit()
+    assert db.session.get(GroupScoreSummary, gid) is None
@@ -0,0 +1,35 @@
+import io
+
+from app.utils import spreadsheet
+
+
+def _rows(data: bytes, filename="alunos.csv"):
+    return list(spreadsheet.iter_table(io.BytesIO(data), filename))
+
+
+def test_utf8_char_split_at_sample_boundary():
+    # "ç" (2 bytes em UTF-8) cortado no último byte da amostra
+    head = b"rgm,nome\n"
+    tail = b"\n2,Jo"
+    filler = b"1," + b"x" * (spreadsheet.SNIFF_BYTES - len(head) - 2 - len(tail) - 1)
+    data = head + filler + tail + "ção Conceição".encode("utf-8") + b"\n"
+    assert data[:spreadsheet.SNIFF_BYTES].endswith(b"\xc3")
+
+    rows = _rows(data)
+    assert rows[-1] == ["2", "Joção Conceição"]
+
+
+def test_sniff_encoding_partial_sample():
+    cut = "Conceição".encode("utf-8")[:-2]  # termina no meio do "ã"
+    assert spreadsheet._sniff_encoding(cut) == "utf-8-sig"
+    assert spreadsheet._sniff_encoding(cut, complete=True) == "cp1252"
+
+
+def test_cp1252_file():
+    rows = _rows("rgm;nome\n1;José\n".encode("cp1252"))
+    assert rows == [["rgm", "nome"], ["1", "José"]]
+
+
+def test_utf8_bom_and_semicolon():
+    rows = _rows("\ufeffrgm;nome\n1;Ana Lúcia\n".encode("utf-8"))
+    assert rows == [["rgm", "nome"], ["1", "Ana Lúcia"]]
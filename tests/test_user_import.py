@@ -0,0 +1,55 @@
+import io
+
+from app.extensions import db
+from app.models import User
+from app.services import passwords, user_import
+
+
+def _admin():
+    u = User(email="a@x.com", full_name="Admin", role="admin")
+    u.set_password("secret1")
+    db.session.add(u)
+    db.session.commit()
+
+
+def test_cli_hashes_on_every_core_by_default(app, monkeypatch):
+    seen = {}
+
+    class Pool:
+        def __init__(self, max_workers, mp_context=None):
+            seen["workers"] = max_workers
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, fn, *its, chunksize=1):
+            return map(fn, *its)
+
+    monkeypatch.setattr(passwords, "ProcessPoolExecutor", Pool)
+    monkeypatch.setattr(passwords.os, "cpu_count", lambda: 3)
+    text = "email,nome\n" + "".join(f"u{n}@x.com,Usuário {n}\n" for n in range(10))
+
+    rep = user_import.import_users(text, hasher=None)
+    assert len(rep.created) == 10 and seen["workers"] == 3
+
+
+def test_web_upload_does_not_use_the_login_pool(app, client, login, monkeypatch):
+    _admin()
+    login(client, "a@x.com")
+    app.config.update(PASSWORD_POOL_WORKERS=1, PASSWORD_IMPORT_WORKERS=1)
+
+    def login_pool(*a, **kw):
+        raise AssertionError("upload de usuários ocupou vaga do pool do login")
+    monkeypatch.setattr(passwords, "_run", login_pool)
+
+    csv_data = b"email,nome,senha\ng1@x.com,Convidado 1,secret1\ng2@x.com,Convidado 2,\n"
+    r = client.post("/admin/users/import", data={"file": (io.BytesIO(csv_data), "u.csv")},
+                    content_type="multipart/form-data")
+    assert r.status_code == 200
+    app.config["PASSWORD_POOL_WORKERS"] = 0
+    g1 = User.query.filter_by(email="g1@x.com").one()
+    assert g1.check_password("secret1")
+    assert User.query.filter_by(email="g2@x.com").count() == 1
@@ -0,0 +1,55 @@
+from app.extensions import db
+from app.models import Campus, User
+from app.services import export_cache, reference_cache
+
+
+def _user():
+    u = User(email="p@x.com", full_name="Prof", role="professor")
+    u.set_password("secret1")
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def test_orm_commit_invalidates_both_caches(app):
+    ref, exp = reference_cache.version(), export_cache.data_version()
+    db.session.add(Campus(name="Centro"))
+    db.session.commit()
+    assert reference_cache.version() == ref + 1
+    assert export_cache.data_version() != exp
+
+
+def test_rollback_invalidates_nothing(app):
+    ref, exp = reference_cache.version(), export_cache.data_version()
+    db.session.add(Campus(name="Centro"))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert (reference_cache.version(), export_cache.data_version()) == (ref, exp)
+
+
+def test_user_columns_are_filtered_per_cache(app):
+    u = _user()
+    ref, exp = reference_cache.version(), export_cache.data_version()
+
+    u.role = "admin"  # aparece nos selects, não nas planilhas
+    db.session.commit()
+    assert reference_cache.version() == ref + 1
+    assert export_cache.data_version() == exp
+
+    u.password_hash = "x"  # nenhum dos dois
+    db.session.commit()
+    assert reference_cache.version() == ref + 1
+    assert export_cache.data_version() == exp
+
+    u.full_name = "Profa."  # os dois
+    db.session.commit()
+    assert reference_cache.version() == ref + 2
+    assert export_cache.data_version() != exp
+
+
+def test_core_insert_through_the_session_counts(app):
+    ref = reference_cache.version()
+    db.session.execute(Campus.__table__.insert(), [{"name": "Norte"}, {"name": "Sul"}])
+    db.session.commit()
+    assert reference_cache.version() == ref + 1